@@ -0,0 +1,92 @@
+"""Measure per-click latency on the quiz page with Streamlit's AppTest.
+
+Two timings per click on a long quiz:
+
+* ``app``: clicking Next in the whole app (``quiz.py`` or ``--app PATH``),
+  i.e. a full script run plus any ``st.rerun()`` the click triggers.  This
+  is what every click cost before the question panel became a fragment;
+  point ``--app`` at an older checkout to compare.
+* ``fragment``: rerunning only ``show_question_panel``, which is what a
+  click inside the panel costs in a real session now.  (AppTest always
+  reruns the whole script, so the fragment is timed in a script of its own.)
+
+Usage:
+    python benchmarks/bench_clicks.py [--questions 5000] [--clicks 20] [--app PATH]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import quiz  # noqa: E402
+
+FRAGMENT_SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO!r})
+import quiz
+quiz.show_question_panel()
+"""
+
+
+def make_mcqs(questions):
+    return [{"question": f"Question {i}: which rotor setting applies in case {i}?",
+             "options": {"A": f"Setting {i}", "B": f"Setting {i + 1}",
+                         "C": f"Setting {i + 2}", "D": "None of these"},
+             "answer": "ABCD"[i % 4]}
+            for i in range(questions)]
+
+
+def quiz_state(at, mcqs):
+    at.session_state['authenticated'] = True
+    at.session_state['mcqs'] = mcqs
+    at.session_state['original_mcqs'] = mcqs
+    at.session_state['quiz_started'] = True
+    at.session_state['is_random_quiz'] = False
+    at.session_state['current_question'] = 0
+    at.session_state['marked_questions'] = set()
+    at.session_state['answered'] = quiz.AnswerSheet(len(mcqs))
+    return at
+
+
+def time_clicks(at, clicks):
+    at.run()
+    times = []
+    for _ in range(clicks):
+        button = next(b for b in at.button if 'Next' in b.label)
+        start = time.perf_counter()
+        button.click().run()
+        times.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return times
+
+
+def report(name, times):
+    print(f"{name:9} median {statistics.median(times) * 1000:7.1f} ms   "
+          f"p90 {sorted(times)[int(len(times) * 0.9)] * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=5000)
+    parser.add_argument('--clicks', type=int, default=20)
+    parser.add_argument('--app', default=os.path.join(REPO, 'quiz.py'),
+                        help="app script to time full reruns against")
+    args = parser.parse_args()
+
+    mcqs = quiz.QuestionBank.from_mcqs(make_mcqs(args.questions))
+    print(f"{args.questions}-question quiz, {args.clicks} clicks on Next")
+    app = quiz_state(AppTest.from_file(args.app, default_timeout=120), mcqs)
+    report("app", time_clicks(app, args.clicks))
+    fragment = quiz_state(AppTest.from_string(FRAGMENT_SCRIPT, default_timeout=120), mcqs)
+    report("fragment", time_clicks(fragment, args.clicks))
+
+
+if __name__ == '__main__':
+    main()
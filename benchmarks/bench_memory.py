@@ -0,0 +1,83 @@
+"""Measure the memory held by a question pool: MCQ dicts vs ``QuestionBank``.
+
+Builds a synthetic pool (short option texts repeat across questions, as in
+real banks), then reports the bytes allocated for the pool as plain dicts
+and as a columnar ``QuestionBank``, using tracemalloc.
+
+Usage:
+    python benchmarks/bench_memory.py [--questions 100000] [--seed 0]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz import QuestionBank  # noqa: E402
+
+WORDS = (
+    "rotor blade engine flight helicopter lift drag thrust wing tail pitch "
+    "roll yaw altitude pressure fuel pilot cockpit landing gear hover torque "
+    "speed control stick pedal airfoil stall vortex gyroscope collective"
+).split()
+COMMON_OPTIONS = ["True", "False", "All of the above", "None of the above",
+                  "Both A and B", "Increases", "Decreases", "Remains the same"]
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def make_texts(questions, seed):
+    """Raw (question, options, answer) rows; strings are fresh objects, as parsed."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(questions):
+        options = {}
+        for letter in "ABCD":
+            if rng.random() < 0.4:
+                # A new object per cell, like text read from a workbook
+                options[letter] = rng.choice(COMMON_OPTIONS).encode().decode()
+            else:
+                options[letter] = _sentence(rng, rng.randint(2, 5))
+        rows.append((_sentence(rng, rng.randint(8, 20)) + "?", options, rng.choice("ABCD")))
+    return rows
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mcqs, dict_bytes = measure(lambda: [
+        {"question": question, "options": options, "answer": answer}
+        for question, options, answer in make_texts(args.questions, args.seed)])
+    bank, bank_bytes = measure(lambda: QuestionBank.from_mcqs(
+        {"question": question, "options": options, "answer": answer}
+        for question, options, answer in make_texts(args.questions, args.seed)))
+
+    assert list(bank) == mcqs
+    mb = 1024 * 1024
+    print(f"{args.questions} questions")
+    print(f"  dicts:        {dict_bytes / mb:8.1f} MB  ({dict_bytes / args.questions:6.0f} B/question)")
+    print(f"  QuestionBank: {bank_bytes / mb:8.1f} MB  ({bank_bytes / args.questions:6.0f} B/question)"
+          f"  [{len(bank.texts)} distinct texts]")
+    print(f"  saved:        {(dict_bytes - bank_bytes) / mb:8.1f} MB  ({1 - bank_bytes / dict_bytes:.0%})")
+
+
+if __name__ == '__main__':
+    main()
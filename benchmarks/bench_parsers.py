@@ -0,0 +1,302 @@
+"""Benchmark the sheet parsers stage by stage on generated workbooks.
+
+Writes synthetic ``.xlsx`` workbooks for every layout ``parse_excel_to_mcqs``
+handles and times, per workbook:
+
+* ``read``: ``pd.read_excel`` of all sheets with the best DataFrame backend
+* ``detect``: ``detect_sheet_layout`` calls
+* ``parse``: the rest of ``parse_excel_to_mcqs`` (normalization, row parsers)
+* ``validate``: ``validate_mcq_batch`` calls made by the parsers
+
+Layouts: ``wide`` (Question, A-D, Answer columns), ``legacy`` (Question /
+A-D rows with the answer letter in column 4), ``multi_table`` (legacy tables
+under ``TableN`` markers), ``freeform`` (numbered questions in the second
+column, ``A)`` options ticked in column 3, note rows) and ``multi_sheet``
+(one sheet of each of those).
+
+Results go to a JSON file (``benchmarks/parser_results.json`` by default).
+With ``--baseline`` a previous results file is compared stage by stage and
+the script exits with status 1 when a stage got slower than ``--tolerance``.
+
+Generated workbooks are kept in ``--workdir`` when given, so repeated runs
+skip the (slow) generation of the large ones.
+
+Usage:
+    python benchmarks/bench_parsers.py [--sizes 1000 10000 50000 200000]
+                                       [--layouts wide legacy ...] [--repeat 3]
+                                       [--workdir DIR] [--output PATH]
+                                       [--baseline PATH] [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import openpyxl  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import quiz  # noqa: E402
+
+WORDS = (
+    "rotor blade engine flight helicopter lift drag thrust wing tail pitch "
+    "roll yaw altitude pressure fuel pilot cockpit landing gear hover torque "
+    "speed control stick pedal airfoil stall vortex gyroscope collective"
+).split()
+# Kept apart from WORDS so options never repeat their question (the
+# validator rejects those)
+OPTION_WORDS = (
+    "increases decreases remains constant doubles halves forward aft left "
+    "right upward downward clockwise counterclockwise early late high low"
+).split()
+LAYOUTS = ('wide', 'legacy', 'multi_table', 'freeform', 'multi_sheet')
+STAGES = ('read', 'detect', 'parse', 'validate')
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_results.json')
+TABLES_PER_SHEET = 10
+
+
+def _sentence(rng, n, words=WORDS):
+    return " ".join(rng.choice(words) for _ in range(n)).capitalize()
+
+
+def make_questions(questions, seed):
+    """(question, [A-D option texts], answer letter) triples."""
+    rng = random.Random(seed)
+    return [(f"{_sentence(rng, rng.randint(6, 14))} ({i})?",
+             [f"{_sentence(rng, rng.randint(1, 4), OPTION_WORDS)} {letter}{i}" for letter in "ABCD"],
+             rng.choice("ABCD"))
+            for i in range(questions)]
+
+
+def wide_rows(items):
+    yield ['Question', 'A', 'B', 'C', 'D', 'Answer']
+    for question, options, answer in items:
+        yield [question, *options, answer]
+
+
+def _legacy_block(question, options, answer):
+    yield ['Question', question, None, None]
+    for letter, text in zip("ABCD", options):
+        yield [letter, text, None, letter if letter == answer else None]
+    yield [None, None, None, None]
+
+
+def legacy_rows(items):
+    yield ['Column 1', 'Column 2', 'Column 3', 'Column 4']
+    for item in items:
+        yield from _legacy_block(*item)
+
+
+def multi_table_rows(items):
+    yield ['Column 1', 'Column 2', 'Column 3', 'Column 4']
+    per_table = -(-len(items) // TABLES_PER_SHEET)
+    for table, start in enumerate(range(0, len(items), per_table), 1):
+        yield [f'Table{table}', None, None, None]
+        for item in items[start:start + per_table]:
+            yield from _legacy_block(*item)
+
+
+def freeform_rows(items):
+    yield ['Notes', None, None, None]
+    for number, (question, options, answer) in enumerate(items, 1):
+        yield [None, f'Question {number}: {question}', None, None]
+        for letter, text in zip("ABCD", options):
+            yield [f'{letter})', text, '✓' if letter == answer else None, None]
+        yield ['Reference', 'Manual chapter 3', None, None]
+
+
+SHEET_WRITERS = {
+    'wide': wide_rows,
+    'legacy': legacy_rows,
+    'multi_table': multi_table_rows,
+    'freeform': freeform_rows,
+}
+
+
+def make_workbook(path, layout, questions, seed=0):
+    """Write a ``layout`` workbook with ``questions`` questions to ``path``."""
+    items = make_questions(questions, seed)
+    if layout == 'multi_sheet':
+        writers = list(SHEET_WRITERS.items())
+        per_sheet = -(-len(items) // len(writers))
+        sheets = [(name, writer, items[pos * per_sheet:(pos + 1) * per_sheet])
+                  for pos, (name, writer) in enumerate(writers)]
+    else:
+        sheets = [('Sheet1', SHEET_WRITERS[layout], items)]
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for name, writer, sheet_items in sheets:
+        sheet = workbook.create_sheet(name)
+        for row in writer(sheet_items):
+            sheet.append(row)
+    workbook.save(path)
+
+
+def workbook_path(workdir, layout, questions, seed):
+    path = os.path.join(workdir, f"{layout}_{questions}_{seed}.xlsx")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        make_workbook(path + '.tmp', layout, questions, seed)
+        os.replace(path + '.tmp', path)
+        print(f"  generated {os.path.basename(path)} in {time.perf_counter() - start:.1f} s")
+    return path
+
+
+class StageTimer:
+    """Accumulates time spent inside wrapped ``quiz`` functions."""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+        return timed
+
+
+def dataframe_reader():
+    """The best installed backend that reads whole sheets into DataFrames."""
+    for backend in quiz.reader_candidates('xlsx'):
+        if isinstance(backend, quiz.PandasReader):
+            return backend
+    raise SystemExit("no DataFrame reader installed for .xlsx")
+
+
+def time_workbook(path, engine):
+    """One pass over ``path``; returns (stage seconds, questions parsed, layouts)."""
+    timer = StageTimer()
+    detect, validate = quiz.detect_sheet_layout, quiz.validate_mcq_batch
+    # The parsers look both functions up as module globals
+    quiz.detect_sheet_layout = timer.wrap('detect', detect)
+    quiz.validate_mcq_batch = timer.wrap('validate', validate)
+    try:
+        start = time.perf_counter()
+        sheets = pd.read_excel(path, sheet_name=None, engine=engine)
+        timer.seconds['read'] = time.perf_counter() - start
+
+        parsed = 0
+        layouts = []
+        start = time.perf_counter()
+        for df in sheets.values():
+            report = {}
+            parsed += len(quiz.parse_excel_to_mcqs(df, report))
+            layouts.append(report['layout'])
+        total = time.perf_counter() - start
+    finally:
+        quiz.detect_sheet_layout, quiz.validate_mcq_batch = detect, validate
+    timer.seconds['parse'] = total - timer.seconds['detect'] - timer.seconds['validate']
+    return timer.seconds, parsed, layouts
+
+
+def run_case(path, layout, questions, engine, repeat):
+    runs = []
+    for _ in range(repeat):
+        seconds, parsed, layouts = time_workbook(path, engine)
+        runs.append(seconds)
+    best = {stage: min(run[stage] for run in runs) for stage in STAGES}
+    best['total'] = sum(best.values())
+    if parsed != questions:
+        print(f"  warning: {layout} parsed {parsed} of {questions} questions")
+    return {
+        'layout': layout,
+        'questions': questions,
+        'parsed': parsed,
+        'sheet_layouts': layouts,
+        'file_bytes': os.path.getsize(path),
+        'seconds': {stage: round(value, 6) for stage, value in best.items()},
+        'questions_per_second': round(parsed / best['total']) if best['total'] else None,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print stage ratios against a previous results file; return the regressions."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {(r['layout'], r['questions']): r for r in json.load(fh)['results']}
+    regressions = []
+    print(f"\ncompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        old = baseline.get((result['layout'], result['questions']))
+        if old is None:
+            continue
+        cells = []
+        for stage in (*STAGES, 'total'):
+            before, after = old['seconds'].get(stage), result['seconds'][stage]
+            if not before:
+                continue
+            ratio = after / before
+            flag = ''
+            # Sub-millisecond stages are all noise
+            if ratio > 1 + tolerance and after - before > 0.001:
+                flag = '!'
+                regressions.append((result['layout'], result['questions'], stage, ratio))
+            cells.append(f"{stage} {ratio:5.2f}x{flag}")
+        print(f"  {result['layout']:12} {result['questions']:>7}  " + "  ".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000, 200000])
+    parser.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="keep generated workbooks here (default: temporary)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', help="previous results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="slowdown ratio above which a stage counts as a regression")
+    args = parser.parse_args()
+
+    backend = dataframe_reader()
+    print(f"reading with {backend.name}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for questions in args.sizes:
+            for layout in args.layouts:
+                path = workbook_path(workdir, layout, questions, args.seed)
+                result = run_case(path, layout, questions, backend.engine, args.repeat)
+                results.append(result)
+                seconds = result['seconds']
+                print(f"{layout:12} {questions:>7}  " +
+                      "  ".join(f"{stage} {seconds[stage] * 1000:9.1f} ms"
+                                for stage in (*STAGES, 'total')) +
+                      f"  {result['questions_per_second']}/s")
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump({
+            'environment': {
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'reader': backend.name,
+                'machine': platform.machine(),
+            },
+            'repeat': args.repeat,
+            'results': results,
+        }, fh, indent=2)
+    print(f"wrote {args.output}")
+
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than the baseline")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Measure what durable progress costs per click, and how fast resume reads are.
+
+* ``click``: the answer/next transitions a quiz click runs, with and without
+  a ``ProgressRecorder`` attached; the difference is the time spent on the
+  request path, i.e. queueing events for the write-behind thread.
+* ``flush``: writing everything the clicks queued (off the request path).
+* ``resume``: ``ProgressStore.load`` of random tokens from a database
+  holding ``--sessions`` saved attempts.
+
+The script exits with status 1 when the 99th percentile of the per-click
+overhead is above ``--budget-ms``.
+
+Usage:
+    python benchmarks/bench_progress.py [--questions 600] [--clicks 5000]
+                                        [--sessions 10000] [--budget-ms 1.0]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quiz_progress  # noqa: E402
+import quiz_state  # noqa: E402
+from quiz_state import QUESTION_WIDGET_KEY, QuizView  # noqa: E402
+
+
+def make_pool(size):
+    return [{"question": f"Question {i}", "options": {"A": "yes", "B": "no"},
+             "answer": "AB"[i % 2]}
+            for i in range(size)]
+
+
+def new_state(pool, questions, recorder=None):
+    state = {'pool_key': 'bench', quiz_state.PROGRESS_KEY: recorder}
+    quiz_state.start_quiz(state, QuizView.sample(pool, questions, seed=1), is_random=True)
+    return state
+
+
+def time_clicks(state, clicks):
+    """Seconds per click: answer the current question, then move on."""
+    times = []
+    size = len(state['mcqs'])
+    for click in range(clicks):
+        if click and click % size == 0:
+            quiz_state.retake_quiz(state)
+        idx = state['current_question']
+        state[QUESTION_WIDGET_KEY.format(idx)] = 'A'
+        start = time.perf_counter()
+        quiz_state.submit_answer(state)
+        quiz_state.next_question(state)
+        if click % 7 == 0:
+            quiz_state.toggle_mark(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def micros(seconds):
+    return f"{seconds * 1e6:8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=600)
+    parser.add_argument('--clicks', type=int, default=5000)
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--budget-ms', type=float, default=1.0,
+                        help="largest acceptable p99 per-click overhead")
+    args = parser.parse_args()
+
+    pool = make_pool(max(args.questions * 10, 1000))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = quiz_progress.ProgressStore(os.path.join(tmp, 'progress.sqlite3'))
+        try:
+            baseline = time_clicks(new_state(pool, args.questions), args.clicks)
+            recorded = time_clicks(
+                new_state(pool, args.questions,
+                          quiz_progress.ProgressRecorder(store, quiz_progress.new_token())),
+                args.clicks)
+            start = time.perf_counter()
+            store.flush()
+            flush_seconds = time.perf_counter() - start
+
+            overhead_median = statistics.median(recorded) - statistics.median(baseline)
+            overhead_p99 = percentile(recorded, 0.99) - percentile(baseline, 0.99)
+            print(f"{args.questions}-question quiz, {args.clicks} clicks")
+            print(f"click    without {micros(statistics.median(baseline))} median "
+                  f"{micros(percentile(baseline, 0.99))} p99")
+            print(f"click    with    {micros(statistics.median(recorded))} median "
+                  f"{micros(percentile(recorded, 0.99))} p99")
+            print(f"overhead         {micros(overhead_median)} median {micros(overhead_p99)} p99")
+            print(f"flush    {flush_seconds * 1000:.1f} ms for the last batch; "
+                  f"{store.written} row write(s) in {store.batches} transaction(s)")
+
+            tokens = [quiz_progress.new_token() for _ in range(args.sessions)]
+            state = new_state(pool, args.questions)
+            start = time.perf_counter()
+            for token in tokens:
+                quiz_progress.ProgressRecorder(store, token).started(state)
+            store.flush()
+            print(f"saved    {args.sessions} attempt(s) in {time.perf_counter() - start:.2f} s")
+
+            loads = []
+            for token in random.sample(tokens, min(1000, len(tokens))):
+                start = time.perf_counter()
+                store.load(token)
+                loads.append(time.perf_counter() - start)
+            print(f"resume   {micros(statistics.median(loads))} median "
+                  f"{micros(percentile(loads, 0.99))} p99")
+        finally:
+            store.close()
+
+    if overhead_p99 > args.budget_ms / 1000:
+        print(f"per-click overhead above the {args.budget_ms} ms budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
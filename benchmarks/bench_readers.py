@@ -0,0 +1,156 @@
+"""Benchmark the spreadsheet reader backends and record the fastest per file type.
+
+Every installed backend in ``quiz.READER_BACKENDS`` reads each workbook of a
+corpus; the median time per file type is written to a JSON file that
+``quiz.reader_candidates`` uses to rank backends (by default
+``benchmarks/reader_results.json``, or ``$MCQ_READER_BENCHMARKS``).
+
+Without ``--corpus`` a synthetic ``.xlsx``/``.xlsm`` corpus in the wide
+layout is generated.  Pass a directory of real uploads to cover
+``.xls``/``.xlsb`` workbooks as well.
+
+The committed ``benchmarks/reader_results.json`` was measured this way with
+every backend installed; rerun the script on the deployment's hardware (and
+commit the result) after changing readers or their versions.
+
+Usage:
+    python benchmarks/bench_readers.py [--corpus DIR] [--questions 5000]
+                                       [--repeat 3] [--output PATH]
+"""
+import argparse
+import importlib.metadata
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import quiz  # noqa: E402
+
+WORDS = (
+    "rotor blade engine flight helicopter lift drag thrust wing tail pitch "
+    "roll yaw altitude pressure fuel pilot cockpit landing gear hover torque "
+    "speed control stick pedal airfoil stall vortex gyroscope collective"
+).split()
+WORKBOOK_EXTENSIONS = {'xlsx', 'xlsm', 'xlsb', 'xls'}
+# Distributions whose versions are recorded with the timings
+READER_PACKAGES = ('pandas', 'python-calamine', 'openpyxl', 'xlrd')
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def make_workbook(path, questions, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(questions):
+        rows.append({
+            'Question': _sentence(rng, 10) + "?",
+            'A': _sentence(rng, 3),
+            'B': _sentence(rng, 3),
+            'C': _sentence(rng, 3),
+            'D': _sentence(rng, 3),
+            'Answer': rng.choice("ABCD"),
+        })
+    pd.DataFrame(rows).to_excel(path, index=False)
+
+
+def corpus_files(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lstrip('.').casefold() in WORKBOOK_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+def package_versions():
+    versions = {}
+    for package in READER_PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def time_backend(backend, path, repeat):
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    times = []
+    count = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mcqs, _ = backend.parse(io.BytesIO(data))
+        times.append(time.perf_counter() - start)
+        count = len(mcqs)
+    return min(times), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help="directory of workbooks (default: generated)")
+    parser.add_argument('--questions', type=int, default=5000,
+                        help="questions per generated workbook")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=quiz.READER_BENCHMARK_FILE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            files = list(corpus_files(args.corpus))
+        else:
+            files = []
+            for extension in ('xlsx', 'xlsm'):
+                for seed, questions in enumerate((args.questions // 10, args.questions)):
+                    path = os.path.join(tmp, f"bank_{questions}.{extension}")
+                    make_workbook(path, questions, seed)
+                    files.append(path)
+        if not files:
+            parser.error("no workbooks found")
+
+        per_type = {}
+        for path in files:
+            extension = quiz.workbook_extension(path, b'')
+            for backend in quiz.READER_BACKENDS:
+                if extension not in backend.extensions or not backend.available():
+                    continue
+                try:
+                    seconds, count = time_backend(backend, path, args.repeat)
+                except Exception as e:
+                    print(f"{os.path.basename(path):30} {backend.name:18} failed: {e}")
+                    continue
+                per_type.setdefault(extension, {}).setdefault(backend.name, []).append(seconds)
+                print(f"{os.path.basename(path):30} {backend.name:18} "
+                      f"{seconds * 1000:9.1f} ms  {count} questions")
+
+    timings = {extension: {name: statistics.median(times) for name, times in backends.items()}
+               for extension, backends in per_type.items()}
+    for extension, backends in sorted(timings.items()):
+        best = min(backends, key=backends.get)
+        print(f".{extension}: fastest is {best}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump({
+            'timings': timings,
+            'files': len(files),
+            'environment': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'packages': package_versions(),
+            },
+        }, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+    print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Measure the app's cold start: import time and time to first render.
+
+Every sample runs in a fresh interpreter so nothing is already imported:
+
+* ``import``: ``python -X importtime -c "import quiz"``; the slowest
+  modules ``quiz`` imports are listed, with whether pandas, numpy and
+  streamlit_option_menu were loaded by importing ``quiz`` alone.
+* ``login``: ``AppTest.from_file("quiz.py").run()`` up to the password gate,
+  i.e. what a new visitor waits for before anything is shown.  Streamlit's
+  own testing module is imported before the clock starts.
+* ``home``: the same for a signed-in session, which renders the home page
+  (the option menu, and through it pandas, are loaded here).
+
+Results go to a JSON file (``benchmarks/startup_results.json`` by default).
+With ``--baseline`` a previous results file is compared and the script exits
+with status 1 when a measurement got slower than ``--tolerance``.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--output PATH]
+                                       [--baseline PATH] [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_results.json')
+MEASUREMENTS = ('import', 'login', 'home')
+# Modules kept off the import path of quiz.py
+HEAVY_MODULES = ('pandas', 'numpy', 'streamlit_option_menu')
+
+IMPORT_SCRIPT = f"""
+import json, sys
+sys.path.insert(0, {REPO!r})
+import quiz
+print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))
+"""
+
+RENDER_SCRIPT = f"""
+import json, sys, time
+sys.path.insert(0, {REPO!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({os.path.join(REPO, 'quiz.py')!r}, default_timeout=120)
+at.session_state['authenticated'] = sys.argv[1] == 'home'
+start = time.perf_counter()
+at.run()
+seconds = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(json.dumps({{'seconds': seconds,
+                  'loaded': [name for name in {HEAVY_MODULES!r} if name in sys.modules]}}))
+"""
+
+
+def _python(*args):
+    result = subprocess.run([sys.executable, *args], cwd=REPO, capture_output=True,
+                            text=True, check=False)
+    if result.returncode:
+        raise SystemExit(f"{' '.join(args[:2])} failed:\n{result.stderr}")
+    return result
+
+
+def parse_importtime(stderr):
+    """(total seconds, {module imported by quiz: cumulative seconds}).
+
+    ``-X importtime`` indents nested imports two spaces per level and lists
+    them before their importer, so the direct imports of ``quiz`` are the
+    one-level-deep lines just before its own line.
+    """
+    total = 0.0
+    pending = {}
+    direct = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        seconds = int(cumulative) / 1e6
+        if depth == 1:
+            pending[name.strip()] = seconds
+        elif depth == 0:
+            total += seconds
+            if name.strip() == 'quiz':
+                direct = pending
+            pending = {}
+    return total, direct
+
+
+def time_import():
+    """(seconds, {module imported by quiz: seconds}, heavy modules loaded)."""
+    result = _python('-X', 'importtime', '-c', IMPORT_SCRIPT)
+    total, modules = parse_importtime(result.stderr)
+    return total, modules, json.loads(result.stdout.splitlines()[-1])
+
+
+def time_render(page):
+    """(seconds, heavy modules loaded) for a first run ending on ``page``."""
+    result = _python('-c', RENDER_SCRIPT, page)
+    data = json.loads(result.stdout.splitlines()[-1])
+    return data['seconds'], data['loaded']
+
+
+def measure(repeat):
+    samples = {name: [] for name in MEASUREMENTS}
+    loaded = {}
+    slowest_imports = {}
+    for _ in range(repeat):
+        seconds, modules, loaded['import'] = time_import()
+        samples['import'].append(seconds)
+        for name, module_seconds in modules.items():
+            slowest_imports[name] = min(module_seconds, slowest_imports.get(name, module_seconds))
+        for page in ('login', 'home'):
+            seconds, loaded[page] = time_render(page)
+            samples[page].append(seconds)
+    top = sorted(slowest_imports.items(), key=lambda item: -item[1])[:10]
+    return {
+        'seconds': {name: round(min(values), 6) for name, values in samples.items()},
+        'median_seconds': {name: round(statistics.median(values), 6)
+                           for name, values in samples.items()},
+        'loaded': loaded,
+        'top_imports': [{'module': name, 'seconds': round(seconds, 6)} for name, seconds in top],
+    }
+
+
+def compare(result, baseline_path, tolerance):
+    """Print ratios against a previous results file; return the regressions."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = json.load(fh)['seconds']
+    regressions = []
+    print(f"\ncompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for name in MEASUREMENTS:
+        before, after = baseline.get(name), result['seconds'][name]
+        if not before:
+            continue
+        ratio = after / before
+        flag = ''
+        # A few milliseconds either way are process start-up noise
+        if ratio > 1 + tolerance and after - before > 0.01:
+            flag = '!'
+            regressions.append((name, ratio))
+        print(f"  {name:7} {ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', help="previous results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="slowdown ratio above which a measurement counts as a regression")
+    args = parser.parse_args()
+
+    result = measure(args.repeat)
+    for name in MEASUREMENTS:
+        print(f"{name:7} best {result['seconds'][name] * 1000:7.1f} ms   "
+              f"median {result['median_seconds'][name] * 1000:7.1f} ms   "
+              f"loaded: {', '.join(result['loaded'][name]) or '-'}")
+    print("slowest imports of quiz:")
+    for entry in result['top_imports']:
+        print(f"  {entry['module']:28} {entry['seconds'] * 1000:7.1f} ms")
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(result, args.baseline, args.tolerance)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump({
+            'environment': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+            },
+            'repeat': args.repeat,
+            **result,
+        }, fh, indent=2)
+    print(f"wrote {args.output}")
+
+    if regressions:
+        print(f"{len(regressions)} measurement(s) slower than the baseline")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
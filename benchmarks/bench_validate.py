@@ -0,0 +1,116 @@
+"""Benchmark MCQ option validation on a synthetic question bank.
+
+Compares the original per-call implementation of ``validate_mcq_options``
+(reproduced below as ``legacy_validate``) with the precompiled
+``MCQValidator``, one call at a time and through ``validate_many``.
+
+Usage:
+    python benchmarks/bench_validate.py [--questions 100000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz import MCQValidator  # noqa: E402
+
+WORDS = (
+    "rotor blade engine flight helicopter lift drag thrust wing tail pitch "
+    "roll yaw altitude pressure fuel pilot cockpit landing gear hover torque "
+    "speed control stick pedal airfoil stall vortex gyroscope collective"
+).split()
+FILLERS = ["All of the above", "None of the above", "True", "N/A", "Data", "42"]
+
+
+def _legacy_normalize(text):
+    if not isinstance(text, str):
+        text = str(text)
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def legacy_validate(question, options, answer):
+    """The validator as it was before MCQValidator (rebuilds everything per call)."""
+    if not question or not options or not answer:
+        return None, None
+
+    question_normalized = _legacy_normalize(question)
+    valid_options = {}
+
+    metadata_words = set(MCQValidator.METADATA_WORDS)
+
+    for letter, option_text in options.items():
+        option_normalized = _legacy_normalize(option_text)
+        if option_normalized == question_normalized:
+            continue
+        if len(option_normalized) < 2:
+            continue
+        if option_normalized in metadata_words:
+            continue
+        if len(option_normalized) == 1 and option_normalized.isalnum():
+            continue
+        if len(option_normalized) > 5 and option_normalized in question_normalized:
+            continue
+        question_words = set(question_normalized.split())
+        option_words = set(option_normalized.split())
+        if len(option_words) > 0 and len(question_words.intersection(option_words)) / len(option_words) > 0.7:
+            continue
+        if len(option_normalized.replace(' ', '').replace('.', '').replace(',', '').replace('!', '').replace('?', '')) < 2:
+            continue
+        excel_artifacts = list(MCQValidator.EXCEL_ARTIFACTS)
+        if any(artifact in option_normalized for artifact in excel_artifacts):
+            continue
+        valid_options[letter] = option_text
+
+    if len(valid_options) >= 2 and answer in valid_options:
+        return valid_options, answer
+    return None, None
+
+
+def make_bank(n, seed):
+    rng = random.Random(seed)
+    bank = []
+    for _ in range(n):
+        question = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))) + "?"
+        options = {}
+        for letter in "ABCD":
+            if rng.random() < 0.1:
+                options[letter] = rng.choice(FILLERS)
+            else:
+                options[letter] = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        bank.append((question, options, rng.choice("ABCD")))
+    return bank
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bank = make_bank(args.questions, args.seed)
+    validator = MCQValidator()
+
+    legacy_s, expected = timed(lambda: [legacy_validate(*item) for item in bank])
+    single_s, single = timed(lambda: [validator.validate(*item) for item in bank])
+    batch_s, batch = timed(lambda: validator.validate_many(bank))
+    assert single == expected and batch == expected, "validator results diverged"
+
+    kept = sum(1 for options, _ in expected if options)
+    print(f"{len(bank)} questions, {kept} kept")
+    print(f"legacy per-call : {legacy_s:8.3f} s")
+    print(f"compiled        : {single_s:8.3f} s  ({legacy_s / single_s:4.1f}x)")
+    print(f"validate_many   : {batch_s:8.3f} s  ({legacy_s / batch_s:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,60 @@
-import pandas as pd
 import re
+import string
 import os
 import streamlit as st
-from streamlit_option_menu import option_menu
 import base64
 import random
 import difflib
+import struct
+import hashlib
+import codecs
+import importlib
+import importlib.util
+import io
+import json
+import logging
+import mmap
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from types import MappingProxyType
+
+import quiz_profiler
+import quiz_progress
+import quiz_state
+from quiz_profiler import profiled
+from quiz_state import AnswerSheet, OPTION_LETTERS, QUESTION_WIDGET_KEY, QuizView
+
+
+class _LazyModule:
+    """Module stand-in that imports the real module on first attribute use.
+
+    pandas and numpy take longer to import than the rest of the app, and the
+    password gate needs neither, so they are only loaded once a code path
+    actually touches them.  Attributes are cached on first use.
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self._name), attr)
+        setattr(self, attr, value)
+        return value
+
+
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
 
 
 def ordered_option_letters(options_dict):
@@ -13,6 +62,7 @@ def ordered_option_letters(options_dict):
     return [l for l in ['A', 'B', 'C', 'D'] if l in options_dict]
 
 
+@profiled
 def main():
     st.set_page_config(
         page_title="MCQ Quiz Application",
@@ -31,11 +81,9 @@ def main():
     if 'current_question' not in st.session_state:
         st.session_state.current_question = 0
     if 'answered' not in st.session_state:
-        st.session_state.answered = {}
+        st.session_state.answered = AnswerSheet(0)
     if 'marked_questions' not in st.session_state:
         st.session_state.marked_questions = set()
-    if 'correct_answers' not in st.session_state:
-        st.session_state.correct_answers = 0
     if 'quiz_started' not in st.session_state:
         st.session_state.quiz_started = False
     if 'show_results' not in st.session_state:
@@ -48,6 +96,8 @@ def main():
         st.session_state.is_random_quiz = False
     if 'show_random_options' not in st.session_state:
         st.session_state.show_random_options = False
+    if 'show_analysis' not in st.session_state:
+        st.session_state.show_analysis = False
 
     # Helper: consistent option ordering A, B, C, D
     def ordered_option_letters(options_dict):
@@ -72,16 +122,16 @@ def main():
                 st.error("Invalid password")
         st.stop()
 
+    # Loaded past the password gate; the login page renders without it
+    from streamlit_option_menu import option_menu
+
+    attach_progress_recorder()
+    resume_saved_quiz()
+
     with st.sidebar:
         st.title("📚 MCQ Quiz App")
-        if st.button("Logout"):
-            st.session_state.authenticated = False
-            # Clear session quiz state on logout for safety
-            st.session_state.mcqs = []
-            st.session_state.original_mcqs = []
-            st.session_state.quiz_started = False
-            st.session_state.show_results = False
-            st.rerun()
+        # Clears session quiz state on logout for safety
+        st.button("Logout", on_click=_log_out)
 
         selected = option_menu(
             menu_title="Navigation",
@@ -91,6 +141,15 @@ def main():
             default_index=0 if not st.session_state.quiz_started else 1
         )
 
+        if quiz_profiler.profiling_requested():
+            show_profiler_panel()
+
+    # Message left by a button callback, e.g. "No marked questions"
+    notice = st.session_state.pop(quiz_state.NOTICE_KEY, None)
+    if notice:
+        level, text = notice
+        getattr(st, level)(text)
+
     if selected == "Home":
         show_home_page()
     elif selected == "Quiz":
@@ -111,37 +170,164 @@ def show_home_page():
     st.title("🎯 MCQ Quiz Application")
     st.markdown("---")
 
+    if st.session_state.get('pending_resume') is not None:
+        st.info("💾 You have a saved quiz in progress. Load the same file(s) to continue it.")
+        st.button("Discard saved quiz", on_click=_discard_saved_quiz)
+
     # File upload section
     st.header("📁 Load Your MCQ Excel File(s)")
 
     uploaded_files = st.file_uploader(
         "Choose one or more Excel files with MCQs",
-        type=['xlsx', 'xls', 'xlsm'],
-        help="Upload one or multiple Excel files containing your MCQ questions",
+        type=['xlsx', 'xls', 'xlsm', 'xlsb', 'mcqb'],
+        help="Upload one or multiple Excel files containing your MCQ questions, "
+             "or compiled .mcqb banks exported from this app",
         accept_multiple_files=True
     )
 
+    server_banks = list_server_banks()
+    selected_banks = []
+    if server_banks:
+        selected_banks = st.multiselect(
+            "Or load compiled banks from the server",
+            server_banks,
+            format_func=os.path.basename,
+        )
+    uploaded_files = list(uploaded_files or []) + selected_banks
+
     if uploaded_files:
+        remove_duplicates = st.checkbox(
+            "Remove duplicate questions", value=True,
+            help="Collapse repeated questions across the files, including slightly "
+                 "reworded copies with the same correct answer")
         try:
-            with st.spinner("Loading MCQs from selected file(s)..."):
-                combined_mcqs = []
+            registry = get_pool_registry()
+            # Identifies the combined pool by content, in upload order
+            pool_key = "|".join(pool_source_keys(uploaded_files))
+            if remove_duplicates:
+                pool_key += "|dedup"
+            handle = st.session_state.get('pool_handle')
+            if handle is None or handle.key != pool_key:
+                # Another session may already hold the same files
+                handle = registry.acquire(pool_key)
+
+            outcome = st.session_state.get('pool_outcome')
+            if handle is None and outcome is not None and outcome['key'] == pool_key:
+                # Failed or empty loads are kept, not re-ingested on every rerun
+                combined_mcqs = outcome['mcqs']
+                per_file_counts = outcome['files']
+                duplicates = outcome['duplicates']
+                for name, error in outcome['errors']:
+                    st.error(f"Error reading Excel file {name}: {error}")
+                if outcome['errors']:
+                    st.button("🔄 Retry loading", on_click=_retry_pool)
+            elif handle is None:
+                progress = st.progress(
+                    0.0, text="Loading MCQs from selected file(s)...")
+
+                def on_file_done(done, total, name):
+                    progress.progress(
+                        done / total, text=f"Loaded {name} ({done}/{total})")
+
+                file_mcqs = []
                 per_file_counts = []
-                for f in uploaded_files:
-                    file_mcqs = extract_mcqs_from_excel(f)
+                errors = []
+                for result in ingest_workbooks(uploaded_files, on_file_done):
+                    if result['error']:
+                        errors.append((result['name'], result['error']))
+                        st.error(
+                            f"Error reading Excel file {result['name']}: {result['error']}")
                     per_file_counts.append(
-                        (getattr(f, 'name', 'file'), len(file_mcqs)))
-                    combined_mcqs.extend(file_mcqs)
-
-            mcqs = combined_mcqs
+                        (result['name'], len(result['mcqs']), result['report']))
+                    file_mcqs.append(result['mcqs'])
+                progress.empty()
+                # A single file's questions are kept as loaded, so a compiled
+                # bank is still served from its memory map
+                combined_mcqs = (file_mcqs[0] if len(file_mcqs) == 1
+                                 else [mcq for mcqs in file_mcqs for mcq in mcqs])
+                duplicates = None
+                if remove_duplicates and combined_mcqs:
+                    with st.spinner("Removing duplicate questions..."):
+                        combined_mcqs, duplicates = deduplicate_mcqs(combined_mcqs)
+                # Pools with failed files stay private to this session
+                if combined_mcqs and not errors:
+                    handle = registry.publish(
+                        pool_key, combined_mcqs, per_file_counts,
+                        details={'duplicates': duplicates})
+                else:
+                    st.session_state.pool_outcome = {
+                        'key': pool_key, 'mcqs': combined_mcqs, 'files': per_file_counts,
+                        'duplicates': duplicates, 'errors': errors}
+                    if errors:
+                        st.button("🔄 Retry loading", on_click=_retry_pool)
+
+            # Keep the same pool object across reruns so indexes built
+            # over it stay valid until the uploads actually change
+            if handle is not None:
+                st.session_state.pool_handle = handle
+                st.session_state.original_mcqs = handle.mcqs
+                per_file_counts = handle.files
+                duplicates = handle.details.get('duplicates')
+            else:
+                st.session_state.pool_handle = None
+                st.session_state.original_mcqs = combined_mcqs
+            st.session_state.pool_key = pool_key
+            mcqs = st.session_state.original_mcqs
+            if resume_saved_quiz():
+                st.rerun()
 
             if mcqs:
-                st.session_state.original_mcqs = mcqs
+                removed = duplicates['exact'] + duplicates['near'] if duplicates else 0
+                removed_text = f" ({removed} duplicate(s) removed)" if removed else ""
                 st.success(
-                    f"✅ Loaded {len(mcqs)} MCQs from {len(uploaded_files)} file(s)!")
+                    f"✅ Loaded {len(mcqs)} MCQs from {len(uploaded_files)} file(s)!{removed_text}")
 
                 with st.expander("View per-file import summary"):
-                    for fname, count in per_file_counts:
-                        st.write(f"- {fname}: {count} question(s)")
+                    for fname, count, file_report in per_file_counts:
+                        if file_report.get('cached'):
+                            timing = " • from the parse cache"
+                        elif file_report.get('elapsed_seconds') is not None:
+                            timing = f" • ready after {file_report['elapsed_seconds']:.2f} s"
+                        else:
+                            timing = ""
+                        st.write(f"- {fname}: {count} question(s){timing}")
+                        for sheet in file_report.get('sheets', []):
+                            confidence = sheet.get('confidence')
+                            confidence_text = f"{confidence:.0%}" if confidence is not None else "fallback"
+                            reader = f" • read with {sheet['reader']}" if sheet.get('reader') else ""
+                            st.caption(
+                                f"  Sheet '{sheet.get('sheet')}': {LAYOUT_LABELS.get(sheet.get('layout'), sheet.get('layout'))} "
+                                f"layout ({confidence_text} confidence), {sheet.get('questions', 0)} question(s){reader}")
+                            stats = sheet_stats_text(sheet)
+                            if stats:
+                                st.caption("  " + stats)
+                    if duplicates:
+                        st.caption(
+                            f"Duplicates collapsed: {duplicates['exact']} exact, "
+                            f"{duplicates['near']} near-identical (same correct answer)")
+                    cache_stats = get_parse_cache().stats()
+                    st.caption(
+                        f"Parse cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es), "
+                        f"{cache_stats['entries']} workbook(s) cached "
+                        f"(~{cache_stats['bytes'] / (1024 * 1024):.1f} MB)")
+                    pool_stats = registry.stats()
+                    st.caption(
+                        f"Shared pools: {pool_stats['pools']} pool(s) held by "
+                        f"{pool_stats['handles']} session(s) "
+                        f"(~{pool_stats['bytes'] / (1024 * 1024):.1f} MB, sharing saves "
+                        f"~{pool_stats['saved_bytes'] / (1024 * 1024):.1f} MB)")
+
+                # Compiled once per pool; later loads skip Excel entirely
+                if st.session_state.get('_bank_export', (None,))[0] != pool_key:
+                    st.session_state._bank_export = (
+                        pool_key, dump_mcq_bank(mcqs, bank_provenance(per_file_counts, duplicates)))
+                st.download_button(
+                    "💾 Export compiled bank (.mcqb)",
+                    data=st.session_state._bank_export[1],
+                    file_name="mcq_bank.mcqb",
+                    mime="application/octet-stream",
+                    help="Save the combined pool in a compact format that loads without re-parsing Excel",
+                )
 
                 # Quiz type selection
                 st.header("🎲 Choose Quiz Type (Combined Pool)")
@@ -151,77 +337,62 @@ def show_home_page():
                 col1, col2 = st.columns(2)
 
                 with col1:
-                    if st.button("📋 Full Quiz", use_container_width=True, type="primary"):
-                        st.session_state.mcqs = mcqs
-                        st.session_state.is_random_quiz = False
-                        initialize_quiz()
-                        st.rerun()
+                    st.button("📋 Full Quiz", use_container_width=True, type="primary",
+                              on_click=quiz_state.start_quiz, args=(st.session_state, mcqs))
 
                 with col2:
-                    if st.button("🎲 Random Quiz", use_container_width=True, type="secondary"):
-                        st.session_state.show_random_options = True
-                        st.rerun()
+                    st.button("🎲 Random Quiz", use_container_width=True, type="secondary",
+                              on_click=quiz_state.set_random_options, args=(st.session_state, True))
 
                 # Random quiz options
                 if st.session_state.get('show_random_options', False):
                     st.subheader("🎲 Random Quiz Options")
 
-                    # Calculate max questions (minimum of 600 or total available)
-                    max_questions = min(600, len(mcqs))
+                    # Quizzes are index arrays into the pool, so any size is cheap
+                    max_questions = len(mcqs)
 
                     num_questions = st.slider(
                         "Number of questions:",
                         min_value=5,
                         max_value=max_questions,
-                        value=min(600, max_questions),
+                        value=min(RANDOM_QUIZ_DEFAULT_SIZE, max_questions),
                         help=f"Choose between 5 and {max_questions} questions"
                     )
+                    st.text_input(
+                        "Seed (optional)", value="", key="random_seed",
+                        help="The same seed, size and files give the same quiz again")
 
                     col1, col2 = st.columns(2)
 
                     with col1:
-                        if st.button("🎲 Start Random Quiz", use_container_width=True, type="primary"):
-                            random_mcqs = generate_random_quiz(
-                                mcqs, num_questions)
-                            st.session_state.mcqs = random_mcqs
-                            st.session_state.is_random_quiz = True
-                            st.session_state.show_random_options = False
-                            initialize_quiz()
-                            st.rerun()
+                        st.button("🎲 Start Random Quiz", use_container_width=True, type="primary",
+                                  on_click=_start_random_quiz, args=(mcqs, num_questions))
 
                     with col2:
-                        if st.button("❌ Cancel", use_container_width=True):
-                            st.session_state.show_random_options = False
-                            st.rerun()
+                        st.button("❌ Cancel", use_container_width=True,
+                                  on_click=quiz_state.set_random_options,
+                                  args=(st.session_state, False))
 
                 # Keyword-based quiz creator
                 st.header("🔎 Create Quiz by Keyword (from combined pool)")
                 kw_col1, kw_col2 = st.columns([3, 1])
                 with kw_col1:
-                    home_keywords = st.text_input(
+                    st.text_input(
                         "Enter keyword(s) (comma-separated)",
                         value="",
-                        help="Example: helicopter, rotor, flight"
+                        help="Example: helicopter, rotor, flight",
+                        key="home_keywords"
                     )
                 with kw_col2:
-                    home_fuzzy = st.checkbox(
-                        "Fuzzy match", value=True, help="Catch typos like 'helicoptior'")
+                    st.checkbox(
+                        "Fuzzy match", value=True, help="Catch typos like 'helicoptior'",
+                        key="home_fuzzy")
 
                 kw_btn_col1, kw_btn_col2 = st.columns(2)
                 with kw_btn_col1:
-                    if st.button("🔎 Create Keyword Quiz", use_container_width=True):
-                        keywords = [k.strip()
-                                    for k in home_keywords.split(',') if k.strip()]
-                        filtered = filter_mcqs_by_keywords(
-                            st.session_state.original_mcqs, keywords, use_fuzzy=home_fuzzy, search_in_options=True)
-                        if filtered:
-                            st.session_state.mcqs = filtered
-                            st.session_state.is_random_quiz = False
-                            initialize_quiz()
-                            st.rerun()
-                        else:
-                            st.warning(
-                                "No questions matched the given keywords.")
+                    st.button("🔎 Create Keyword Quiz", use_container_width=True,
+                              on_click=_start_keyword_quiz,
+                              args=(st.session_state.original_mcqs, "home_keywords", "home_fuzzy"))
                 with kw_btn_col2:
                     st.caption(
                         "Searches in questions and options. Case-insensitive.")
@@ -255,7 +426,7 @@ def show_home_page():
                 # Live summary and optional preview
                 start_idx = int(start_q) - 1
                 end_idx = int(end_q)
-                ranged = st.session_state.original_mcqs[start_idx:end_idx]
+                ranged = QuizView(st.session_state.original_mcqs, range(start_idx, end_idx))
                 st.info(
                     f"Selected Q{start_q}–Q{end_q} • {len(ranged)} questions")
 
@@ -269,23 +440,11 @@ def show_home_page():
 
                 action_cols = st.columns([1, 1, 2])
                 with action_cols[0]:
-                    if st.button("📏 Create Ranged Quiz", use_container_width=True, key="btn_create_range"):
-                        if not ranged:
-                            st.warning("Selected range returned no questions.")
-                        else:
-                            final_mcqs = list(ranged)
-                            if randomize_order:
-                                random.shuffle(final_mcqs)
-                            st.session_state.mcqs = final_mcqs
-                            st.session_state.is_random_quiz = False
-                            initialize_quiz()
-                            st.rerun()
+                    st.button("📏 Create Ranged Quiz", use_container_width=True, key="btn_create_range",
+                              on_click=_start_ranged_quiz, args=(ranged, randomize_order))
                 with action_cols[1]:
-                    if st.button("❌ Reset Range", use_container_width=True, key="btn_reset_range"):
-                        st.session_state.range_slider = (1, min(25, total))
-                        st.session_state.range_randomize = False
-                        st.session_state.range_preview = True
-                        st.rerun()
+                    st.button("❌ Reset Range", use_container_width=True, key="btn_reset_range",
+                              on_click=_reset_range)
 
                 # Question number selection quiz creator
                 st.header(
@@ -309,15 +468,8 @@ def show_home_page():
                 selected_mcqs = []
                 if question_numbers_input.strip():
                     try:
-                        # Parse comma-separated numbers
-                        numbers_text = question_numbers_input.replace(' ', '')
-                        numbers = [int(n.strip())
-                                   for n in numbers_text.split(',') if n.strip()]
-
-                        # Filter valid numbers (1-indexed)
-                        valid_numbers = [n for n in numbers if 1 <= n <= total]
-                        invalid_numbers = [
-                            n for n in numbers if n < 1 or n > total]
+                        valid_numbers, invalid_numbers = parse_question_numbers(
+                            question_numbers_input, total)
 
                         if invalid_numbers:
                             st.warning(
@@ -325,8 +477,8 @@ def show_home_page():
 
                         if valid_numbers:
                             # Get MCQs for valid numbers (convert to 0-indexed)
-                            selected_mcqs = [
-                                st.session_state.original_mcqs[n-1] for n in valid_numbers]
+                            selected_mcqs = QuizView(
+                                st.session_state.original_mcqs, [n - 1 for n in valid_numbers])
                             st.info(
                                 f"Selected {len(selected_mcqs)} questions: {sorted(valid_numbers)}")
                         else:
@@ -354,19 +506,12 @@ def show_home_page():
                 # Action buttons for question number selection
                 number_action_cols = st.columns([1, 1, 2])
                 with number_action_cols[0]:
-                    if st.button("🔢 Create Numbered Quiz", use_container_width=True, key="btn_create_numbered"):
-                        if not selected_mcqs:
-                            st.warning("No valid questions selected!")
-                        else:
-                            st.session_state.mcqs = selected_mcqs
-                            st.session_state.is_random_quiz = False
-                            initialize_quiz()
-                            st.rerun()
+                    st.button("🔢 Create Numbered Quiz", use_container_width=True, key="btn_create_numbered",
+                              on_click=_start_numbered_quiz, args=(st.session_state.original_mcqs,))
 
                 with number_action_cols[1]:
-                    if st.button("❌ Clear Numbers", use_container_width=True, key="btn_clear_numbers"):
-                        st.session_state.question_numbers_input = ""
-                        st.rerun()
+                    st.button("❌ Clear Numbers", use_container_width=True, key="btn_clear_numbers",
+                              on_click=_clear_question_numbers)
 
                 # Preview section
                 st.header("📋 Preview (first few from combined pool)")
@@ -388,42 +533,214 @@ def show_home_page():
             st.error(f"❌ Error loading file: {str(e)}")
 
 
-def generate_random_quiz(mcqs, num_questions):
-    """Generate a random quiz with specified number of questions"""
-    if len(mcqs) < num_questions:
-        return mcqs
+def sheet_stats_text(sheet):
+    """One-line summary of a sheet report's counters and timings."""
+    parts = []
+    if 'rows' in sheet:
+        parts.append(f"{sheet['rows']} row(s) scanned")
+    if 'candidates' in sheet:
+        parts.append(f"{sheet['candidates']} candidate(s), "
+                     f"{rejection_text(sheet.get('rejected'))}")
+    timings = [f"{label} {sheet[key]:.2f} s"
+               for label, key in (("read", 'read_seconds'), ("parse", 'parse_seconds'))
+               if sheet.get(key) is not None]
+    if timings:
+        parts.append(", ".join(timings))
+    return " • ".join(parts)
+
+
+def rejection_text(rejected):
+    """"N rejected (reason: count, ...)" for a ``{reason: count}`` tally."""
+    rejected = rejected or {}
+    text = f"{sum(rejected.values())} rejected"
+    if rejected:
+        text += " (" + ", ".join(
+            f"{REJECTION_LABELS.get(reason, reason)}: {count}"
+            for reason, count in sorted(rejected.items(), key=lambda item: -item[1])) + ")"
+    return text
+
+
+def parse_question_numbers(text, total):
+    """Split "1, 2, 11" into (valid, out-of-range) 1-indexed numbers.
+
+    Raises ``ValueError`` when an entry is not a number.
+    """
+    numbers = [int(n) for n in text.replace(' ', '').split(',') if n]
+    valid = [n for n in numbers if 1 <= n <= total]
+    invalid = [n for n in numbers if n < 1 or n > total]
+    return valid, invalid
+
+
+def attach_progress_recorder():
+    """Link the session to its saved progress through the ``?resume=`` token.
+
+    Runs once per session.  A saved attempt found under the token is kept
+    as ``pending_resume`` until its question pool is loaded.
+    """
+    if quiz_state.PROGRESS_KEY in st.session_state:
+        return
+    store = quiz_progress.get_progress_store()
+    recorder = None
+    if store is not None:
+        token = st.query_params.get(quiz_progress.RESUME_PARAM) or quiz_progress.new_token()
+        recorder = quiz_progress.ProgressRecorder(store, token)
+        st.query_params[quiz_progress.RESUME_PARAM] = token
+        saved = store.load(token)
+        if saved is not None and not st.session_state.mcqs:
+            st.session_state.pending_resume = saved
+    st.session_state[quiz_state.PROGRESS_KEY] = recorder
+
+
+def resume_saved_quiz():
+    """Continue the saved attempt if its pool is loaded (or shared in-process).
+
+    Returns True when the session was moved into the saved quiz.
+    """
+    saved = st.session_state.get('pending_resume')
+    if saved is None:
+        return False
+    if st.session_state.get('pool_key') == saved['pool_key'] and st.session_state.original_mcqs:
+        pool = st.session_state.original_mcqs
+    else:
+        handle = get_pool_registry().acquire(saved['pool_key'])
+        if handle is None:
+            return False
+        st.session_state.pool_handle = handle
+        st.session_state.original_mcqs = handle.mcqs
+        st.session_state.pool_key = handle.key
+        pool = handle.mcqs
+    del st.session_state.pending_resume
+    if not quiz_state.restore_progress(st.session_state, pool, saved):
+        return False
+    sheet = st.session_state.answered
+    quiz_state.notify(st.session_state, 'info',
+                      f"▶️ Resumed your saved quiz ({sheet.answered}/{len(sheet)} answered).")
+    return True
+
+
+# Preselected size of a random quiz; the slider goes up to the whole pool
+RANDOM_QUIZ_DEFAULT_SIZE = 600
+
+# Home page button callbacks.  They read text inputs from session state
+# rather than taking them as ``args``, which are bound when the button was
+# last rendered and would miss text typed just before the click.
+
+def _start_random_quiz(pool, num_questions):
+    seed = st.session_state.get('random_seed', '').strip()
+    if seed and not seed.isdigit():
+        quiz_state.notify(st.session_state, 'warning', "The seed must be a whole number.")
+        return
+    quiz_state.start_random_quiz(st.session_state, pool, num_questions,
+                                 int(seed) if seed else None)
+
+
+def _start_keyword_quiz(pool, keywords_key, fuzzy_key):
+    keywords = [k.strip()
+                for k in st.session_state.get(keywords_key, '').split(',') if k.strip()]
+    matches = keyword_matches(
+        pool, keywords, use_fuzzy=st.session_state.get(fuzzy_key, True), search_in_options=True,
+        index=get_keyword_index(pool))
+    if matches:
+        quiz_state.start_quiz(st.session_state, QuizView(pool, matches))
+    else:
+        quiz_state.notify(st.session_state, 'warning',
+                          "No questions matched the given keywords.")
+
+
+def _start_ranged_quiz(ranged, randomize_order):
+    if not ranged:
+        quiz_state.notify(st.session_state, 'warning',
+                          "Selected range returned no questions.")
+        return
+    if randomize_order:
+        ranged = QuizView(ranged, range(len(ranged)))
+        random.shuffle(ranged.indices)
+    quiz_state.start_quiz(st.session_state, ranged)
+
 
-    # Randomly select questions without replacement
-    selected_indices = random.sample(range(len(mcqs)), num_questions)
-    random_mcqs = [mcqs[i] for i in selected_indices]
+def _reset_range():
+    # The widgets fall back to their defaults
+    for key in ("range_slider", "range_randomize", "range_preview"):
+        st.session_state.pop(key, None)
 
-    return random_mcqs
+
+def _start_numbered_quiz(pool):
+    try:
+        valid_numbers, _ = parse_question_numbers(
+            st.session_state.get('question_numbers_input', ''), len(pool))
+    except ValueError:
+        valid_numbers = []
+    if not valid_numbers:
+        quiz_state.notify(st.session_state, 'warning', "No valid questions selected!")
+        return
+    quiz_state.start_quiz(st.session_state, QuizView(pool, [n - 1 for n in valid_numbers]))
+
+
+def _clear_question_numbers():
+    st.session_state.question_numbers_input = ""
+
+
+def _log_out():
+    quiz_state.log_out(st.session_state)
+    # A new token is issued on the next sign-in
+    if quiz_progress.RESUME_PARAM in st.query_params:
+        del st.query_params[quiz_progress.RESUME_PARAM]
+
+
+def _discard_saved_quiz():
+    st.session_state.pending_resume = None
+
+
+def _retry_pool():
+    st.session_state.pool_outcome = None
+
+
+def pool_source_keys(sources):
+    """``source_cache_key`` of each source, hashing each upload once per session.
+
+    Uploads are remembered by the uploader's ``file_id``, which changes
+    whenever a file is uploaded again, so unchanged uploads are not re-read
+    and re-hashed on every rerun.  Server-side banks only cost a ``stat``.
+    """
+    known = st.session_state.get('source_keys') or {}
+    seen = {}
+    keys = []
+    for source in sources:
+        file_id = getattr(source, 'file_id', None)
+        key = known.get(file_id) if file_id is not None else None
+        if key is None:
+            key = source_cache_key(source)
+        if file_id is not None:
+            seen[file_id] = key
+        keys.append(key)
+    st.session_state.source_keys = seen
+    return keys
 
 
 def _normalize_text(text):
     """Normalize text for matching (casefold and strip extra spaces)."""
     if not isinstance(text, str):
         text = str(text)
-    return re.sub(r"\s+", " ", text).strip().casefold()
+    # str.split() and re's \s agree on what whitespace is, and split is faster
+    return " ".join(text.split()).casefold()
 
 
-def validate_mcq_options(question, options, answer):
-    """
-    Comprehensive validation for MCQ options to filter out invalid content.
-    Returns (valid_options, valid_answer) or (None, None) if MCQ should be skipped.
-    """
-    if not question or not options or not answer:
-        return None, None
+class MCQValidator:
+    """Option filters used by ``validate_mcq_options``, compiled once.
 
-    question_normalized = _normalize_text(question)
-    valid_options = {}
+    The vocabularies are frozen at construction, every Excel-artifact
+    substring is matched by one compiled alternation instead of a scan per
+    artifact, and the question is normalized and split once per question
+    rather than once per option.  ``validate_many`` additionally memoizes the
+    question-independent checks per distinct option text within a batch.
+    """
 
     # Expanded metadata words that shouldn't appear as options
-    metadata_words = {
+    METADATA_WORDS = frozenset({
         'answers', 'options', 'choices', 'correct', 'answer', 'option', 'choice',
         'question', 'questions', 'mcq', 'quiz', 'test', 'exam', 'blank', 'none',
         'n/a', 'na', 'null', 'empty', 'skip', 'pass', 'fail', 'true', 'false',
-        'yes', 'no', 'maybe', 'unknown', 'undefined', 'n/a', 'na', 'tbd',
+        'yes', 'no', 'maybe', 'unknown', 'undefined', 'tbd',
         'to be determined', 'pending', 'incomplete', 'error', 'invalid',
         'header', 'footer', 'title', 'subtitle', 'note', 'comment', 'remark',
         'instruction', 'direction', 'guideline', 'rule', 'regulation', 'policy',
@@ -434,60 +751,168 @@ def validate_mcq_options(question, options, answer):
         'sort', 'class', 'group', 'set', 'collection', 'list', 'array',
         'table', 'chart', 'graph', 'diagram', 'figure', 'image', 'picture',
         'photo', 'illustration', 'drawing', 'sketch', 'map', 'plan', 'layout'
-    }
+    })
+
+    # Options that look like Excel artifacts (common patterns)
+    EXCEL_ARTIFACTS = (
+        'table', 'sheet', 'worksheet', 'cell', 'row', 'column', 'header',
+        'footer', 'title', 'subtitle', 'note', 'comment', 'remark',
+        'formula', 'function', 'calculation', 'result', 'output', 'input',
+        'data', 'value', 'text', 'number', 'date', 'time', 'format',
+        'style', 'color', 'font', 'size', 'bold', 'italic', 'underline'
+    )
 
-    for letter, option_text in options.items():
-        option_normalized = _normalize_text(option_text)
+    # Characters ignored by the "just punctuation" check
+    _PUNCTUATION = str.maketrans('', '', ' .,!?')
 
-        # Skip if option matches question exactly
-        if option_normalized == question_normalized:
-            continue
+    def __init__(self, metadata_words=METADATA_WORDS, excel_artifacts=EXCEL_ARTIFACTS):
+        self.metadata_words = frozenset(metadata_words)
+        self._artifact_re = re.compile('|'.join(
+            re.escape(a) for a in sorted(set(excel_artifacts), key=len, reverse=True)))
 
-        # Skip empty or very short options
+    def _option_rejected(self, option_normalized):
+        """Checks that do not depend on the question text."""
+        # Skip empty or very short options (also covers single letters/digits)
         if len(option_normalized) < 2:
-            continue
-
+            return True
         # Skip metadata words
-        if option_normalized in metadata_words:
-            continue
+        if option_normalized in self.metadata_words:
+            return True
+        # Skip options that are just punctuation or special characters
+        if len(option_normalized.translate(self._PUNCTUATION)) < 2:
+            return True
+        # Skip options that look like Excel artifacts
+        return self._artifact_re.search(option_normalized) is not None
 
-        # Skip single letters or numbers
-        if len(option_normalized) == 1 and option_normalized.isalnum():
-            continue
+    def _option_verdict(self, option_text):
+        """(normalized text, word set, rejected) for one option text."""
+        option_normalized = _normalize_text(option_text)
+        return (option_normalized, frozenset(option_normalized.split()),
+                self._option_rejected(option_normalized))
+
+    def validate(self, question, options, answer, _option_verdicts=None):
+        """Return (valid_options, valid_answer) or (None, None) if the MCQ should be skipped."""
+        valid_options, reason = self.check(question, options, answer, _option_verdicts)
+        if reason is not None:
+            return None, None
+        return valid_options, answer
 
-        # Skip options that are mostly question text (partial matches)
-        if len(option_normalized) > 5 and option_normalized in question_normalized:
-            continue
+    def check(self, question, options, answer, _option_verdicts=None):
+        """Return (valid_options, None), or (None, reason) for a skipped MCQ.
 
-        # Skip options that contain mostly question text
-        question_words = set(question_normalized.split())
-        option_words = set(option_normalized.split())
-        if len(option_words) > 0 and len(question_words.intersection(option_words)) / len(option_words) > 0.7:
-            continue
+        ``reason`` is one of the ``REJECTION_LABELS`` keys.
+        """
+        if not question or not options or not answer:
+            return None, 'incomplete'
 
-        # Skip options that are just punctuation or special characters
-        if len(option_normalized.replace(' ', '').replace('.', '').replace(',', '').replace('!', '').replace('?', '')) < 2:
-            continue
+        question_normalized = _normalize_text(question)
+        question_words = None
+        valid_options = {}
 
-        # Skip options that look like Excel artifacts (common patterns)
-        excel_artifacts = [
-            'table', 'sheet', 'worksheet', 'cell', 'row', 'column', 'header',
-            'footer', 'title', 'subtitle', 'note', 'comment', 'remark',
-            'formula', 'function', 'calculation', 'result', 'output', 'input',
-            'data', 'value', 'text', 'number', 'date', 'time', 'format',
-            'style', 'color', 'font', 'size', 'bold', 'italic', 'underline'
-        ]
+        for letter, option_text in options.items():
+            if _option_verdicts is None:
+                verdict = self._option_verdict(option_text)
+            else:
+                verdict = _option_verdicts.get(option_text)
+                if verdict is None:
+                    verdict = _option_verdicts[option_text] = self._option_verdict(
+                        option_text)
+            option_normalized, option_words, rejected = verdict
+            if rejected:
+                continue
 
-        if any(artifact in option_normalized for artifact in excel_artifacts):
-            continue
+            # Skip if option matches question exactly
+            if option_normalized == question_normalized:
+                continue
 
-        valid_options[letter] = option_text
+            # Skip options that are mostly question text (partial matches)
+            if len(option_normalized) > 5 and option_normalized in question_normalized:
+                continue
 
-    # Check if we have enough valid options and the answer is still valid
-    if len(valid_options) >= 2 and answer in valid_options:
-        return valid_options, answer
+            # Skip options that contain mostly question text
+            if question_words is None:
+                question_words = frozenset(question_normalized.split())
+            if option_words and len(question_words & option_words) / len(option_words) > 0.7:
+                continue
+
+            valid_options[letter] = option_text
 
-    return None, None
+        # Check if we have enough valid options and the answer is still valid
+        if len(valid_options) < 2:
+            return None, 'too_few_options'
+        if answer not in valid_options:
+            return None, 'answer_filtered'
+        return valid_options, None
+
+    def validate_many(self, items):
+        """Validate an iterable of (question, options, answer) tuples in one call.
+
+        Returns a list of (valid_options, valid_answer) pairs in input order.
+        """
+        verdicts = {}
+        validate = self.validate
+        return [validate(question, options, answer, verdicts)
+                for question, options, answer in items]
+
+
+_VALIDATOR = MCQValidator()
+
+# Why ``MCQValidator.check`` skipped a candidate question
+REJECTION_LABELS = {
+    'incomplete': 'missing question, options or answer',
+    'too_few_options': 'fewer than two usable options',
+    'answer_filtered': 'correct option filtered out',
+}
+
+
+def validate_mcq_options(question, options, answer):
+    """
+    Comprehensive validation for MCQ options to filter out invalid content.
+    Returns (valid_options, valid_answer) or (None, None) if MCQ should be skipped.
+    """
+    return _VALIDATOR.validate(question, options, answer)
+
+
+def validate_mcq_batch(candidates, report=None):
+    """Validate (question, options, answer) candidates and build MCQ dicts.
+
+    Candidates that fail validation are dropped; order is preserved.  When
+    ``report`` is a dict, its ``candidates`` count and ``rejected``
+    ``{reason: count}`` tally are increased.
+    """
+    mcqs = []
+    rejected = {}
+    verdicts = {}
+    check = _VALIDATOR.check
+    for question, options, answer in candidates:
+        valid_options, reason = check(question, options, answer, verdicts)
+        if reason is None:
+            mcqs.append({
+                "question": question,
+                "options": valid_options,
+                "answer": answer
+            })
+        else:
+            rejected[reason] = rejected.get(reason, 0) + 1
+    if report is not None:
+        report['candidates'] = report.get('candidates', 0) + len(candidates)
+        tally = report.setdefault('rejected', {})
+        for reason, count in rejected.items():
+            tally[reason] = tally.get(reason, 0) + count
+    return mcqs
+
+
+def _reset_validation_counts(report):
+    """Forget the counts of a parser attempt that is being replaced."""
+    if report is not None:
+        report.pop('candidates', None)
+        report.pop('rejected', None)
+
+
+# difflib ratio a fuzzy keyword must reach against a word (or word window)
+FUZZY_THRESHOLD = 0.8
+# Only this many leading characters of a word feed the deletion index
+FUZZY_PREFIX_LENGTH = 7
 
 
 def _contains_keyword(text, keyword, use_fuzzy=False):
@@ -504,29 +929,235 @@ def _contains_keyword(text, keyword, use_fuzzy=False):
 
     # Fuzzy check against words and sliding windows
     words = norm_text.split()
+    kw_len = len(norm_kw)
+
+    def similar(candidate):
+        # ratio() can never exceed 2*min(len)/sum(len), so skip hopeless lengths
+        cand_len = len(candidate)
+        if 2 * min(kw_len, cand_len) < FUZZY_THRESHOLD * (kw_len + cand_len):
+            return False
+        return difflib.SequenceMatcher(None, norm_kw, candidate).ratio() >= FUZZY_THRESHOLD
+
     # Compare with individual words
     for word in words:
-        if difflib.SequenceMatcher(None, norm_kw, word).ratio() >= 0.8:
+        if similar(word):
             return True
     # Compare with 2-3 word windows to catch short phrases
     for window_size in (2, 3):
         for i in range(len(words) - window_size + 1):
-            window = " ".join(words[i:i + window_size])
-            if difflib.SequenceMatcher(None, norm_kw, window).ratio() >= 0.8:
+            if similar(" ".join(words[i:i + window_size])):
                 return True
     return False
 
 
-def filter_mcqs_by_keywords(mcqs, keywords, use_fuzzy=False, search_in_options=True):
-    """Filter MCQs where question or options contain any of the keywords.
+def _single_deletes(text):
+    """``text`` plus every string obtained by deleting one character from it."""
+    variants = {text}
+    variants.update(text[:i] + text[i + 1:] for i in range(len(text)))
+    return variants
+
+
+def _deletion_keys(word):
+    """Deletion-index keys for a word, its punctuation-stripped form and the
+    parts of compounds such as 'main-rotor'."""
+    keys = _single_deletes(word[:FUZZY_PREFIX_LENGTH])
+    bare = word.strip(string.punctuation)
+    if bare != word:
+        keys |= _single_deletes(bare[:FUZZY_PREFIX_LENGTH])
+    parts = [part for part in re.split(r"\W+", bare) if part]
+    if len(parts) > 1:
+        for part in parts:
+            keys |= _single_deletes(part[:FUZZY_PREFIX_LENGTH])
+    return keys
+
+
+class KeywordIndex:
+    """Inverted token index over the normalized question and option text of a pool.
+
+    Every normalized text is split on spaces and each token maps to the
+    sorted ids of the MCQs containing it.  A keyword can only occur in a text
+    if each of its tokens is a substring of one of the text's tokens, so
+    candidates come from unions/intersections of posting lists and are then
+    confirmed with the same substring test ``_contains_keyword`` uses.
+
+    Fuzzy lookups use a SymSpell-style deletion index over the vocabulary:
+    each token's first ``FUZZY_PREFIX_LENGTH`` characters (also without edge
+    punctuation, and per part of compounds like 'main-rotor') and their
+    one-char deletions point back at the token.  A typo'd word therefore finds every
+    token whose prefix is within one edit of its own, and those candidates
+    are kept when difflib's ratio is at least ``FUZZY_THRESHOLD``, as before.
+    Differences from the old linear scan: a word must be within one edit of
+    the keyword in its first seven characters, and a single-word keyword is
+    compared with single words only (not 2-3 word windows).  Multi-word
+    keywords are still checked against word windows, but only within MCQs
+    that contain a near match for every keyword word.
+    """
 
-    Args:
-        mcqs: List of MCQ dicts {question, options, answer}
-        keywords: List[str] of keywords to match
-        use_fuzzy: Allow fuzzy matching for typos
-        search_in_options: Search in answer options as well
-    Returns:
-        List of MCQs matching any keyword
+    def __init__(self, mcqs):
+        self.size = len(mcqs)
+        self.question_texts = []
+        self.option_texts = []
+        postings = {}
+        for doc_id, mcq in enumerate(mcqs):
+            question = _normalize_text(mcq.get("question", ""))
+            options = tuple(_normalize_text(text)
+                            for text in mcq.get("options", {}).values())
+            self.question_texts.append(question)
+            self.option_texts.append(options)
+            tokens = set(question.split())
+            for text in options:
+                tokens.update(text.split())
+            for token in tokens:
+                postings.setdefault(token, []).append(doc_id)
+        self.vocabulary = list(postings)
+        self.postings = [array('I', postings[token]) for token in self.vocabulary]
+        self._token_ids = {token: i for i, token in enumerate(self.vocabulary)}
+        self._token_matches = {}
+        self._deletion_index = None
+
+    def _docs_with_token_containing(self, part):
+        """Ids of MCQs having a token that contains ``part``."""
+        docs = self._token_matches.get(part)
+        if docs is None:
+            docs = set()
+            for token, posting in zip(self.vocabulary, self.postings):
+                if part in token:
+                    docs.update(posting)
+            if len(self._token_matches) > 256:
+                self._token_matches.clear()
+            self._token_matches[part] = docs
+        return docs
+
+    def candidates(self, keyword):
+        """Ids of MCQs that might contain the normalized ``keyword``."""
+        parts = keyword.split()
+        if not parts:
+            return set()
+        # Most selective part first keeps the intersection small
+        doc_sets = sorted((self._docs_with_token_containing(part) for part in set(parts)),
+                          key=len)
+        docs = set(doc_sets[0])
+        for other in doc_sets[1:]:
+            docs.intersection_update(other)
+            if not docs:
+                break
+        return docs
+
+    def matches(self, doc_id, keyword, search_in_options=True):
+        """Exact (substring) match of a normalized keyword in one MCQ."""
+        if keyword in self.question_texts[doc_id]:
+            return True
+        return search_in_options and any(keyword in text for text in self.option_texts[doc_id])
+
+    def search(self, keywords, search_in_options=True):
+        """Sorted ids of MCQs containing any of the keywords as a substring."""
+        found = set()
+        for keyword in keywords:
+            norm_kw = _normalize_text(keyword)
+            for doc_id in self.candidates(norm_kw) - found:
+                if self.matches(doc_id, norm_kw, search_in_options):
+                    found.add(doc_id)
+        return sorted(found)
+
+    def _near_token_ids(self, word):
+        """Ids of vocabulary tokens whose prefix is within one edit of ``word``'s."""
+        if self._deletion_index is None:
+            deletion_index = {}
+            for token_id, token in enumerate(self.vocabulary):
+                for key in _deletion_keys(token):
+                    deletion_index.setdefault(key, []).append(token_id)
+            self._deletion_index = deletion_index
+        token_ids = set()
+        for key in _deletion_keys(word):
+            token_ids.update(self._deletion_index.get(key, ()))
+        return token_ids
+
+    def similar_tokens(self, word):
+        """Vocabulary tokens with difflib ratio >= FUZZY_THRESHOLD to ``word``."""
+        matcher = difflib.SequenceMatcher(None, word)
+        similar = set()
+        for token_id in self._near_token_ids(word):
+            token = self.vocabulary[token_id]
+            matcher.set_seq2(token)
+            # Cheap upper bounds first; ratio() is the exact legacy test
+            if (matcher.real_quick_ratio() >= FUZZY_THRESHOLD and
+                    matcher.quick_ratio() >= FUZZY_THRESHOLD and
+                    matcher.ratio() >= FUZZY_THRESHOLD):
+                similar.add(token)
+        return similar
+
+    def _docs_with_tokens(self, tokens):
+        docs = set()
+        for token in tokens:
+            docs.update(self.postings[self._token_ids[token]])
+        return docs
+
+    def fuzzy_search(self, keywords, search_in_options=True, exclude=()):
+        """Sorted ids of MCQs fuzzily matching any keyword (see class docstring)."""
+        found = set()
+        for keyword in keywords:
+            norm_kw = _normalize_text(keyword)
+            words = norm_kw.split()
+            if not words:
+                continue
+            if len(words) == 1:
+                similar = self.similar_tokens(norm_kw)
+                for doc_id in self._docs_with_tokens(similar) - found:
+                    if doc_id in exclude:
+                        continue
+                    if search_in_options or not similar.isdisjoint(
+                            self.question_texts[doc_id].split()):
+                        found.add(doc_id)
+                continue
+
+            # Multi-word keyword: only MCQs with a near token for every word
+            # are worth the windowed difflib comparison
+            docs = None
+            for word in set(words):
+                near = set()
+                for token_id in self._near_token_ids(word):
+                    near.update(self.postings[token_id])
+                docs = near if docs is None else docs & near
+                if not docs:
+                    break
+            for doc_id in sorted((docs or set()) - found):
+                if doc_id in exclude:
+                    continue
+                texts = (self.question_texts[doc_id],)
+                if search_in_options:
+                    texts += self.option_texts[doc_id]
+                if any(_contains_keyword(text, norm_kw, use_fuzzy=True) for text in texts):
+                    found.add(doc_id)
+        return sorted(found)
+
+
+def get_keyword_index(mcqs):
+    """Return the session's ``KeywordIndex`` for this MCQ list, building it once.
+
+    Indexes are remembered per list object (the loaded pool and the current
+    quiz), so they are rebuilt only when ``original_mcqs``/``mcqs`` change.
+    A shared pool's index lives on the pool and is built once per process.
+    """
+    handle = st.session_state.get('pool_handle')
+    if handle is not None and mcqs is handle.mcqs:
+        return handle.keyword_index()
+    indexes = st.session_state.setdefault('_keyword_indexes', {})
+    entry = indexes.get(id(mcqs))
+    if entry is None or entry[0] is not mcqs:
+        # Drop indexes for lists that are no longer in use
+        live = {id(st.session_state.get('original_mcqs')),
+                id(st.session_state.get('mcqs'))}
+        for key in [k for k in indexes if k not in live]:
+            del indexes[key]
+        entry = (mcqs, KeywordIndex(mcqs))
+        indexes[id(mcqs)] = entry
+    return entry[1]
+
+
+def keyword_matches(mcqs, keywords, use_fuzzy=False, search_in_options=True, index=None):
+    """Positions in ``mcqs`` of the MCQs matching any keyword, in order.
+
+    Takes the arguments of ``filter_mcqs_by_keywords``.
     """
     if not keywords:
         return []
@@ -534,30 +1165,31 @@ def filter_mcqs_by_keywords(mcqs, keywords, use_fuzzy=False, search_in_options=T
     if not normalized_keywords:
         return []
 
-    filtered = []
-    for mcq in mcqs:
-        question_text = mcq.get("question", "")
-        match_found = any(_contains_keyword(question_text, kw, use_fuzzy)
-                          for kw in normalized_keywords)
-        if not match_found and search_in_options:
-            for _, opt_text in mcq.get("options", {}).items():
-                if any(_contains_keyword(opt_text, kw, use_fuzzy) for kw in normalized_keywords):
-                    match_found = True
-                    break
-        if match_found:
-            filtered.append(mcq)
-    return filtered
+    if index is None:
+        index = KeywordIndex(mcqs)
+    matched = set(index.search(normalized_keywords, search_in_options))
+
+    if use_fuzzy:
+        matched.update(index.fuzzy_search(
+            normalized_keywords, search_in_options, exclude=matched))
 
+    return sorted(matched)
 
-def initialize_quiz():
-    """Initialize quiz state variables"""
-    st.session_state.answered = {
-        i: None for i in range(len(st.session_state.mcqs))}
-    st.session_state.correct_answers = 0
-    st.session_state.current_question = 0
-    st.session_state.marked_questions = set()
-    st.session_state.quiz_started = True
-    st.session_state.show_results = False
+
+def filter_mcqs_by_keywords(mcqs, keywords, use_fuzzy=False, search_in_options=True, index=None):
+    """Filter MCQs where question or options contain any of the keywords.
+
+    Args:
+        mcqs: List of MCQ dicts {question, options, answer}
+        keywords: List[str] of keywords to match
+        use_fuzzy: Allow fuzzy matching for typos
+        search_in_options: Search in answer options as well
+        index: Optional prebuilt KeywordIndex over ``mcqs``
+    Returns:
+        List of MCQs matching any keyword
+    """
+    return [mcqs[doc_id] for doc_id in keyword_matches(
+        mcqs, keywords, use_fuzzy, search_in_options, index)]
 
 
 def show_quiz_page():
@@ -571,7 +1203,9 @@ def show_quiz_page():
 
     # Show quiz type indicator
     if st.session_state.is_random_quiz:
-        st.info(f"🎲 Random {len(mcqs)}-Question Quiz")
+        seed = getattr(mcqs, 'seed', None)
+        st.info(f"🎲 Random {len(mcqs)}-Question Quiz"
+                + (f" • seed {seed}" if seed is not None else ""))
     elif len(mcqs) < len(st.session_state.original_mcqs):
         st.info(f"📌 Marked Questions Quiz ({len(mcqs)} questions)")
     else:
@@ -581,6 +1215,32 @@ def show_quiz_page():
     if not st.session_state.is_random_quiz and len(mcqs) >= len(st.session_state.original_mcqs):
         st.info("💡 **Mark important questions using the ⭐ button below each question to create focused practice quizzes later!**")
 
+    # Sidebar dialogs rerun on their own; they are placed here because
+    # fragments cannot write into the sidebar from inside the body
+    if st.session_state.get('show_search', False):
+        with st.sidebar:
+            show_search_dialog()
+
+    if st.session_state.get('show_marked', False):
+        with st.sidebar:
+            show_marked_dialog()
+
+    show_question_panel()
+
+
+@st.fragment
+@profiled
+def show_question_panel():
+    """Progress, navigation and the current question.
+
+    A fragment: clicks inside it (submit, next/previous, mark) rerun only
+    this panel, not the whole script.  State changes happen in ``on_click``
+    callbacks, which run before the panel re-renders, so no explicit rerun
+    is needed.  Opening a sidebar dialog, finishing the quiz, or marking
+    a question while the marked-questions dialog is open changes what the
+    rest of the page shows and reruns the app.
+    """
+    mcqs = st.session_state.mcqs
     current_idx = st.session_state.current_question
     mcq = mcqs[current_idx]
 
@@ -593,9 +1253,7 @@ def show_quiz_page():
         st.write(f"**Question {current_idx + 1} of {len(mcqs)}**")
 
     with col2:
-        correct_count = sum(1 for i, ans in st.session_state.answered.items()
-                            if ans and ans == mcqs[i]["answer"])
-        st.metric("Score", f"{correct_count}/{current_idx}")
+        st.metric("Score", f"{st.session_state.answered.correct}/{current_idx}")
 
     with col3:
         marked_count = len(st.session_state.marked_questions)
@@ -606,38 +1264,27 @@ def show_quiz_page():
 
     with col1:
         if st.button("🔍 Search", use_container_width=True):
-            st.session_state.show_search = True
+            quiz_state.open_dialog(st.session_state, 'search')
             st.rerun()
 
     with col2:
         if st.button("📌 Show Marked", use_container_width=True):
-            st.session_state.show_marked = True
+            quiz_state.open_dialog(st.session_state, 'marked')
             st.rerun()
 
     with col3:
-        if st.button("⬅️ Previous", disabled=current_idx == 0, use_container_width=True):
-            st.session_state.current_question = max(0, current_idx - 1)
-            st.rerun()
+        st.button("⬅️ Previous", disabled=current_idx == 0, use_container_width=True,
+                  on_click=quiz_state.previous_question, args=(st.session_state,))
 
     with col4:
-        if st.button("➡️ Next", disabled=current_idx == len(mcqs) - 1, use_container_width=True):
-            st.session_state.current_question = min(
-                len(mcqs) - 1, current_idx + 1)
-            st.rerun()
+        st.button("➡️ Next", disabled=current_idx == len(mcqs) - 1, use_container_width=True,
+                  on_click=quiz_state.next_question, args=(st.session_state,))
 
     with col5:
         if st.button("🏁 Finish Quiz", use_container_width=True):
-            st.session_state.show_results = True
+            quiz_state.finish_quiz(st.session_state)
             st.rerun()
 
-    # Show search dialog if needed
-    if st.session_state.get('show_search', False):
-        show_search_dialog()
-
-    # Show marked dialog if needed
-    if st.session_state.get('show_marked', False):
-        show_marked_dialog()
-
     st.markdown("---")
 
     # Question display
@@ -646,13 +1293,18 @@ def show_quiz_page():
 
     # Mark/Unmark button
     if current_idx in st.session_state.marked_questions:
-        if st.button("❌ Unmark Important", type="secondary", use_container_width=True):
-            st.session_state.marked_questions.remove(current_idx)
-            st.rerun()
+        mark_label = "❌ Unmark Important"
     else:
-        if st.button("⭐ Mark Important", type="secondary", use_container_width=True):
-            st.session_state.marked_questions.add(current_idx)
+        mark_label = "⭐ Mark Important"
+    if st.session_state.get('show_marked', False):
+        # The open marked-questions dialog is outside this fragment and
+        # lists the marks, so it needs the whole app to rerun
+        if st.button(mark_label, type="secondary", use_container_width=True):
+            quiz_state.toggle_mark(st.session_state)
             st.rerun()
+    else:
+        st.button(mark_label, type="secondary", use_container_width=True,
+                  on_click=quiz_state.toggle_mark, args=(st.session_state,))
 
     st.markdown("---")
 
@@ -671,110 +1323,106 @@ def show_quiz_page():
 
     # Create options
     option_letters = ordered_option_letters(mcq['options'])
-    option_selected = st.radio(
+    st.radio(
         "Choose an option:",
         options=option_letters,
         format_func=lambda x: f"{x}. {mcq['options'][x]}",
-        key=f"question_{current_idx}",
+        key=QUESTION_WIDGET_KEY.format(current_idx),
         index=option_letters.index(
             previous_answer) if previous_answer else None
     )
 
     # Submit answer button
     if not previous_answer:
-        if st.button("✅ Submit Answer", type="primary", use_container_width=True):
-            st.session_state.answered[current_idx] = option_selected
-            if option_selected == mcq['answer']:
-                st.session_state.correct_answers += 1
-            st.rerun()
+        st.button("✅ Submit Answer", type="primary", use_container_width=True,
+                  on_click=quiz_state.submit_answer, args=(st.session_state,))
 
 
+@st.fragment
+@profiled
 def show_search_dialog():
-    """Show search dialog using sidebar"""
-    with st.sidebar:
-        st.subheader("🔍 Search / Create Quiz")
-        mode = st.radio("Choose mode:", [
-                        "By number", "By keyword"], key="search_mode")
+    """Show search dialog (call inside ``st.sidebar``)"""
+    st.subheader("🔍 Search / Create Quiz")
+    mode = st.radio("Choose mode:", [
+                    "By number", "By keyword"], key="search_mode")
 
-        if mode == "By number":
-            st.write("Enter question number to jump to:")
-            qnum = st.number_input("Question #", min_value=1, max_value=len(
-                st.session_state.mcqs), value=1, key="search_qnum")
+    if mode == "By number":
+        st.write("Enter question number to jump to:")
+        qnum = st.number_input("Question #", min_value=1, max_value=len(
+            st.session_state.mcqs), value=1, key="search_qnum")
 
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Go", key="search_go"):
-                    st.session_state.current_question = qnum - 1
-                    st.session_state.show_search = False
-                    st.rerun()
-            with col2:
-                if st.button("Cancel", key="search_cancel"):
-                    st.session_state.show_search = False
-                    st.rerun()
-        else:
-            st.write("Enter keywords to filter questions (comma-separated):")
-            keyword_text = st.text_input(
-                "Keywords", value="", key="search_keywords")
-            fuzzy = st.checkbox(
-                "Allow fuzzy matching (catch typos)", value=True, key="search_fuzzy")
-            search_scope = st.radio("Search scope:", [
-                                    "All loaded questions", "Current quiz only"], index=0, key="search_scope")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Go", key="search_go"):
+                quiz_state.jump_from_dialog(st.session_state, 'search', qnum - 1)
+                st.rerun()
+        with col2:
+            if st.button("Cancel", key="search_cancel"):
+                quiz_state.close_dialog(st.session_state, 'search')
+                st.rerun()
+    else:
+        st.write("Enter keywords to filter questions (comma-separated):")
+        keyword_text = st.text_input(
+            "Keywords", value="", key="search_keywords")
+        fuzzy = st.checkbox(
+            "Allow fuzzy matching (catch typos)", value=True, key="search_fuzzy")
+        search_scope = st.radio("Search scope:", [
+                                "All loaded questions", "Current quiz only"], index=0, key="search_scope")
 
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Create Quiz", key="keyword_create_quiz"):
-                    base_set = st.session_state.original_mcqs if search_scope == "All loaded questions" else st.session_state.mcqs
-                    keywords = [k.strip()
-                                for k in keyword_text.split(",") if k.strip()]
-                    filtered = filter_mcqs_by_keywords(
-                        base_set, keywords, use_fuzzy=fuzzy, search_in_options=True)
-                    if filtered:
-                        st.session_state.mcqs = filtered
-                        st.session_state.is_random_quiz = False
-                        initialize_quiz()
-                        st.session_state.show_search = False
-                        st.rerun()
-                    else:
-                        st.warning("No questions matched the given keywords.")
-            with col2:
-                if st.button("Close", key="keyword_close"):
-                    st.session_state.show_search = False
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Create Quiz", key="keyword_create_quiz"):
+                base_set = st.session_state.original_mcqs if search_scope == "All loaded questions" else st.session_state.mcqs
+                keywords = [k.strip()
+                            for k in keyword_text.split(",") if k.strip()]
+                matches = keyword_matches(
+                    base_set, keywords, use_fuzzy=fuzzy, search_in_options=True,
+                    index=get_keyword_index(base_set))
+                if matches:
+                    quiz_state.start_quiz(st.session_state, QuizView(base_set, matches))
+                    quiz_state.close_dialog(st.session_state, 'search')
                     st.rerun()
+                else:
+                    st.warning("No questions matched the given keywords.")
+        with col2:
+            if st.button("Close", key="keyword_close"):
+                quiz_state.close_dialog(st.session_state, 'search')
+                st.rerun()
 
 
+@st.fragment
+@profiled
 def show_marked_dialog():
-    """Show marked questions dialog using sidebar"""
+    """Show marked questions dialog (call inside ``st.sidebar``)"""
     marked_list = sorted(st.session_state.marked_questions)
 
-    with st.sidebar:
-        st.subheader("📌 Marked Questions")
+    st.subheader("📌 Marked Questions")
 
-        if not marked_list:
-            st.warning("You haven't marked any questions yet!")
-            if st.button("Close", key="marked_close"):
-                st.session_state.show_marked = False
-                st.rerun()
-            return
+    if not marked_list:
+        st.warning("You haven't marked any questions yet!")
+        if st.button("Close", key="marked_close"):
+            quiz_state.close_dialog(st.session_state, 'marked')
+            st.rerun()
+        return
 
-        st.write("Your marked important questions:")
+    st.write("Your marked important questions:")
 
-        selected_question = st.selectbox(
-            "Select a question to go to:",
-            options=marked_list,
-            format_func=lambda x: f"Q{x+1}: {st.session_state.mcqs[x]['question'][:50]}...",
-            key="marked_select"
-        )
+    selected_question = st.selectbox(
+        "Select a question to go to:",
+        options=marked_list,
+        format_func=lambda x: f"Q{x+1}: {st.session_state.mcqs[x]['question'][:50]}...",
+        key="marked_select"
+    )
 
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Go to Question", key="marked_go"):
-                st.session_state.current_question = selected_question
-                st.session_state.show_marked = False
-                st.rerun()
-        with col2:
-            if st.button("Cancel", key="marked_cancel"):
-                st.session_state.show_marked = False
-                st.rerun()
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Go to Question", key="marked_go"):
+            quiz_state.jump_from_dialog(st.session_state, 'marked', selected_question)
+            st.rerun()
+    with col2:
+        if st.button("Cancel", key="marked_cancel"):
+            quiz_state.close_dialog(st.session_state, 'marked')
+            st.rerun()
 
 
 def show_results_page():
@@ -782,8 +1430,7 @@ def show_results_page():
 
     mcqs = st.session_state.mcqs
     total_questions = len(mcqs)
-    correct_answers = sum(1 for i, ans in st.session_state.answered.items()
-                          if ans and ans == mcqs[i]["answer"])
+    correct_answers = st.session_state.answered.correct
     percentage = (correct_answers / total_questions) * 100
 
     # Calculate grade
@@ -855,10 +1502,8 @@ def show_results_page():
                     else:
                         st.write(f"  {opt}. {text}")
 
-                if st.button(f"Review Question {idx+1}", key=f"review_{idx}"):
-                    st.session_state.current_question = idx
-                    st.session_state.quiz_started = True
-                    st.rerun()
+                st.button(f"Review Question {idx+1}", key=f"review_{idx}",
+                          on_click=quiz_state.review_question, args=(st.session_state, idx))
 
     # Marked questions summary
     if marked_list:
@@ -890,115 +1535,128 @@ def show_results_page():
         col1, col2, col3, col4, col5 = st.columns(5)
 
         with col1:
-            if st.button("🔄 Retake Quiz", use_container_width=True):
-                st.session_state.answered = {i: None for i in range(len(mcqs))}
-                st.session_state.correct_answers = 0
-                st.session_state.current_question = 0
-                st.session_state.quiz_started = True
-                st.session_state.show_results = False
-                st.rerun()
+            st.button("🔄 Retake Quiz", use_container_width=True,
+                      on_click=quiz_state.retake_quiz, args=(st.session_state,))
 
         with col2:
-            if st.button("🎲 New Random Quiz", use_container_width=True):
-                # Generate a new random quiz with the same number of questions as the current quiz
-                current_quiz_size = len(st.session_state.mcqs)
-                if len(st.session_state.original_mcqs) >= current_quiz_size:
-                    random_mcqs = generate_random_quiz(
-                        st.session_state.original_mcqs, current_quiz_size)
-                    st.session_state.mcqs = random_mcqs
-                    st.session_state.answered = {
-                        i: None for i in range(len(random_mcqs))}
-                    st.session_state.correct_answers = 0
-                    st.session_state.current_question = 0
-                    st.session_state.marked_questions = set()
-                    st.session_state.quiz_started = True
-                    st.session_state.show_results = False
-                    st.rerun()
-                else:
-                    st.error(
-                        f"❌ Not enough questions! You have {len(st.session_state.original_mcqs)} questions, but need at least {current_quiz_size} for a random quiz.")
+            # A new random quiz with the same number of questions as the current quiz
+            st.button("🎲 New Random Quiz", use_container_width=True,
+                      on_click=quiz_state.new_random_quiz, args=(st.session_state,))
 
         with col3:
-            if st.button("📌 Marked Questions Quiz", use_container_width=True):
-                # Create a quiz with only marked questions
-                marked_list = sorted(st.session_state.marked_questions)
-                if marked_list:
-                    marked_mcqs = [st.session_state.mcqs[i]
-                                   for i in marked_list]
-                    st.session_state.mcqs = marked_mcqs
-                    st.session_state.answered = {
-                        i: None for i in range(len(marked_mcqs))}
-                    st.session_state.correct_answers = 0
-                    st.session_state.current_question = 0
-                    st.session_state.marked_questions = set()
-                    st.session_state.is_random_quiz = False  # This is now a focused quiz
-                    st.session_state.quiz_started = True
-                    st.session_state.show_results = False
-                    st.rerun()
-                else:
-                    st.warning("⚠️ No marked questions to create a quiz from!")
+            # A focused quiz with only the marked questions
+            st.button("📌 Marked Questions Quiz", use_container_width=True,
+                      on_click=quiz_state.marked_quiz, args=(st.session_state,))
 
         with col4:
             if st.button("📊 Detailed Analysis", use_container_width=True):
-                show_detailed_analysis()
+                st.session_state.show_analysis = not st.session_state.show_analysis
 
         with col5:
-            if st.button("🏠 Back to Home", use_container_width=True):
-                st.session_state.quiz_started = False
-                st.session_state.show_results = False
-                st.rerun()
+            st.button("🏠 Back to Home", use_container_width=True,
+                      on_click=quiz_state.go_home, args=(st.session_state,))
     else:
         # For full quizzes, show 4 buttons
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
-            if st.button("🔄 Retake Quiz", use_container_width=True):
-                st.session_state.answered = {i: None for i in range(len(mcqs))}
-                st.session_state.correct_answers = 0
-                st.session_state.current_question = 0
-                st.session_state.quiz_started = True
-                st.session_state.show_results = False
-                st.rerun()
+            st.button("🔄 Retake Quiz", use_container_width=True,
+                      on_click=quiz_state.retake_quiz, args=(st.session_state,))
 
         with col2:
-            if st.button("📌 Marked Questions Quiz", use_container_width=True):
-                # Create a quiz with only marked questions
-                marked_list = sorted(st.session_state.marked_questions)
-                if marked_list:
-                    marked_mcqs = [st.session_state.mcqs[i]
-                                   for i in marked_list]
-                    st.session_state.mcqs = marked_mcqs
-                    st.session_state.answered = {
-                        i: None for i in range(len(marked_mcqs))}
-                    st.session_state.correct_answers = 0
-                    st.session_state.current_question = 0
-                    st.session_state.marked_questions = set()
-                    st.session_state.is_random_quiz = False  # This is now a focused quiz
-                    st.session_state.quiz_started = True
-                    st.session_state.show_results = False
-                    st.rerun()
-                else:
-                    st.warning("⚠️ No marked questions to create a quiz from!")
+            # A focused quiz with only the marked questions
+            st.button("📌 Marked Questions Quiz", use_container_width=True,
+                      on_click=quiz_state.marked_quiz, args=(st.session_state,))
 
         with col3:
             if st.button("📊 Detailed Analysis", use_container_width=True):
-                show_detailed_analysis()
+                st.session_state.show_analysis = not st.session_state.show_analysis
 
         with col4:
-            if st.button("🏠 Back to Home", use_container_width=True):
-                st.session_state.quiz_started = False
-                st.session_state.show_results = False
-                st.rerun()
+            st.button("🏠 Back to Home", use_container_width=True,
+                      on_click=quiz_state.go_home, args=(st.session_state,))
+
+    if st.session_state.show_analysis:
+        show_detailed_analysis()
+
+
+def show_profiler_panel():
+    """Slowest recent reruns with their hot functions and profile downloads."""
+    store = quiz_profiler.get_profile_store()
+    with st.expander("⏱️ Profiler"):
+        runs = store.runs()
+        st.caption(
+            f"{store.recorded} run(s) profiled; the {len(runs)} slowest of the last "
+            f"{store.window} are kept. Each run's profile is saved when it ends.")
+        if not runs:
+            return
+        labels = {
+            f"#{r['id']} • {r['seconds'] * 1000:.0f} ms • {r['label']}"
+            f"{' / ' + r['page'] if r['page'] else ''} • "
+            f"{time.strftime('%H:%M:%S', time.localtime(r['finished']))}": r
+            for r in runs}
+        run = labels[st.selectbox("Run", list(labels), key="profiler_run")]
+        st.dataframe(
+            pd.DataFrame(quiz_profiler.top_functions(run, filename=__file__),
+                         columns=["Function", "Calls", "Own s", "Total s"]),
+            hide_index=True,
+        )
+        st.download_button(
+            "Download .prof (pstats)", data=quiz_profiler.pstats_bytes(run),
+            file_name=f"rerun_{run['id']}.prof", mime="application/octet-stream")
+        st.download_button(
+            "Download collapsed stacks", data=quiz_profiler.collapsed_stacks(run),
+            file_name=f"rerun_{run['id']}.folded", mime="text/plain")
+        if st.button("Clear profiles", key="profiler_clear"):
+            store.clear()
+
+
+# Questions per page of the detailed analysis
+ANALYSIS_PAGE_SIZE = 20
+ANALYSIS_FILTERS = ("All", "Wrong", "Skipped", "Marked")
+
+
+def analysis_indices(view, total):
+    """Indices of the quiz questions shown under an analysis filter."""
+    if view == "Wrong":
+        return st.session_state.answered.indices('wrong')
+    if view == "Skipped":
+        return st.session_state.answered.indices('skipped')
+    if view == "Marked":
+        return sorted(st.session_state.marked_questions)
+    return range(total)
+
+
+def _reset_analysis_page():
+    st.session_state.analysis_page = 1
 
 
 def show_detailed_analysis():
-    """Show detailed analysis of quiz performance"""
+    """Show detailed analysis of quiz performance, one page at a time"""
     st.subheader("📊 Detailed Analysis")
 
     mcqs = st.session_state.mcqs
 
+    view = st.radio("Show:", ANALYSIS_FILTERS, horizontal=True,
+                    key="analysis_filter", on_change=_reset_analysis_page)
+    indices = analysis_indices(view, len(mcqs))
+    if not len(indices):
+        st.info(f"No {view.lower()} questions in this quiz.")
+        return
+
+    pages = (len(indices) + ANALYSIS_PAGE_SIZE - 1) // ANALYSIS_PAGE_SIZE
+    if not 1 <= st.session_state.get('analysis_page', 0) <= pages:
+        st.session_state.analysis_page = 1
+    page = st.number_input("Page", min_value=1, max_value=pages,
+                           step=1, key="analysis_page")
+    start = (page - 1) * ANALYSIS_PAGE_SIZE
+    page_indices = indices[start:start + ANALYSIS_PAGE_SIZE]
+    st.caption(
+        f"Showing {start + 1}–{start + len(page_indices)} of {len(indices)} question(s) • page {page} of {pages}")
+
     # Question-by-question analysis
-    for i, mcq in enumerate(mcqs):
+    for i in page_indices:
+        mcq = mcqs[i]
         user_answer = st.session_state.answered.get(i)
         correct_answer = mcq['answer']
 
@@ -1034,91 +1692,968 @@ def show_detailed_analysis():
                     st.warning("Skipped")
 
 
-def extract_mcqs_from_excel(uploaded_file):
-    """Extract MCQs from uploaded Excel file"""
-    try:
-        # Ensure file pointer is at start for reliable reads
-        if hasattr(uploaded_file, 'seek'):
-            try:
-                uploaded_file.seek(0)
-            except Exception:
-                pass
+# Option slot of a question that has no such option
+NO_OPTION = 0xFFFFFFFF
 
-        # Read ALL sheets; pandas returns a dict when sheet_name=None
-        try:
-            sheets = pd.read_excel(uploaded_file, sheet_name=None)
-        except Exception:
-            # Retry once after rewinding (covers cases where buffer moved during earlier operations)
-            if hasattr(uploaded_file, 'seek'):
-                try:
-                    uploaded_file.seek(0)
-                except Exception:
-                    pass
-            sheets = pd.read_excel(uploaded_file, sheet_name=None)
 
-        all_mcqs = []
-        for _, df in (sheets.items() if isinstance(sheets, dict) else [(None, sheets)]):
-            # Drop fully empty columns/rows to reduce noise
-            try:
-                df = df.dropna(axis=0, how='all').dropna(axis=1, how='all')
-            except Exception:
-                pass
-            all_mcqs.extend(parse_excel_to_mcqs(df))
+class QuestionBank(Sequence):
+    """Columnar, immutable store of MCQs.
 
-        return all_mcqs
+    Every distinct question/option text is kept once in ``texts``; each
+    question is a row of integer ids: ``questions[i]`` is its text id,
+    ``options[4*i:4*i+4]`` the ids of options A-D (``NO_OPTION`` when
+    absent) and ``answers[i]`` the answer's index in ``OPTION_LETTERS``.
+    Items are read-only ``MCQView`` mappings, so code written against the
+    ``{"question", "options", "answer"}`` dicts keeps working.
+    """
 
-    except Exception as e:
-        st.error(f"Error reading Excel file: {e}")
-        return []
+    __slots__ = ('texts', 'questions', 'options', 'answers', 'nbytes')
+
+    def __init__(self, texts, questions, options, answers):
+        self.texts = texts
+        self.questions = questions
+        self.options = options
+        self.answers = answers
+        self.nbytes = (sys.getsizeof(texts) + sum(sys.getsizeof(text) for text in texts)
+                       + sum(column.itemsize * len(column)
+                             for column in (questions, options, answers)))
+
+    @classmethod
+    def from_mcqs(cls, mcqs):
+        """Build a bank from MCQ dicts (or views), interning identical texts."""
+        if isinstance(mcqs, QuestionBank):
+            return mcqs
+        text_ids = {}
+        questions = array('I')
+        options = array('I')
+        answers = array('B')
+
+        def intern(text):
+            text_id = text_ids.get(text)
+            if text_id is None:
+                text_id = text_ids[text] = len(text_ids)
+            return text_id
+
+        for mcq in mcqs:
+            mcq_options = mcq['options']
+            questions.append(intern(mcq['question']))
+            options.extend(intern(mcq_options[letter]) if letter in mcq_options else NO_OPTION
+                           for letter in OPTION_LETTERS)
+            answers.append(OPTION_LETTERS.index(mcq['answer']))
+        return cls(list(text_ids), questions, options, answers)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [MCQView(self, i) for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("question index out of range")
+        return MCQView(self, idx)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield MCQView(self, idx)
+
+    def question(self, idx):
+        return self.texts[self.questions[idx]]
+
+    def option_texts(self, idx):
+        """``{letter: text}`` of the options question ``idx`` has, in A-D order."""
+        base = len(OPTION_LETTERS) * idx
+        texts = self.texts
+        return {letter: texts[text_id]
+                for letter, text_id in zip(OPTION_LETTERS, self.options[base:base + len(OPTION_LETTERS)])
+                if text_id != NO_OPTION}
+
+    def answer(self, idx):
+        return OPTION_LETTERS[self.answers[idx]]
+
+
+class MCQView(Mapping):
+    """Read-only ``{"question", "options", "answer"}`` mapping over one bank row."""
+
+    __slots__ = ('bank', 'index')
+
+    _KEYS = ('question', 'options', 'answer')
+
+    def __init__(self, bank, index):
+        self.bank = bank
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == 'question':
+            return self.bank.question(self.index)
+        if key == 'options':
+            return MappingProxyType(self.bank.option_texts(self.index))
+        if key == 'answer':
+            return self.bank.answer(self.index)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __repr__(self):
+        return f"MCQView({dict(self)!r})"
+
+
+# Bump whenever parser output can change so stale cache entries are never served
+PARSER_VERSION = "2"
+
+
+class ParseCache:
+    """Process-wide LRU cache of parsed workbooks keyed by content hash.
+
+    Entries are evicted least-recently-used first once either the entry count
+    or the approximate in-memory size of the cached MCQs exceeds its bound.
+    """
 
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, mcqs, sheet_reports=()):
+        mcqs = QuestionBank.from_mcqs(mcqs)
+        sheet_reports = tuple(dict(r) for r in sheet_reports)
+        size = _estimate_mcqs_bytes(mcqs)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[2]
+            # Never cache a single result that could not fit on its own
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (mcqs, sheet_reports, size)
+            self.total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.total_bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _estimate_mcqs_bytes(mcqs):
+    """Rough memory footprint of parsed MCQs (text plus per-record overhead)."""
+    if isinstance(mcqs, QuestionBank):
+        return mcqs.nbytes
+    total = 0
+    for mcq in mcqs:
+        total += 600 + len(mcq["question"])
+        total += sum(len(text) for text in mcq["options"].values())
+    return total
 
-def parse_excel_to_mcqs(df):
-    """Parse Excel DataFrame to MCQ format"""
-    # Heuristic 1: Wide-table layout with headers like Question, A, B, C, D, Answer
-    lower_cols = [str(c).strip().casefold() for c in df.columns]
-    has_question_col = any('question' in c for c in lower_cols)
-    has_option_cols = any(c in {'a', 'option a', 'opt a'} for c in lower_cols)
-    has_answer_col = any('answer' in c or 'correct' in c for c in lower_cols)
-    if has_question_col and has_answer_col and (has_option_cols or any(c in {'b', 'c', 'd', 'option b', 'option c', 'option d'} for c in lower_cols)):
-        wide = parse_wide_table_excel(df)
-        if wide:
-            return wide
 
-    # Heuristic 2: Multi-table marker in first column
-    table_names = []
-    try:
-        for i, row in df.iterrows():
-            first_val = str(row.iloc[0]).strip()
-            if first_val.startswith('Table') and first_val[5:].isdigit():
-                table_names.append((i, first_val))
-    except Exception:
-        table_names = []
+@st.cache_resource
+def get_parse_cache():
+    """Return the parse cache shared by every session in this process."""
+    return ParseCache()
 
-    if table_names:
-        parsed = parse_multi_table_excel(df, table_names)
-        if parsed:
-            return parsed
-    # Try legacy single-table parser
-    parsed_single = parse_single_table_excel(df)
-    if parsed_single:
-        return parsed_single
-    # Final fallback: flexible free-form parser
-    return parse_flexible_excel(df)
 
+class PoolHandle:
+    """A session's reference to a shared pool; the pool lives while handles do."""
 
-def parse_wide_table_excel(df):
-    """Parse a wide-table layout: one row per question with columns Question, A-D (or Option A-D), and Answer.
+    __slots__ = ('key', 'mcqs', 'files', 'details', '_pool', '__weakref__')
 
-    Supported variations:
-    - Column names like 'Question', 'A'/'Option A', 'B', 'C', 'D'
-    - 'Answer' column can be the letter (A/B/C/D) or the exact option text
-    - Case-insensitive, trims whitespace
+    def __init__(self, pool):
+        self.key = pool.key
+        self.mcqs = pool.mcqs
+        self.files = pool.files
+        self.details = pool.details
+        self._pool = pool
+
+    def keyword_index(self):
+        """The pool's ``KeywordIndex``, built once and shared by every session."""
+        return self._pool.keyword_index()
+
+
+class _SharedPool:
+    __slots__ = ('key', 'mcqs', 'files', 'details', 'size', 'handles', '_index', '_lock')
+
+    def __init__(self, key, mcqs, files, details):
+        self.key = key
+        self.mcqs = mcqs
+        self.files = files
+        self.details = details
+        self.size = _estimate_mcqs_bytes(mcqs)
+        self.handles = weakref.WeakSet()
+        self._index = None
+        self._lock = threading.Lock()
+
+    def keyword_index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = KeywordIndex(self.mcqs)
+            return self._index
+
+
+class PoolRegistry:
+    """Process-wide registry of immutable question pools keyed by content.
+
+    Sessions that load the same files (same ``pool_key``) get handles to one
+    shared ``QuestionBank`` instead of their own copies.  A pool is referenced
+    for as long as any session keeps its handle; pools nobody references
+    are evicted on the next ``publish``/``stats``.
+    """
+
+    def __init__(self):
+        self.evictions = 0
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Return a new handle to the pool for ``key``, or None if not loaded."""
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                return None
+            return self._new_handle(pool)
+
+    def publish(self, key, mcqs, files=(), details=None):
+        """Register a freshly loaded pool and return a handle to it.
+
+        ``files`` and ``details`` (a dict, e.g. duplicate counts) are shared
+        with the pool for display.  If another session published the same
+        key in the meantime, its pool is returned instead and ``mcqs`` is
+        discarded.
+        """
+        with self._lock:
+            self._evict_unreferenced()
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = _SharedPool(key, QuestionBank.from_mcqs(mcqs), tuple(files),
+                                   dict(details or {}))
+                self._pools[key] = pool
+            return self._new_handle(pool)
+
+    def _new_handle(self, pool):
+        handle = PoolHandle(pool)
+        pool.handles.add(handle)
+        return handle
+
+    def _evict_unreferenced(self):
+        for key in [key for key, pool in self._pools.items() if not pool.handles]:
+            del self._pools[key]
+            self.evictions += 1
+
+    def stats(self):
+        """Pool count, live handles, pool bytes and bytes saved by sharing."""
+        with self._lock:
+            self._evict_unreferenced()
+            pools = list(self._pools.values())
+            return {
+                "pools": len(pools),
+                "handles": sum(len(pool.handles) for pool in pools),
+                "bytes": sum(pool.size for pool in pools),
+                # Every extra session would otherwise hold its own copy
+                "saved_bytes": sum(pool.size * (len(pool.handles) - 1) for pool in pools),
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_pool_registry():
+    """Return the pool registry shared by every session in this process."""
+    return PoolRegistry()
+
+
+def _read_upload_bytes(uploaded_file):
+    """Return the full contents of an uploaded file (or path) as bytes."""
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, 'rb') as fh:
+            return fh.read()
+    if hasattr(uploaded_file, 'getvalue'):
+        return uploaded_file.getvalue()
+    # Ensure file pointer is at start for reliable reads
+    if hasattr(uploaded_file, 'seek'):
+        try:
+            uploaded_file.seek(0)
+        except Exception:
+            pass
+    return uploaded_file.read()
+
+
+def source_cache_key(source):
+    """Cache key of an upload or a server-side bank path, as used by ``ingest_workbooks``."""
+    if (isinstance(source, (str, os.PathLike))
+            and workbook_extension(os.fspath(source), b'') == 'mcqb'):
+        return bank_path_cache_key(source)
+    return workbook_cache_key(_read_upload_bytes(source))
+
+
+def workbook_cache_key(data):
+    """Cache key for raw workbook bytes: content hash plus parser version."""
+    return f"{hashlib.blake2b(data, digest_size=20).hexdigest()}:v{PARSER_VERSION}"
+
+
+def _parse_sheet_frame(sheet_name, df):
+    """Parse one sheet's DataFrame; returns (mcqs, sheet_report)."""
+    start = time.perf_counter()
+    # Drop fully empty columns/rows to reduce noise
+    try:
+        df = df.dropna(axis=0, how='all').dropna(axis=1, how='all')
+    except Exception:
+        pass
+    sheet_report = {'sheet': sheet_name}
+    mcqs = parse_excel_to_mcqs(df, report=sheet_report)
+    sheet_report['parse_seconds'] = time.perf_counter() - start
+    return mcqs, sheet_report
+
+
+def _parse_workbook_bytes(data, extension=None):
+    """Read and parse every sheet of a workbook; returns (mcqs, sheet_reports)."""
+    extension = extension or workbook_extension(None, data)
+    if extension == 'mcqb':
+        return load_mcq_bank(data)
+    return read_workbook(data, extension)
+
+
+def extract_mcqs_from_excel(uploaded_file, report=None, on_error=None, use_cache=True):
+    """Extract MCQs from uploaded Excel file
+
+    Unchanged uploads are served from the process-wide parse cache, so each
+    distinct workbook is only read and parsed once; ``use_cache=False``
+    parses without touching the cache (batch conversion, where every
+    workbook is seen once).  When ``report`` is a dict it receives the
+    workbook's ``cache_key``, whether it was ``cached``, the
+    ``elapsed_seconds`` and, under ``'sheets'``, one entry per sheet with
+    its detected layout, confidence, question count, reader, timings and
+    validation counts.  The report is also logged (see ``log_file_report``).
+
+    A file that cannot be read is reported to ``on_error(name, exception)``
+    and yields no questions; without ``on_error`` the exception is raised.
+    """
+    started = time.perf_counter()
+    name = getattr(uploaded_file, 'name', None)
+    if name is None:
+        name = (os.path.basename(uploaded_file)
+                if isinstance(uploaded_file, (str, os.PathLike)) else 'file')
+    report = {} if report is None else report
+    try:
+        data = _read_upload_bytes(uploaded_file)
+        cache = get_parse_cache() if use_cache else None
+        key = workbook_cache_key(data)
+        report['cache_key'] = key
+        cached = cache.get(key) if cache is not None else None
+        report['cached'] = cached is not None
+        if cached is not None:
+            mcqs, sheet_reports = cached
+            report['sheets'] = [dict(r) for r in sheet_reports]
+            mcqs = list(mcqs)
+        else:
+            mcqs, sheet_reports = _parse_workbook_bytes(
+                data, workbook_extension(name, data))
+            if cache is not None:
+                cache.put(key, mcqs, sheet_reports)
+            report['sheets'] = sheet_reports
+        report['elapsed_seconds'] = time.perf_counter() - started
+        log_file_report(name, len(mcqs), report)
+        return mcqs
+
+    except Exception as e:
+        report['elapsed_seconds'] = time.perf_counter() - started
+        log_file_report(name, 0, report, error=str(e))
+        if on_error is None:
+            raise
+        on_error(name, e)
+        return []
+
+
+# Import reports are logged as one JSON object per file at INFO level.
+# Set MCQ_LOG_LEVEL=INFO to print them to stderr, or attach a handler to
+# this logger.
+INGEST_LOGGER = logging.getLogger('mcq_quiz.ingest')
+if os.environ.get('MCQ_LOG_LEVEL') and not INGEST_LOGGER.handlers:
+    # Guarded: Streamlit re-executes this module on every rerun
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter('%(message)s'))
+    INGEST_LOGGER.addHandler(_log_handler)
+    INGEST_LOGGER.setLevel(os.environ['MCQ_LOG_LEVEL'].upper())
+
+
+def log_file_report(name, questions, report, error=None):
+    """Emit the import report of one file as a structured log record."""
+    if not INGEST_LOGGER.isEnabledFor(logging.INFO):
+        return
+    INGEST_LOGGER.info(json.dumps(
+        {'event': 'file_imported', 'file': name, 'questions': questions,
+         'error': error, **report},
+        default=str))
+
+
+# Worker processes used for ingestion; 0 or 1 parses everything in-process
+INGEST_WORKERS = int(os.environ.get('MCQ_INGEST_WORKERS', os.cpu_count() or 1))
+
+
+@st.cache_resource
+def get_ingest_pool():
+    """Return the process pool shared by all sessions, or None when disabled."""
+    if INGEST_WORKERS < 2:
+        return None
+    # spawn: forking a threaded Streamlit server is not safe
+    return ProcessPoolExecutor(max_workers=INGEST_WORKERS,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+WORKER_DIED_ERROR = ("A worker process stopped while parsing this file "
+                     "(out of memory or a crashed reader); load it again to retry")
+
+
+def _replace_ingest_pool(broken):
+    """Drop a broken shared pool so later batches start a fresh one; returns it."""
+    if get_ingest_pool() is broken:
+        get_ingest_pool.clear()
+        broken.shutdown(wait=False)
+    return get_ingest_pool()
+
+
+def _importable_self():
+    """This module under an importable name.
+
+    Streamlit executes the script as ``__main__``, which worker processes
+    cannot import, so task functions are resolved through the module's
+    file name instead.
+    """
+    if __name__ != '__main__':
+        return sys.modules[__name__]
+    return importlib.import_module(os.path.splitext(os.path.basename(__file__))[0])
+
+
+def _parse_sheet_task(path, extension, sheet_name):
+    """Worker entry point: read and parse one sheet of a workbook on disk."""
+    mcqs, sheet_reports = read_workbook(path, extension, [sheet_name])
+    return mcqs, sheet_reports[0]
+
+
+def ingest_workbooks(uploaded_files, on_file_done=None):
+    """Parse several uploaded workbooks, fanning work out to worker processes.
+
+    Cache hits are served directly.  The remaining workbooks are split into
+    one task per sheet and run on the shared process pool when there is
+    more than one task; results are merged back in upload and sheet order.
+    A failure only affects its own file.
+
+    Compiled ``.mcqb`` banks (uploaded, or server-side paths) are loaded
+    directly without reading any workbook.
+
+    Returns one dict per file, in upload order, with ``name``, ``mcqs``,
+    ``report`` (as filled by ``extract_mcqs_from_excel``; ``elapsed_seconds``
+    counts from the start of the batch) and ``error``.  Each report is
+    logged as it completes.  ``on_file_done(done, total, name)`` is called
+    as each file completes.
+    """
+    started = time.perf_counter()
+    cache = get_parse_cache()
+    total = len(uploaded_files)
+    results = []
+    pending = {}
+    tasks = []
+    done = 0
+
+    def finish(result):
+        nonlocal done
+        done += 1
+        result['report']['elapsed_seconds'] = time.perf_counter() - started
+        log_file_report(result['name'], len(result['mcqs']), result['report'],
+                        error=result['error'])
+        if on_file_done is not None:
+            on_file_done(done, total, result['name'])
+
+    for file_idx, uploaded_file in enumerate(uploaded_files):
+        server_bank = (isinstance(uploaded_file, (str, os.PathLike))
+                       and workbook_extension(os.fspath(uploaded_file), b'') == 'mcqb')
+        result = {'name': (os.path.basename(uploaded_file) if server_bank
+                           else getattr(uploaded_file, 'name', 'file')),
+                  'mcqs': [], 'report': {}, 'error': None}
+        results.append(result)
+        try:
+            if server_bank:
+                # Mapped rather than read, so it is never hashed or copied
+                data = uploaded_file
+                extension = 'mcqb'
+                key = bank_path_cache_key(uploaded_file)
+            else:
+                data = _read_upload_bytes(uploaded_file)
+                extension = workbook_extension(result['name'], data)
+                key = workbook_cache_key(data)
+            result['report']['cache_key'] = key
+            cached = cache.get(key)
+            result['report']['cached'] = cached is not None
+            if cached is not None:
+                mcqs, sheet_reports = cached
+                result['mcqs'] = mcqs
+                result['report']['sheets'] = [dict(r) for r in sheet_reports]
+                finish(result)
+                continue
+            if extension == 'mcqb':
+                # Compiled banks skip the readers and parsers entirely
+                mcqs, sheet_reports = load_mcq_bank(data)
+                cache.put(key, mcqs, sheet_reports)
+                result['mcqs'] = mcqs
+                result['report']['sheets'] = sheet_reports
+                finish(result)
+                continue
+            sheet_names = workbook_sheet_names(data, extension)
+        except Exception as e:
+            result['error'] = str(e)
+            finish(result)
+            continue
+        pending[file_idx] = {'key': key, 'data': data, 'path': None,
+                             'extension': extension,
+                             'sheets': [None] * len(sheet_names),
+                             'remaining': len(sheet_names)}
+        tasks.extend((file_idx, pos, name) for pos, name in enumerate(sheet_names))
+
+    def complete(file_idx, mcqs=None, sheet_reports=None):
+        entry = pending.pop(file_idx)
+        if entry['path']:
+            try:
+                os.remove(entry['path'])
+            except OSError:
+                pass
+        result = results[file_idx]
+        if result['error'] is None:
+            if mcqs is None:
+                # Merge per-sheet results back in sheet order
+                mcqs = [mcq for sheet_mcqs, _ in entry['sheets'] for mcq in sheet_mcqs]
+                sheet_reports = [sheet_report for _, sheet_report in entry['sheets']]
+            cache.put(entry['key'], mcqs, sheet_reports)
+            result['mcqs'] = mcqs
+            result['report']['sheets'] = sheet_reports
+        finish(result)
+
+    pool = get_ingest_pool() if len(tasks) > 1 else None
+    if pool is None:
+        for file_idx in list(pending):
+            mcqs = sheet_reports = None
+            try:
+                entry = pending[file_idx]
+                mcqs, sheet_reports = _parse_workbook_bytes(
+                    entry['data'], entry['extension'])
+            except Exception as e:
+                results[file_idx]['error'] = str(e)
+            complete(file_idx, mcqs, sheet_reports)
+        return results
+
+    # Workers read from temp files so big workbooks are not pickled per sheet
+    task_fn = _importable_self()._parse_sheet_task
+    futures = {}
+    try:
+        for file_idx, entry in pending.items():
+            suffix = '.' + entry['extension']
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as fh:
+                fh.write(entry['data'])
+                entry['path'] = fh.name
+            entry['data'] = None
+        for retry in (False, True):
+            try:
+                for file_idx, pos, sheet_name in tasks[len(futures):]:
+                    entry = pending[file_idx]
+                    future = pool.submit(
+                        task_fn, entry['path'], entry['extension'], sheet_name)
+                    futures[future] = (file_idx, pos)
+                break
+            except BrokenProcessPool:
+                # A worker died (here or in an earlier batch); tasks already
+                # submitted fail below, the rest go to a fresh pool
+                pool = _replace_ingest_pool(pool)
+                if retry or pool is None:
+                    for file_idx, _, _ in tasks[len(futures):]:
+                        if file_idx in pending:
+                            results[file_idx]['error'] = WORKER_DIED_ERROR
+                            complete(file_idx)
+                    break
+
+        for future in as_completed(futures):
+            file_idx, pos = futures[future]
+            if file_idx not in pending:
+                continue
+            entry = pending[file_idx]
+            try:
+                entry['sheets'][pos] = future.result()
+            except BrokenProcessPool:
+                # Only the files still in flight are lost with the pool
+                _replace_ingest_pool(pool)
+                results[file_idx]['error'] = WORKER_DIED_ERROR
+                complete(file_idx)
+                continue
+            except Exception as e:
+                results[file_idx]['error'] = str(e)
+                for other, (other_idx, _) in futures.items():
+                    if other_idx == file_idx:
+                        other.cancel()
+                complete(file_idx)
+                continue
+            entry['remaining'] -= 1
+            if entry['remaining'] == 0:
+                complete(file_idx)
+    finally:
+        for entry in pending.values():
+            if entry['path']:
+                try:
+                    os.remove(entry['path'])
+                except OSError:
+                    pass
+    return results
+
+
+# Near-duplicate detection: MinHash signatures over byte shingles of the
+# normalized question and option text, banded for LSH.  Candidates are then
+# confirmed with their exact shingle Jaccard similarity.
+NEAR_DUPLICATE_THRESHOLD = 0.85
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 60
+MINHASH_BANDS = 10
+
+
+def _duplicate_fields(mcq):
+    """Normalized (question, sorted option texts, correct answer text) of an MCQ."""
+    options = mcq['options']
+    return (_normalize_text(mcq['question']),
+            tuple(sorted(_normalize_text(text) for text in options.values())),
+            _normalize_text(options.get(mcq['answer'], '')))
+
+
+def _shingle_codes(texts):
+    """Sorted, distinct UTF-8 byte shingles of every text, back to back.
+
+    A shingle is ``SHINGLE_SIZE`` consecutive bytes packed into an integer,
+    so they are exact (no hashing) and computed for all texts at once.
+    Returns (codes, offsets) with text ``i``'s shingles at ``offsets[i]:``.
+    """
+    encoded = [text.encode('utf-8').ljust(SHINGLE_SIZE, b'\0') for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    ends = np.cumsum(lengths)
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    windows = len(data) - SHINGLE_SIZE + 1
+    codes = np.zeros(windows, dtype=np.uint64)
+    for pos in range(SHINGLE_SIZE):
+        codes = (codes << np.uint64(8)) | data[pos:pos + windows]
+    text_ids = np.repeat(np.arange(len(texts), dtype=np.uint64), lengths)[:windows]
+    # Drop windows that run past the end of their text
+    inside = np.arange(SHINGLE_SIZE, windows + SHINGLE_SIZE) <= ends[text_ids.astype(np.intp)]
+    code_bits = np.uint64(8 * SHINGLE_SIZE)
+    keys = np.sort((text_ids[inside] << code_bits) | codes[inside])
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    offsets = np.searchsorted(keys >> code_bits, np.arange(len(texts), dtype=np.uint64))
+    return keys & np.uint64((1 << (8 * SHINGLE_SIZE)) - 1), offsets
+
+
+def _find_root(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent, a, b):
+    """Merge the sets of ``a`` and ``b``; the earlier MCQ stays the root."""
+    root_a = _find_root(parent, a)
+    root_b = _find_root(parent, b)
+    if root_a != root_b:
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+        return True
+    return False
+
+
+def _minhash_signatures(shingle_ids, offsets, seed=0):
+    """(docs, MINHASH_PERMUTATIONS) uint32 MinHash matrix.
+
+    ``shingle_ids`` holds every document's shingles back to back, starting
+    at ``offsets[doc]``.  Shingles are mixed down to 32 bits once; each
+    permutation is then an odd-multiplier affine map modulo 2**32.
+    """
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2 ** 32, MINHASH_PERMUTATIONS, dtype=np.uint32) | np.uint32(1)
+    increments = rng.integers(0, 2 ** 32, MINHASH_PERMUTATIONS, dtype=np.uint32)
+    signatures = np.empty((len(offsets), MINHASH_PERMUTATIONS), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        mixed = ((shingle_ids * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)).astype(np.uint32)
+        hashed = np.empty_like(mixed)
+        for perm in range(MINHASH_PERMUTATIONS):
+            np.multiply(mixed, multipliers[perm], out=hashed)
+            hashed += increments[perm]
+            signatures[:, perm] = np.minimum.reduceat(hashed, offsets)
+    return signatures
+
+
+def _lsh_candidate_pairs(signatures):
+    """(leader, member) row pairs that share at least one LSH band.
+
+    Within a bucket every member is paired with the bucket's first row only,
+    which keeps the number of pairs linear in the number of rows.
+    """
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    pairs = set()
+    mixers = (np.arange(rows, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+              + np.uint64(0x632BE59BD9B4E019))
+    with np.errstate(over='ignore'):
+        for band in range(MINHASH_BANDS):
+            columns = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys = np.bitwise_xor.reduce(columns * mixers, axis=1)
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sizes = np.diff(np.r_[starts, len(order)])
+            for start, size in zip(starts[sizes > 1].tolist(), sizes[sizes > 1].tolist()):
+                leader = int(order[start])
+                pairs.update((leader, int(member)) for member in order[start + 1:start + size])
+    return pairs
+
+
+def find_duplicate_mcqs(mcqs, near=True, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Group duplicate MCQs; returns (keep, stats).
+
+    ``keep`` lists, in order, the index of the first MCQ of every group.
+    Exact duplicates have the same normalized question, option texts (in
+    any order) and correct answer text.  With ``near``, MCQs whose shingle
+    Jaccard similarity is at least ``threshold`` are merged too, but only
+    when their correct answer text is the same, so reworded copies collapse
+    while questions that differ in what they ask do not.  ``stats`` counts
+    the ``exact`` and ``near`` duplicates removed.
+    """
+    parent = list(range(len(mcqs)))
+    first_by_content = {}
+    exact = 0
+    unique_ids = []
+    answers = []
+    texts = []
+    for i, mcq in enumerate(mcqs):
+        question, options, answer = _duplicate_fields(mcq)
+        digest = hashlib.blake2b(
+            "\x1f".join((question, answer) + options).encode('utf-8'), digest_size=16).digest()
+        first = first_by_content.setdefault(digest, i)
+        if first != i:
+            parent[i] = first
+            exact += 1
+            continue
+        unique_ids.append(i)
+        answers.append(answer)
+        texts.append(" ".join((question,) + options))
+
+    near_count = 0
+    if near and len(unique_ids) > 1:
+        shingle_ids, offsets = _shingle_codes(texts)
+        del texts
+        ends = np.r_[offsets[1:], len(shingle_ids)]
+
+        def jaccard(a, b):
+            left = shingle_ids[offsets[a]:ends[a]]
+            right = shingle_ids[offsets[b]:ends[b]]
+            common = len(np.intersect1d(left, right, assume_unique=True))
+            return common / (len(left) + len(right) - common)
+
+        signatures = _minhash_signatures(shingle_ids, offsets)
+        for leader, member in sorted(_lsh_candidate_pairs(signatures)):
+            if answers[leader] == answers[member] and jaccard(leader, member) >= threshold:
+                if _union(parent, unique_ids[leader], unique_ids[member]):
+                    near_count += 1
+
+    keep = [i for i in range(len(mcqs)) if _find_root(parent, i) == i]
+    return keep, {'exact': exact, 'near': near_count}
+
+
+def deduplicate_mcqs(mcqs, near=True, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Drop duplicate MCQs, keeping first occurrences; returns (mcqs, stats).
+
+    ``mcqs`` itself is returned when it has no duplicates.
     """
-    def norm(s):
-        return str(s).strip()
+    keep, stats = find_duplicate_mcqs(mcqs, near=near, threshold=threshold)
+    if len(keep) == len(mcqs):
+        return mcqs, stats
+    return [mcqs[i] for i in keep], stats
+
+
+LAYOUT_LABELS = {
+    'wide': 'wide table',
+    'multi_table': 'multi-table',
+    'legacy': 'legacy single table',
+    'freeform': 'free-form',
+}
+
+# Rows sampled (after the header) when classifying a sheet's layout
+LAYOUT_SAMPLE_ROWS = 200
+
+
+TABLE_MARKER_RE = re.compile(r'^Table\d+$')
+
+
+def _is_question_label(text):
+    s = text.casefold()
+    return s.startswith('question') or s in {'ques', 'q', 'q:'}
+
 
+def _has_wide_headers(columns):
+    """True when the header row looks like Question, A-D, Answer."""
+    lower_cols = [str(c).strip().casefold() for c in columns]
+    has_question_col = any('question' in c for c in lower_cols)
+    has_option_cols = any(c in {'a', 'option a', 'opt a'} for c in lower_cols)
+    has_answer_col = any('answer' in c or 'correct' in c for c in lower_cols)
+    return has_question_col and has_answer_col and (has_option_cols or any(c in {'b', 'c', 'd', 'option b', 'option c', 'option d'} for c in lower_cols))
+
+
+def find_table_markers(df):
+    """Return [(row_position, name)] for 'TableN' marker rows in the first column."""
+    if df.shape[1] == 0 or len(df) == 0:
+        return []
+    first = df.iloc[:, 0]
+    first = first.astype(object).where(first.notna(), '').astype(str).str.strip()
+    hits = first.str.match(TABLE_MARKER_RE.pattern).to_numpy(dtype=bool)
+    positions = np.flatnonzero(hits)
+    return [(int(pos), first.iloc[pos]) for pos in positions]
+
+
+def detect_sheet_layout(df, sample_rows=LAYOUT_SAMPLE_ROWS, allow_wide=True):
+    """Classify a sheet as 'wide', 'multi_table', 'legacy' or 'freeform'.
+
+    Only the header and the first ``sample_rows`` rows are inspected (plus a
+    vectorized pass over the first column for table markers).  Returns
+    ``(layout, confidence, table_markers)`` where confidence is the share of
+    non-empty sampled rows the chosen parser recognizes.
+    """
+    sample = [[str(val).strip() if not pd.isna(val) else '' for val in row]
+              for row in df.iloc[:sample_rows].itertuples(index=False, name=None)]
+    if allow_wide and _has_wide_headers(df.columns):
+        return classify_layout_sample(df.columns, sample)
+    return classify_layout_sample(df.columns, sample, find_table_markers(df),
+                                  allow_wide=False)
+
+
+def classify_layout_sample(columns, sample, markers=(), allow_wide=True):
+    """Classify from header names and sampled rows of stripped strings.
+
+    Shared by ``detect_sheet_layout`` and the streaming reader; ``markers``
+    are the table markers known so far.  Returns the same triple as
+    ``detect_sheet_layout``.
+    """
+    non_empty = [row for row in sample if any(row)]
+    total = len(non_empty) or 1
+
+    if allow_wide and _has_wide_headers(columns):
+        # Rows with question text and at least two option-like cells
+        hits = sum(1 for row in non_empty
+                   if row[0] and sum(1 for cell in row[1:] if cell) >= 2)
+        return 'wide', round(hits / total, 2), []
+
+    markers = list(markers)
+    first_questions = other_questions = options = answers = 0
+    for row in non_empty:
+        first = row[0]
+        if first and _is_question_label(first):
+            first_questions += 1
+        elif any(cell.casefold().startswith('question') or cell.casefold() in {'q', 'q:'}
+                 for cell in row[1:]):
+            other_questions += 1
+        elif first[:1].upper() in {'A', 'B', 'C', 'D'}:
+            options += 1
+        elif first.casefold().startswith('answer'):
+            answers += 1
+
+    if markers:
+        recognized = first_questions + options + min(len(markers), total)
+        return 'multi_table', round(min(recognized / total, 1.0), 2), markers
+    if first_questions and first_questions >= other_questions:
+        return 'legacy', round((first_questions + options) / total, 2), []
+    recognized = first_questions + other_questions + options + answers
+    return 'freeform', round(recognized / total, 2), []
+
+
+def parse_excel_to_mcqs(df, report=None):
+    """Parse Excel DataFrame to MCQ format
+
+    The sheet is classified once by ``detect_sheet_layout`` and handed to the
+    matching parser.  Only when that parser finds nothing are the others
+    tried, in the order used before classification existed: multi-table
+    (when the sheet has table markers), legacy single table, free-form.  When ``report`` is a dict it receives
+    the layout, its confidence and the question count, plus the rows
+    scanned and the validation counts of the parser that produced the
+    result (see ``validate_mcq_batch``).
+    """
+    mcqs = []
+    if report is not None:
+        report['rows'] = len(df)
+    layout, confidence, markers = detect_sheet_layout(df)
+    if layout == 'wide':
+        mcqs = parse_wide_table_excel(df, report=report)
+        if not mcqs:
+            # Header looked wide but the rows did not; classify the body instead
+            _reset_validation_counts(report)
+            layout, confidence, markers = detect_sheet_layout(
+                df, allow_wide=False)
+
+    if layout != 'wide':
+        # One normalization pass shared by whichever row parser runs
+        matrix = build_cell_matrix(df)
+        parsers = {
+            'multi_table': lambda: parse_multi_table_excel(df, markers, matrix=matrix, report=report),
+            'legacy': lambda: parse_single_table_excel(df, matrix=matrix, report=report),
+            'freeform': lambda: parse_flexible_excel(df, matrix=matrix, report=report),
+        }
+        mcqs = parsers[layout]()
+        if not mcqs:
+            for fallback in ('multi_table', 'legacy', 'freeform'):
+                if fallback == layout or (fallback == 'multi_table' and not markers):
+                    continue
+                _reset_validation_counts(report)
+                mcqs = parsers[fallback]()
+                if mcqs:
+                    # Classification missed; confidence is meaningless for the fallback
+                    layout, confidence = fallback, None
+                    break
+
+    if report is not None:
+        report.update(layout=layout, confidence=confidence,
+                      questions=len(mcqs))
+    return mcqs
+
+
+def _wide_columns(columns):
+    """Resolve wide-table columns from header names.
+
+    Returns ``(question_pos, [(letter, pos or None) for A-D], answer_pos)``
+    with positional column indexes, or None when the header does not fit.
+    """
     # Build column map
-    col_map = {str(c).strip().casefold(): c for c in df.columns}
+    col_map = {}
+    for pos, c in enumerate(columns):
+        col_map[str(c).strip().casefold()] = pos
 
     def find_col(*candidates):
         for cand in candidates:
@@ -1128,101 +2663,215 @@ def parse_wide_table_excel(df):
         return None
 
     q_col = None
-    for name in df.columns:
+    for pos, name in enumerate(columns):
         if 'question' in str(name).casefold():
-            q_col = name
+            q_col = pos
             break
     if q_col is None:
-        return []
+        return None
 
     a_col = find_col('A', 'Option A', 'Opt A', 'Choice A')
     b_col = find_col('B', 'Option B', 'Opt B', 'Choice B')
     c_col = find_col('C', 'Option C', 'Opt C', 'Choice C')
     d_col = find_col('D', 'Option D', 'Opt D', 'Choice D')
     ans_col = None
-    for name in df.columns:
+    for pos, name in enumerate(columns):
         low = str(name).casefold().strip()
         if 'answer' in low or 'correct' in low:
-            ans_col = name
+            ans_col = pos
             break
 
     if ans_col is None:
-        return []
+        return None
 
     option_cols = [('A', a_col), ('B', b_col), ('C', c_col), ('D', d_col)]
     # Need at least two options present
     if sum(1 for _, c in option_cols if c is not None) < 2:
+        return None
+    return q_col, option_cols, ans_col
+
+
+def parse_wide_table_excel(df, report=None):
+    """Parse a wide-table layout: one row per question with columns Question, A-D (or Option A-D), and Answer.
+
+    Supported variations:
+    - Column names like 'Question', 'A'/'Option A', 'B', 'C', 'D'
+    - 'Answer' column can be the letter (A/B/C/D) or the exact option text
+    - Case-insensitive, trims whitespace
+
+    Cells are normalized and answers resolved column-wise; only rows that pass
+    those checks are turned into dicts and validated in one batch.  ``report``
+    is passed on to ``validate_mcq_batch``.
+    """
+    resolved = _wide_columns(df.columns)
+    if resolved is None:
         return []
+    q_col, option_cols, ans_col = resolved
 
-    mcqs = []
-    for _, row in df.iterrows():
-        question = norm(row.get(q_col, ''))
-        if not question or question in {'nan', ''}:
+    def text_column(pos):
+        return _clean_text_column(df.iloc[:, pos])
+
+    question = text_column(q_col)
+    question_ok = (question != '') & (question != 'nan')
+
+    option_texts = {}
+    for letter, col in option_cols:
+        if col is None:
             continue
+        text = text_column(col)
+        option_texts[letter] = text.where(text.str.casefold() != 'nan', '')
+    present = {letter: text != '' for letter, text in option_texts.items()}
+    option_count = sum(mask.astype(int) for mask in present.values())
+
+    answer_text = text_column(ans_col)
+    answer_upper = answer_text.str.upper()
+    answer_folded = answer_text.str.casefold()
+    # Letter answers win over text answers; text matches go in A-D order
+    conditions = [present[letter] & (answer_upper == letter)
+                  for letter in option_texts]
+    conditions += [present[letter] & (answer_text != '') &
+                   (answer_folded == option_texts[letter].str.casefold())
+                   for letter in option_texts]
+    choices = list(option_texts) * 2
+    answer_letter = np.select(
+        [c.to_numpy(dtype=bool) for c in conditions], choices, default='')
+
+    keep = (question_ok & (option_count >= 2)).to_numpy(
+        dtype=bool) & (answer_letter != '')
+    rows = np.flatnonzero(keep)
+    if len(rows) == 0:
+        return []
+
+    # Only rows that survived the columnar filters reach Python
+    question_values = question.to_numpy(dtype=object)[rows]
+    option_values = [(letter, text.to_numpy(dtype=object)[rows])
+                     for letter, text in option_texts.items()]
+    answer_values = answer_letter[rows]
 
+    candidates = []
+    for pos in range(len(rows)):
         options = {}
-        for letter, col in option_cols:
-            if col is None:
-                continue
-            val = row.get(col)
-            text = norm(val) if not pd.isna(val) else ''
-            if text and text.casefold() != 'nan':
+        for letter, values in option_values:
+            text = values[pos]
+            if text:
                 options[letter] = text
+        candidates.append(
+            (question_values[pos], options, str(answer_values[pos])))
 
-        if len(options) < 2:
-            continue
+    # Use comprehensive validation
+    return validate_mcq_batch(candidates, report)
 
-        raw_answer = row.get(ans_col)
-        answer_text = norm(raw_answer) if raw_answer is not None and not pd.isna(
-            raw_answer) else ''
-        answer_letter = None
-        # Try letter first
-        if answer_text.upper() in options.keys():
-            answer_letter = answer_text.upper()
-        else:
-            # Try match by text
-            for letter, text in options.items():
-                if answer_text and answer_text.casefold() == text.casefold():
-                    answer_letter = letter
-                    break
 
-        if not answer_letter:
-            # Skip if we cannot identify a valid answer
-            continue
+def _clean_text_column(values):
+    """Stripped string view of a column, with missing cells as ''."""
+    text = values.astype(object).where(values.notna(), '')
+    return text.astype(str).str.strip()
 
-        # Use comprehensive validation
-        valid_options, valid_answer = validate_mcq_options(
-            question, options, answer_letter)
-        if valid_options and valid_answer:
-            mcqs.append({
-                "question": question,
-                "options": valid_options,
-                "answer": valid_answer
-            })
 
-    return mcqs
+CORRECT_MARKERS = {'correct', 'true', '✓', '✔'}
+
+
+class CellMatrix:
+    """Stripped, NaN-free string view of one sheet, built once per sheet.
+
+    ``cells`` is the full object matrix.  The row-state-machine parsers only
+    look at a handful of per-row facts, so those are precomputed column-wise
+    and handed out as row records by ``records()``:
+
+    - ``first`` / ``second``: the first two cells
+    - ``first_folded``: casefolded first cell
+    - ``option_letter``: 'A'-'D' when the first cell starts with one, else ''
+    - ``marker``: first answer marker in the third column onwards: an option
+      letter, '*' for a correctness word ('correct', 'true', ticks), else ''
+    - ``next_text``: first non-empty cell after the first one
+    - ``question_any``: some cell is a question label
+    - ``non_empty``: the row has any content
+    """
 
+    def __init__(self, df):
+        self.n_cols = df.shape[1]
+        columns = [_clean_text_column(df.iloc[:, j]) for j in range(self.n_cols)]
+        self.n_rows = len(df)
+        if not columns:
+            self.cells = np.empty((self.n_rows, 0), dtype=object)
+            self._views = [[] for _ in range(8)]
+            self.n_rows = 0
+            return
+        self.cells = np.column_stack(
+            [col.to_numpy(dtype=object) for col in columns])
+
+        folded = [col.str.casefold() for col in columns]
+        first = columns[0]
+        second = columns[1] if self.n_cols > 1 else pd.Series(
+            '', index=df.index, dtype=object)
+
+        non_empty = np.zeros(self.n_rows, dtype=bool)
+        question_any = np.zeros(self.n_rows, dtype=bool)
+        for col, col_folded in zip(columns, folded):
+            non_empty |= (col != '').to_numpy(dtype=bool)
+            question_any |= (col_folded.str.startswith('question') |
+                             col_folded.isin({'q', 'q:'})).to_numpy(dtype=bool)
+
+        lead = first.str[:1].str.upper()
+        option_letter = lead.where(lead.isin(OPTION_LETTERS), '')
+
+        # Walk right-to-left so the leftmost hit wins
+        marker = np.full(self.n_rows, '', dtype=object)
+        for col, col_folded in zip(reversed(columns[2:]), reversed(folded[2:])):
+            upper = col.str.upper()
+            marker = np.where(upper.isin(OPTION_LETTERS), upper.to_numpy(dtype=object),
+                              np.where(col_folded.isin(CORRECT_MARKERS), '*', marker))
+        next_text = np.full(self.n_rows, '', dtype=object)
+        for col in reversed(columns[1:]):
+            usable = ((col != '') & (col != 'nan')).to_numpy(dtype=bool)
+            next_text = np.where(usable, col.to_numpy(dtype=object), next_text)
+
+        self._views = [
+            first.tolist(),
+            second.tolist(),
+            folded[0].tolist(),
+            option_letter.tolist(),
+            marker.tolist(),
+            next_text.tolist(),
+            question_any.tolist(),
+            non_empty.tolist(),
+        ]
+
+    def records(self, start=0, stop=None):
+        """Yield per-row tuples (first, second, first_folded, option_letter,
+        marker, next_text, question_any, non_empty) for rows [start, stop)."""
+        return islice(zip(*self._views), start, stop)
+
+
+def build_cell_matrix(df):
+    """Normalize a sheet into a ``CellMatrix`` (see its docstring)."""
+    return CellMatrix(df)
 
-def parse_multi_table_excel(df, table_names):
-    """Parse Excel file with multiple tables"""
+
+def parse_multi_table_excel(df, table_names, matrix=None, report=None):
+    """Parse Excel file with multiple tables
+
+    ``table_names`` holds ``(row_position, name)`` pairs as returned by
+    ``find_table_markers``.
+    """
+    if matrix is None:
+        matrix = build_cell_matrix(df)
     mcqs = []
 
     for table_idx, (start_row, table_name) in enumerate(table_names):
-        end_row = len(df)
+        end_row = matrix.n_rows
         if table_idx + 1 < len(table_names):
             end_row = table_names[table_idx + 1][0]
 
-        # Extract table data
-        table_data = df.iloc[start_row:end_row]
-
         # Parse this table
-        table_mcqs = parse_single_table_excel(table_data, table_name)
+        table_mcqs = _parse_single_table_records(
+            matrix.records(start_row, end_row), report)
         mcqs.extend(table_mcqs)
 
     return mcqs
 
 
-def parse_single_table_excel(df, table_name="Single Table"):
+def parse_single_table_excel(df, table_name="Single Table", matrix=None, report=None):
     """Parse a single table section of the Excel file (legacy layout).
 
     Recognizes rows like:
@@ -1230,189 +2879,112 @@ def parse_single_table_excel(df, table_name="Single Table"):
     - Option rows where first cell is A/B/C/D (case-insensitive), possibly with punctuation (e.g., 'A.', 'B)')
     - Correct answer indicated either by a separate marker column equal to the option letter, or by any cell containing the exact option letter
     """
-    mcqs = []
+    if matrix is None:
+        matrix = build_cell_matrix(df)
+    if matrix.n_cols < 2:
+        return []
+    return _parse_single_table_records(matrix.records(), report)
+
+
+def _parse_single_table_records(records, report=None):
+    """Legacy row-state machine over ``CellMatrix.records()`` tuples."""
+    candidates = []
 
     # Process the table based on the actual structure
     current_question = None
     current_choices = {}
     current_answer = None
 
-    for i, row in df.iterrows():
-        row_values = [str(val).strip() if not pd.isna(val)
-                      else '' for val in row.values]
-
+    for first, second, first_folded, opt_letter, marker, next_text, _, _ in records:
         # Skip empty rows and table headers
-        if not any(row_values) or row_values[0] in ['', 'nan']:
+        if first in ('', 'nan'):
             continue
 
         # Check if this row starts a new question
-        first_token = row_values[0]
-        first_token_norm = str(first_token).strip().casefold()
-        if (first_token_norm.startswith('question') or first_token_norm in {'ques', 'q', 'q:'}) and len(row_values) > 1:
+        if first_folded.startswith('question') or first_folded in {'ques', 'q', 'q:'}:
             # Save previous question if exists
             if current_question and current_choices and current_answer:
-                # Use comprehensive validation
-                valid_options, valid_answer = validate_mcq_options(
-                    current_question, current_choices, current_answer)
-                if valid_options and valid_answer:
-                    mcqs.append({
-                        "question": current_question,
-                        "options": valid_options,
-                        "answer": valid_answer
-                    })
+                candidates.append(
+                    (current_question, current_choices, current_answer))
 
             # Start new question
             # Use the next non-empty cell as question text
-            q_text = ''
-            for cell in row_values[1:]:
-                if cell and cell != 'nan':
-                    q_text = cell
-                    break
-            current_question = q_text
+            current_question = next_text
             current_choices = {}
             current_answer = None
 
         # Check if this row is a choice (A, B, C, D)
-        else:
-            opt_token = row_values[0]
-            opt_token_str = str(opt_token).strip()
-            opt_letter = opt_token_str[:1].upper() if opt_token_str else ''
-            is_option_row = opt_letter in ['A', 'B', 'C', 'D']
-            if is_option_row and len(row_values) > 1:
-                choice_letter = opt_letter
-                # Prefer second cell as text; fallback to remainder of first cell after label
-                choice_text = row_values[1] if row_values[1] else opt_token_str[1:].lstrip(
-                    ' .:)\t-')
-                if choice_text and choice_text != 'nan':
-                    current_choices[choice_letter] = choice_text
-
-                    # Detect correctness markers: any cell contains a valid answer letter, or explicit 'correct'
-                    correctness_detected = False
-                    for cell in row_values[2:]:
-                        cell_str = str(cell).strip()
-                        if not cell_str or cell_str == 'nan':
-                            continue
-                        # Check if cell contains a valid answer letter (A, B, C, D)
-                        if cell_str.upper() in ['A', 'B', 'C', 'D']:
-                            current_answer = cell_str.upper()
-                            correctness_detected = True
-                            break
-                        if cell_str.casefold() in {'correct', 'true', '✓', '✔'}:
-                            correctness_detected = True
-                            break
-                    if correctness_detected and not current_answer:
-                        current_answer = choice_letter
+        elif opt_letter:
+            # Prefer second cell as text; fallback to remainder of first cell after label
+            choice_text = second if second else first[1:].lstrip(' .:)\t-')
+            if choice_text and choice_text != 'nan':
+                current_choices[opt_letter] = choice_text
+
+                # Detect correctness markers: any cell contains a valid answer letter, or explicit 'correct'
+                if marker == '*':
+                    if not current_answer:
+                        current_answer = opt_letter
+                elif marker:
+                    current_answer = marker
 
     # Add the last question
     if current_question and current_choices and current_answer:
-        # Use comprehensive validation
-        valid_options, valid_answer = validate_mcq_options(
-            current_question, current_choices, current_answer)
-        if valid_options and valid_answer:
-            mcqs.append({
-                "question": current_question,
-                "options": valid_options,
-                "answer": valid_answer
-            })
+        candidates.append((current_question, current_choices, current_answer))
 
-    return mcqs
+    # Use comprehensive validation
+    return validate_mcq_batch(candidates, report)
 
 
-def parse_flexible_excel(df):
+def parse_flexible_excel(df, matrix=None, report=None):
     """Very flexible parser that scans for 'Question' rows and subsequent A-D options,
     with multiple possible answer markers, across loosely structured sheets."""
-    mcqs = []
+    if matrix is None:
+        matrix = build_cell_matrix(df)
+    return _parse_flexible_records(matrix.records(), matrix.n_cols, report)
+
+
+def _parse_flexible_records(records, n_cols, report=None):
+    """Free-form row-state machine over ``CellMatrix.records()`` tuples."""
+    candidates = []
     current_question = None
     current_choices = {}
     current_answer = None
 
-    def is_question_row(values):
-        for val in values:
-            s = str(val).strip().casefold()
-            if s.startswith('question') or s in {'q', 'q:'}:
-                return True
-        return False
-
-    def extract_question_text(values):
-        """Extract question text from a row, preferring the second cell if available."""
-        if len(values) < 2:
-            return ''
-
-        # If the first cell is 'Question', 'Q', etc., take the second cell
-        first_cell = str(values[0]).strip().casefold()
-        if first_cell.startswith('question') or first_cell in {'q', 'q:'}:
-            return str(values[1]).strip() if len(values) > 1 else ''
-
-        # Otherwise, take the first non-empty cell after the first one
-        for i in range(1, len(values)):
-            cell_text = str(values[i]).strip()
-            if cell_text and cell_text != 'nan':
-                return cell_text
-
-        return ''
-
-    def option_letter(token):
-        if not token:
-            return None
-        s = str(token).strip()
-        if not s:
-            return None
-        letter = s[0].upper()
-        return letter if letter in ['A', 'B', 'C', 'D'] else None
-
-    for _, row in df.iterrows():
-        values = [str(val).strip() if not pd.isna(val)
-                  else '' for val in row.values]
-        if not any(values):
+    for first, second, first_folded, let, marker, next_text, question_any, non_empty in records:
+        if not non_empty:
             continue
 
-        if is_question_row(values):
+        if question_any:
             if current_question and current_choices and current_answer:
-                # Use comprehensive validation
-                valid_options, valid_answer = validate_mcq_options(
-                    current_question, current_choices, current_answer)
-                if valid_options and valid_answer:
-                    mcqs.append({
-                        "question": current_question,
-                        "options": valid_options,
-                        "answer": valid_answer
-                    })
-            current_question = extract_question_text(
-                values) or values[1] if len(values) > 1 else ''
+                candidates.append(
+                    (current_question, current_choices, current_answer))
+            # A labelled first cell means the text is in the second cell;
+            # otherwise take the first non-empty cell after the first one
+            if n_cols < 2:
+                current_question = ''
+            elif first_folded.startswith('question') or first_folded in {'q', 'q:'}:
+                current_question = second
+            else:
+                current_question = next_text or second
             current_choices = {}
             current_answer = None
             continue
 
-        let = option_letter(values[0])
         if let:
             # Option text from next non-empty cell or tail of first
-            text = ''
-            for cell in values[1:]:
-                if cell and cell != 'nan':
-                    text = cell
-                    break
-            if not text:
-                tail = str(values[0])[1:].lstrip(' .:)\t-')
-                text = tail
+            text = next_text or first[1:].lstrip(' .:)\t-')
             if text:
                 current_choices[let] = text
                 # correctness markers in remaining cells
-                for cell in values[2:]:
-                    s = str(cell).strip()
-                    if not s or s == 'nan':
-                        continue
-                    # Check if cell contains a valid answer letter (A, B, C, D)
-                    if s.upper() in ['A', 'B', 'C', 'D']:
-                        current_answer = s.upper()
-                        break
-                    if s.casefold() in {'correct', 'true', '✓', '✔'}:
-                        current_answer = let
-                        break
+                if marker == '*':
+                    current_answer = let
+                elif marker:
+                    current_answer = marker
             continue
 
         # Row like ['Answer', 'B']
-        if values[0].casefold().startswith('answer') and len(values) > 1:
-            ans = str(values[1]).strip()
+        if first_folded.startswith('answer') and n_cols > 1:
+            ans = second
             if ans.upper() in current_choices.keys():
                 current_answer = ans.upper()
             else:
@@ -1423,17 +2995,678 @@ def parse_flexible_excel(df):
                         break
 
     if current_question and current_choices and current_answer:
-        # Use comprehensive validation
-        valid_options, valid_answer = validate_mcq_options(
-            current_question, current_choices, current_answer)
-        if valid_options and valid_answer:
-            mcqs.append({
-                "question": current_question,
-                "options": valid_options,
-                "answer": valid_answer
-            })
+        candidates.append((current_question, current_choices, current_answer))
 
-    return mcqs
+    # Use comprehensive validation
+    return validate_mcq_batch(candidates, report)
+
+
+# Workbooks at least this large are parsed with the streaming reader
+STREAMING_THRESHOLD_BYTES = int(
+    float(os.environ.get('MCQ_STREAMING_THRESHOLD_MB', '25')) * 1024 * 1024)
+
+
+def _stream_cell(value):
+    return '' if value is None else str(value).strip()
+
+
+def _row_record(values, n_cols):
+    """The ``CellMatrix.records()`` tuple for one stripped row, computed on the fly."""
+    first = values[0] if values else ''
+    second = values[1] if n_cols > 1 and len(values) > 1 else ''
+    lead = first[:1].upper()
+    marker = ''
+    for cell in values[2:]:
+        upper = cell.upper()
+        if upper in OPTION_LETTERS:
+            marker = upper
+            break
+        if cell.casefold() in CORRECT_MARKERS:
+            marker = '*'
+            break
+    next_text = ''
+    for cell in values[1:]:
+        if cell and cell != 'nan':
+            next_text = cell
+            break
+    question_any = False
+    for cell in values:
+        folded = cell.casefold()
+        if folded.startswith('question') or folded in {'q', 'q:'}:
+            question_any = True
+            break
+    return (first, second, first.casefold(), lead if lead in OPTION_LETTERS else '',
+            marker, next_text, question_any, any(values))
+
+
+def _split_tables(records):
+    """Yield (table_number, records) groups, starting a new group at each 'TableN' row."""
+    table = 0
+
+    def numbered():
+        nonlocal table
+        for record in records:
+            if TABLE_MARKER_RE.match(record[0]):
+                table += 1
+            yield table, record
+
+    for number, group in groupby(numbered(), key=itemgetter(0)):
+        yield number, (record for _, record in group)
+
+
+def _parse_wide_rows(columns, rows, report=None):
+    """Row-at-a-time twin of ``parse_wide_table_excel`` for streamed rows."""
+    resolved = _wide_columns(columns)
+    if resolved is None:
+        return []
+    q_col, option_cols, ans_col = resolved
+
+    candidates = []
+    for row in rows:
+        width = len(row)
+        question = row[q_col] if q_col < width else ''
+        if not question or question == 'nan':
+            continue
+
+        options = {}
+        for letter, col in option_cols:
+            if col is None or col >= width:
+                continue
+            text = row[col]
+            if text and text.casefold() != 'nan':
+                options[letter] = text
+        if len(options) < 2:
+            continue
+
+        answer_text = row[ans_col] if ans_col < width else ''
+        answer_letter = None
+        # Try letter first
+        if answer_text.upper() in options:
+            answer_letter = answer_text.upper()
+        else:
+            # Try match by text
+            for letter, text in options.items():
+                if answer_text and answer_text.casefold() == text.casefold():
+                    answer_letter = letter
+                    break
+        if answer_letter:
+            candidates.append((question, options, answer_letter))
+
+    # Use comprehensive validation
+    return validate_mcq_batch(candidates, report)
+
+
+def _parse_sheet_stream(sheet_name, open_rows, sample_rows=LAYOUT_SAMPLE_ROWS, width=0):
+    """Parse one sheet from a stream of raw row tuples in bounded memory.
+
+    ``open_rows()`` returns a fresh iterator over the sheet's rows.  The first
+    non-blank row is the header (as with ``pd.read_excel``) and only the next
+    ``sample_rows`` rows are buffered for layout detection; the rest flow
+    straight into the row-state machines.  Rows are padded to ``width``
+    (the sheet's recorded column count, if any) or to the widest of the
+    header and sample rows, whichever is larger: readers yield ragged rows
+    for sheets without a dimension record.  The rows are re-read only when
+    the chosen parser finds nothing and the fallbacks of
+    ``parse_excel_to_mcqs`` run.
+
+    Unlike the DataFrame path, empty columns are not dropped and only table
+    markers inside the sample can mark a sheet as multi-table.  Time spent
+    waiting on the reader is reported as ``read_seconds``, the rest as
+    ``parse_seconds``.
+    """
+    report = {'sheet': sheet_name}
+    started = time.perf_counter()
+    read_seconds = 0.0
+    n_cols = 0
+
+    def pad(row):
+        return row if len(row) >= n_cols else row + [''] * (n_cols - len(row))
+
+    def timed(raw_rows):
+        nonlocal read_seconds
+        raw_rows = iter(raw_rows)
+        while True:
+            start = time.perf_counter()
+            row = next(raw_rows, None)
+            read_seconds += time.perf_counter() - start
+            if row is None:
+                return
+            yield row
+
+    def counted(rows):
+        for row in rows:
+            report['rows'] += 1
+            yield row
+
+    def body():
+        report['rows'] = 0
+        rows = (list(map(_stream_cell, row)) for row in timed(open_rows()))
+        rows = (pad(row) for row in rows if any(row))
+        header = next(rows, None)
+        return header, counted(rows)
+
+    def finish(mcqs, **fields):
+        report.update(fields, questions=len(mcqs), read_seconds=read_seconds,
+                      parse_seconds=time.perf_counter() - started - read_seconds)
+        return mcqs, report
+
+    header, rows = body()
+    if header is None:
+        return finish([], layout='freeform', confidence=0.0)
+    sample = list(islice(rows, sample_rows))
+    n_cols = max(width, len(header), *(len(row) for row in sample))
+    sample = [pad(row) for row in sample]
+    columns = [cell or f'Unnamed: {pos}' for pos, cell in enumerate(pad(header))]
+    sample_markers = [(pos, row[0]) for pos, row in enumerate(sample)
+                      if TABLE_MARKER_RE.match(row[0])]
+    layout, confidence, _ = classify_layout_sample(columns, sample, sample_markers)
+    rows = chain(sample, rows)
+
+    def records(rows):
+        return (_row_record(row, n_cols) for row in rows)
+
+    mcqs = []
+    if layout == 'wide':
+        mcqs = _parse_wide_rows(columns, rows, report)
+        if not mcqs:
+            # Header looked wide but the rows did not; classify the body instead
+            _reset_validation_counts(report)
+            layout, confidence, _ = classify_layout_sample(
+                columns, sample, sample_markers, allow_wide=False)
+            _, rows = body()
+
+    def parse_tables(rows, multi_table):
+        mcqs = []
+        if n_cols > 1:
+            for number, table in _split_tables(records(rows)):
+                # Rows before the first marker are not part of any table
+                if number == 0 and multi_table:
+                    continue
+                mcqs.extend(_parse_single_table_records(table, report))
+        return mcqs
+
+    parsers = {
+        'multi_table': lambda rows: parse_tables(rows, True),
+        'legacy': lambda rows: parse_tables(rows, False),
+        'freeform': lambda rows: _parse_flexible_records(records(rows), n_cols, report),
+    }
+    if layout != 'wide':
+        mcqs = parsers[layout](rows)
+        if not mcqs:
+            for fallback in ('multi_table', 'legacy', 'freeform'):
+                if fallback == layout or (fallback == 'multi_table' and not sample_markers):
+                    continue
+                _reset_validation_counts(report)
+                _, rows = body()
+                mcqs = parsers[fallback](rows)
+                if mcqs:
+                    # Classification missed; confidence is meaningless for the fallback
+                    layout, confidence = fallback, None
+                    break
+
+    return finish(mcqs, layout=layout, confidence=confidence)
+
+
+def _parse_workbook_stream(source, sheet_names=None):
+    """Parse a workbook by streaming rows from openpyxl in read-only mode.
+
+    Returns (mcqs, sheet_reports) like ``_parse_workbook_bytes``; at most one
+    row plus the layout sample is held per sheet besides the parsed MCQs.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        all_mcqs = []
+        sheet_reports = []
+        for sheet_name in (sheet_names or workbook.sheetnames):
+            worksheet = workbook[sheet_name]
+            mcqs, sheet_report = _parse_sheet_stream(
+                sheet_name, lambda ws=worksheet: ws.iter_rows(values_only=True),
+                width=worksheet.max_column or 0)
+            all_mcqs.extend(mcqs)
+            sheet_reports.append(sheet_report)
+        return all_mcqs, sheet_reports
+    finally:
+        workbook.close()
+
+
+class ReaderBackend:
+    """One way of reading workbook sheets and feeding them to the parsers."""
+
+    name = 'base'
+    extensions = frozenset()
+    # Only used when the workbook is too big to load into DataFrames
+    streaming = False
+
+    def available(self):
+        return True
+
+    def sheet_names(self, source):
+        raise NotImplementedError
+
+    def parse(self, source, sheet_names=None):
+        """Return (mcqs, sheet_reports) for ``sheet_names`` (all sheets by default)."""
+        raise NotImplementedError
+
+
+class PandasReader(ReaderBackend):
+    """``pd.read_excel`` with a fixed engine, parsed through the DataFrame parsers."""
+
+    def __init__(self, name, engine, extensions, requires):
+        self.name = name
+        self.engine = engine
+        self.extensions = frozenset(extensions)
+        self.requires = requires
+
+    def available(self):
+        try:
+            return all(importlib.util.find_spec(module) is not None
+                       for module in self.requires)
+        except ImportError:
+            return False
+
+    def sheet_names(self, source):
+        with pd.ExcelFile(source, engine=self.engine) as workbook:
+            return list(workbook.sheet_names)
+
+    def parse(self, source, sheet_names=None):
+        all_mcqs = []
+        sheet_reports = []
+        start = time.perf_counter()
+        # The first sheet's read time includes opening the workbook
+        with pd.ExcelFile(source, engine=self.engine) as workbook:
+            for sheet_name in (sheet_names or workbook.sheet_names):
+                df = workbook.parse(sheet_name)
+                read_seconds = time.perf_counter() - start
+                mcqs, sheet_report = _parse_sheet_frame(sheet_name, df)
+                sheet_report['read_seconds'] = read_seconds
+                all_mcqs.extend(mcqs)
+                sheet_reports.append(sheet_report)
+                start = time.perf_counter()
+        return all_mcqs, sheet_reports
+
+
+class StreamingReader(ReaderBackend):
+    """openpyxl read-only mode streamed straight into the row parsers."""
+
+    name = 'openpyxl-readonly'
+    extensions = frozenset({'xlsx', 'xlsm'})
+    streaming = True
+
+    def available(self):
+        return importlib.util.find_spec('openpyxl') is not None
+
+    def sheet_names(self, source):
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(source, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+
+    def parse(self, source, sheet_names=None):
+        return _parse_workbook_stream(source, sheet_names)
+
+
+# Listed in the order used when no benchmark timings are available
+READER_BACKENDS = [
+    PandasReader('calamine', 'calamine', ('xlsx', 'xlsm', 'xlsb', 'xls'),
+                 ('python_calamine', 'pandas.io.excel._calamine')),
+    PandasReader('openpyxl', 'openpyxl', ('xlsx', 'xlsm'), ('openpyxl',)),
+    StreamingReader(),
+    PandasReader('xlrd', 'xlrd', ('xls',), ('xlrd',)),
+]
+
+# Written by benchmarks/bench_readers.py: {"timings": {ext: {backend: seconds}}};
+# a measured file is committed with the repository
+READER_BENCHMARK_FILE = os.environ.get(
+    'MCQ_READER_BENCHMARKS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'reader_results.json'))
+
+_reader_timings = None
+
+
+def _load_reader_timings():
+    global _reader_timings
+    if _reader_timings is None:
+        try:
+            with open(READER_BENCHMARK_FILE, encoding='utf-8') as fh:
+                _reader_timings = json.load(fh).get('timings', {})
+        except (OSError, ValueError) as e:
+            INGEST_LOGGER.warning("reader benchmark results not loaded from %s (%s); "
+                                  "using the default reader order", READER_BENCHMARK_FILE, e)
+            _reader_timings = {}
+    return _reader_timings
+
+
+def workbook_extension(name, data):
+    """File type of a workbook from its name, or sniffed from its first bytes."""
+    extension = os.path.splitext(name or '')[1].lstrip('.').casefold()
+    if extension == 'mcqb' or any(extension in backend.extensions for backend in READER_BACKENDS):
+        return extension
+    head = data[:8] if data else b''
+    if head[:4] == BANK_MAGIC:
+        return 'mcqb'
+    if head[:4] == b'PK\x03\x04':
+        return 'xlsx'
+    if head[:4] == b'\xd0\xcf\x11\xe0':
+        return 'xls'
+    return extension or 'xlsx'
+
+
+def reader_candidates(extension, size=0):
+    """Installed backends that can read ``extension``, best first.
+
+    Backends are ranked by their benchmark timing for the file type (if the
+    benchmark has been run) and otherwise by ``READER_BACKENDS`` order.
+    Workbooks of at least ``STREAMING_THRESHOLD_BYTES`` prefer streaming
+    backends, since bounded memory matters more than speed there; smaller
+    ones only fall back to them.
+    """
+    timings = _load_reader_timings().get(extension, {})
+    order = {backend.name: pos for pos, backend in enumerate(READER_BACKENDS)}
+    big = size >= STREAMING_THRESHOLD_BYTES
+    candidates = [backend for backend in READER_BACKENDS
+                  if extension in backend.extensions and backend.available()]
+    candidates.sort(key=lambda backend: (
+        backend.streaming != big,
+        timings.get(backend.name, float('inf')),
+        order[backend.name]))
+    return candidates
+
+
+def _reader_source(source):
+    """Fresh readable source per attempt: bytes get their own buffer."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _source_size(source):
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    return os.path.getsize(source)
+
+
+def read_workbook(source, extension, sheet_names=None):
+    """Parse a workbook (bytes or path) with the best available backend.
+
+    If a backend fails, the next candidate is tried; the last error is
+    raised when none succeeds.  Each sheet report records the backend in
+    ``'reader'``.
+    """
+    error = None
+    for backend in reader_candidates(extension, _source_size(source)):
+        try:
+            mcqs, sheet_reports = backend.parse(_reader_source(source), sheet_names)
+        except Exception as e:
+            error = e
+            continue
+        for sheet_report in sheet_reports:
+            sheet_report['reader'] = backend.name
+        return mcqs, sheet_reports
+    raise error or ValueError(f"No installed reader can open .{extension} files")
+
+
+def workbook_sheet_names(source, extension):
+    """Sheet names of a workbook, using the same backend ranking as ``read_workbook``."""
+    error = None
+    for backend in reader_candidates(extension, _source_size(source)):
+        try:
+            return backend.sheet_names(_reader_source(source))
+        except Exception as e:
+            error = e
+    raise error or ValueError(f"No installed reader can open .{extension} files")
+
+
+# Compiled question banks (.mcqb)
+#
+# A parsed pool saved in a flat little-endian layout that is served
+# straight out of a memory map: loading skips Excel entirely, questions are
+# decoded from the map as they are read, and several server processes share
+# one copy of the file through the page cache:
+#
+#   header      magic 'MCQB', version, reserved, question count, string
+#               count, provenance length, string data length  (32 bytes)
+#   provenance  UTF-8 JSON, padded to 8 bytes
+#   offsets     uint64[strings + 1], byte offsets into the string data
+#   records     uint32[questions * 6]: question, option A-D string ids
+#               (BANK_NO_STRING when absent) and the answer's index
+#   strings     UTF-8 string data; identical texts are stored once
+BANK_MAGIC = b'MCQB'
+BANK_VERSION = 1
+BANK_NO_STRING = NO_OPTION
+_BANK_HEADER = struct.Struct('<4sHHIIQQ')
+_BANK_RECORD_WIDTH = 1 + len(OPTION_LETTERS) + 1
+
+# Directory of server-side .mcqb files offered on the home page
+MCQ_BANK_DIR = os.environ.get('MCQ_BANK_DIR')
+
+
+def _pad8(n):
+    return -n % 8
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def dump_mcq_bank(mcqs, provenance=None):
+    """Serialize MCQs (and a JSON-able provenance dict) to ``.mcqb`` bytes."""
+    string_ids = {}
+    records = array('I')
+
+    def intern(text):
+        text = str(text)
+        string_id = string_ids.get(text)
+        if string_id is None:
+            string_id = string_ids[text] = len(string_ids)
+        return string_id
+
+    for mcq in mcqs:
+        options = mcq['options']
+        records.append(intern(mcq['question']))
+        records.extend(intern(options[letter]) if letter in options else BANK_NO_STRING
+                       for letter in OPTION_LETTERS)
+        records.append(OPTION_LETTERS.index(mcq['answer']))
+
+    encoded = [text.encode('utf-8') for text in string_ids]
+    offsets = array('Q', [0])
+    position = 0
+    for blob in encoded:
+        position += len(blob)
+        offsets.append(position)
+    meta = json.dumps(provenance or {}, ensure_ascii=False).encode('utf-8')
+
+    out = io.BytesIO()
+    out.write(_BANK_HEADER.pack(BANK_MAGIC, BANK_VERSION, 0, len(records) // _BANK_RECORD_WIDTH,
+                                len(encoded), len(meta), position))
+    out.write(meta + b'\0' * _pad8(len(meta)))
+    out.write(_little_endian(offsets).tobytes())
+    out.write(_little_endian(records).tobytes())
+    out.write(b'\0' * _pad8(len(records) * records.itemsize))
+    out.write(b''.join(encoded))
+    return out.getvalue()
+
+
+class CompiledBank(QuestionBank):
+    """A ``QuestionBank`` read from a ``.mcqb`` buffer (bytes or a memory map).
+
+    Nothing is decoded up front: each question's texts are decoded from the
+    buffer when it is read, so a memory-mapped bank keeps no copy of its
+    texts on the heap.  The layout, string table and records are checked on
+    construction, so a corrupt or hand-made bank is rejected with a
+    ``ValueError`` instead of failing later on the quiz pages.
+    """
+
+    __slots__ = ('provenance', '_count', '_n_strings', '_buffer', '_offsets', '_records',
+                 '_strings')
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if len(view) < _BANK_HEADER.size:
+            raise ValueError("Not a compiled MCQ bank (file too short)")
+        magic, version, _, count, n_strings, meta_len, data_len = _BANK_HEADER.unpack_from(view)
+        if magic != BANK_MAGIC:
+            raise ValueError("Not a compiled MCQ bank")
+        if version != BANK_VERSION:
+            raise ValueError(f"Unsupported MCQ bank version {version}")
+
+        position = _BANK_HEADER.size
+        meta_end = position + meta_len
+        offsets_start = meta_end + _pad8(meta_len)
+        records_start = offsets_start + 8 * (n_strings + 1)
+        records_bytes = 4 * _BANK_RECORD_WIDTH * count
+        strings_start = records_start + records_bytes + _pad8(records_bytes)
+        if strings_start + data_len > len(view):
+            raise ValueError("Compiled MCQ bank is truncated")
+
+        try:
+            self.provenance = json.loads(bytes(view[position:meta_end]) or b'{}')
+        except ValueError:
+            self.provenance = None
+        if not isinstance(self.provenance, dict):
+            raise ValueError("Compiled MCQ bank has corrupt provenance")
+        self._count = count
+        self._n_strings = n_strings
+        # Keeps a memory map open for as long as the bank is referenced
+        self._buffer = buffer
+        self._offsets = self._numbers(view[offsets_start:records_start], 'Q')
+        self._records = self._numbers(view[records_start:records_start + records_bytes], 'I')
+        self._strings = view[strings_start:strings_start + data_len]
+        self.nbytes = len(view)
+        self._validate()
+
+    @staticmethod
+    def _numbers(view, code):
+        if sys.byteorder == 'little':
+            return view.cast(code)
+        values = array(code)
+        values.frombytes(view)
+        values.byteswap()
+        return values
+
+    def _validate(self):
+        """Reject string offsets, texts and records that do not fit the bank."""
+        offsets = np.frombuffer(self._offsets, dtype=np.uint64)
+        if (offsets[0] != 0 or offsets[-1] != len(self._strings)
+                or np.any(offsets[1:] < offsets[:-1])):
+            raise ValueError("Compiled MCQ bank has a corrupt string table")
+        strings = np.frombuffer(self._strings, dtype=np.uint8)
+        starts = offsets[:-1][offsets[:-1] < len(strings)].astype(np.intp)
+        # Every text must start on a character, and the data must be UTF-8;
+        # decoded in chunks so a large bank is never copied whole
+        valid = not np.any((strings[starts] & 0xC0) == 0x80)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for chunk in range(0, len(strings), 1 << 20):
+                decoder.decode(self._strings[chunk:chunk + (1 << 20)])
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            valid = False
+        if not valid:
+            raise ValueError("Compiled MCQ bank has text that is not valid UTF-8")
+
+        table = np.frombuffer(self._records, dtype=np.uint32).reshape(-1, _BANK_RECORD_WIDTH)
+        ids = table[:, :-1]
+        answers = table[:, -1]
+        bad = (table[:, 0] >= self._n_strings)
+        bad |= np.any((ids[:, 1:] >= self._n_strings) & (ids[:, 1:] != BANK_NO_STRING), axis=1)
+        bad |= answers >= len(OPTION_LETTERS)
+        rows = np.flatnonzero(~bad)
+        bad[rows[ids[rows, 1 + answers[rows]] == BANK_NO_STRING]] = True
+        if bad.any():
+            raise ValueError(f"Compiled MCQ bank is corrupt: question {np.flatnonzero(bad)[0] + 1} "
+                             "refers to a missing text or answer option")
+
+    def __len__(self):
+        return self._count
+
+    def _text(self, string_id):
+        offsets = self._offsets
+        return str(self._strings[offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+
+    def question(self, idx):
+        return self._text(self._records[idx * _BANK_RECORD_WIDTH])
+
+    def option_texts(self, idx):
+        base = idx * _BANK_RECORD_WIDTH + 1
+        text = self._text
+        return {letter: text(string_id)
+                for letter, string_id in zip(OPTION_LETTERS,
+                                             self._records[base:base + len(OPTION_LETTERS)])
+                if string_id != BANK_NO_STRING}
+
+    def answer(self, idx):
+        return OPTION_LETTERS[self._records[(idx + 1) * _BANK_RECORD_WIDTH - 1]]
+
+
+def bank_provenance(per_file, duplicates=None):
+    """Provenance for ``dump_mcq_bank`` from ``(name, count, report)`` tuples.
+
+    Without duplicate removal, source ``i``'s questions are the ``count``
+    questions starting at ``start``; ``duplicates`` records the removal.
+    """
+    sources = []
+    start = 0
+    for name, count, report in per_file:
+        sources.append({'name': name, 'cache_key': report.get('cache_key'),
+                        'start': start, 'count': count,
+                        'sheets': report.get('sheets', [])})
+        start += count
+    provenance = {'parser_version': PARSER_VERSION, 'sources': sources}
+    if duplicates:
+        provenance['duplicates_removed'] = duplicates
+    return provenance
+
+
+def _bank_sheet_reports(provenance):
+    """Sheet reports of the workbooks a bank was compiled from."""
+    reports = []
+    for source in provenance.get('sources', []):
+        for sheet in source.get('sheets', []):
+            report = dict(sheet)
+            report['sheet'] = f"{source.get('name')} / {sheet.get('sheet')}"
+            report['reader'] = 'mcqb'
+            # Timings of the original import do not apply to the bank
+            report.pop('read_seconds', None)
+            report.pop('parse_seconds', None)
+            reports.append(report)
+    return reports
+
+
+def load_mcq_bank(source):
+    """Load a ``.mcqb`` bank from bytes or a path; returns (CompiledBank, sheet_reports).
+
+    Paths are memory-mapped rather than read: the bank is served from the
+    map, so every process that loads the same file shares its pages.  Bank
+    files must be replaced (written aside and renamed), never rewritten in
+    place, while a server has them loaded.  Raises ``ValueError`` for a
+    file that is not a valid bank.
+    """
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        with open(source, 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                raise ValueError("Not a compiled MCQ bank (file too short)")
+            source = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    bank = CompiledBank(source)
+    return bank, _bank_sheet_reports(bank.provenance)
+
+
+def bank_path_cache_key(path):
+    """Cache key for a server-side bank: path plus size and modification time."""
+    stat = os.stat(path)
+    return f"bank:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def list_server_banks():
+    """``.mcqb`` files in ``MCQ_BANK_DIR``, sorted by name."""
+    if not MCQ_BANK_DIR or not os.path.isdir(MCQ_BANK_DIR):
+        return []
+    return sorted(os.path.join(MCQ_BANK_DIR, name) for name in os.listdir(MCQ_BANK_DIR)
+                  if name.casefold().endswith('.mcqb'))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+"""Convert a tree of MCQ workbooks to JSON Lines and compiled banks.
+
+The headless counterpart of the home page's uploader, for preprocessing a
+drop of workbooks without a Streamlit server.  Every ``.xlsx``, ``.xls``,
+``.xlsm`` and ``.xlsb`` file under the given sources is parsed with
+``extract_mcqs_from_excel`` (same readers, layout detection and validation
+as the app) in a pool of worker processes, and written next to its
+relative path under ``--output``:
+
+* ``<name>.jsonl``: one ``{"question", "options", "answer"}`` object per line
+* ``<name>.mcqb``: a compiled bank, loadable by the app or ``MCQ_BANK_DIR``
+
+``<name>`` is the workbook's name without its extension, unless another
+workbook would get the same outputs (``foo.xls`` next to ``foo.xlsx``):
+those keep it, as in ``foo.xls.jsonl`` and ``foo.xlsx.jsonl``.
+
+Each file's question count, throughput and validation rejections are
+printed as it completes, followed by totals.  ``--report`` saves every
+file's import report as JSON.  The exit status is 1 when a file failed.
+
+Usage:
+    python quiz_cli.py SOURCE [SOURCE ...] --output DIR [--workers N]
+                       [--format jsonl mcqb] [--report PATH]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import quiz
+
+WORKBOOK_EXTENSIONS = ('xlsx', 'xls', 'xlsm', 'xlsb')
+FORMATS = ('jsonl', 'mcqb')
+
+
+def find_workbooks(sources):
+    """(path, name) of every workbook under ``sources``.
+
+    ``name`` is the path relative to the source directory it was found in
+    (just the file name for files given directly).  Excel's ``~$`` lock
+    files are skipped.
+    """
+    for source in sources:
+        if os.path.isfile(source):
+            yield source, os.path.basename(source)
+            continue
+        if not os.path.isdir(source):
+            raise SystemExit(f"no such file or directory: {source}")
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                extension = os.path.splitext(filename)[1].lstrip('.').casefold()
+                if extension in WORKBOOK_EXTENSIONS and not filename.startswith('~$'):
+                    path = os.path.join(dirpath, filename)
+                    yield path, os.path.relpath(path, source)
+
+
+def output_stems(files):
+    """Output path, without extension, of each ``(path, name)`` pair."""
+    stems = [os.path.splitext(name)[0] for _, name in files]
+    # Compared case-insensitively, as on Windows and macOS file systems
+    counts = Counter(stem.casefold() for stem in stems)
+    return [name if counts[stem.casefold()] > 1 else stem
+            for stem, (_, name) in zip(stems, files)]
+
+
+def _write_atomic(path, write):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'wb') as fh:
+        write(fh)
+    os.replace(path + '.tmp', path)
+
+
+def write_jsonl(path, mcqs):
+    def write(fh):
+        for mcq in mcqs:
+            record = {"question": mcq["question"], "options": dict(mcq["options"]),
+                      "answer": mcq["answer"]}
+            fh.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+    _write_atomic(path, write)
+
+
+def write_bank(path, mcqs, provenance):
+    data = quiz.dump_mcq_bank(mcqs, provenance)
+    _write_atomic(path, lambda fh: fh.write(data))
+
+
+def convert_workbook(path, name, output_dir, formats, stem=None):
+    """Worker entry point: parse one workbook and write its outputs.
+
+    Outputs are written to ``stem`` (``name`` without its extension by
+    default) under ``output_dir``.  Returns the file's import report with its ``file`` name, ``bytes``,
+    ``questions``, ``outputs``, ``write_seconds`` and ``error``.
+    """
+    errors = []
+    report = {}
+    mcqs = quiz.extract_mcqs_from_excel(
+        path, report, on_error=lambda _, e: errors.append(str(e)), use_cache=False)
+    outputs = []
+    start = time.perf_counter()
+    if mcqs:
+        base = os.path.join(output_dir, stem or os.path.splitext(name)[0])
+        if 'jsonl' in formats:
+            write_jsonl(base + '.jsonl', mcqs)
+            outputs.append(base + '.jsonl')
+        if 'mcqb' in formats:
+            write_bank(base + '.mcqb', mcqs,
+                       quiz.bank_provenance([(os.path.basename(path), len(mcqs), report)]))
+            outputs.append(base + '.mcqb')
+    return {'file': name, 'bytes': os.path.getsize(path), 'questions': len(mcqs),
+            'outputs': outputs, 'write_seconds': time.perf_counter() - start,
+            'error': errors[0] if errors else None, **report}
+
+
+def _tally(result):
+    """(candidates, {reason: count}) over the sheets of one result."""
+    candidates = 0
+    rejected = {}
+    for sheet in result.get('sheets', []):
+        candidates += sheet.get('candidates', 0)
+        for reason, count in (sheet.get('rejected') or {}).items():
+            rejected[reason] = rejected.get(reason, 0) + count
+    return candidates, rejected
+
+
+def file_line(result):
+    if result['error']:
+        return f"FAILED {result['file']}: {result['error']}"
+    seconds = result.get('elapsed_seconds') or 0.0
+    rate = (f"{result['questions'] / seconds:,.0f} q/s, "
+            f"{result['bytes'] / seconds / (1024 * 1024):.1f} MB/s" if seconds else "-")
+    candidates, rejected = _tally(result)
+    return (f"{result['file']}: {result['questions']} question(s) from "
+            f"{len(result.get('sheets', []))} sheet(s) in {seconds:.2f} s ({rate}) • "
+            f"{candidates} candidate(s), {quiz.rejection_text(rejected)}")
+
+
+def summary_lines(results, seconds):
+    questions = sum(result['questions'] for result in results)
+    size = sum(result['bytes'] for result in results)
+    failed = sum(1 for result in results if result['error'])
+    candidates = 0
+    rejected = {}
+    for result in results:
+        file_candidates, file_rejected = _tally(result)
+        candidates += file_candidates
+        for reason, count in file_rejected.items():
+            rejected[reason] = rejected.get(reason, 0) + count
+    rate = f"{questions / seconds:,.0f} q/s, {size / seconds / (1024 * 1024):.1f} MB/s" if seconds else "-"
+    return [
+        f"{len(results)} file(s), {failed} failed, {questions} question(s) in {seconds:.2f} s ({rate})",
+        f"{candidates} candidate(s), {quiz.rejection_text(rejected)}",
+    ]
+
+
+def convert_all(files, output_dir, formats, workers, on_result=None):
+    """Convert ``(path, name)`` pairs, on ``workers`` processes when above 1.
+
+    Results are returned in input order; ``on_result(result)`` is called as
+    each file completes.
+    """
+    results = [None] * len(files)
+    stems = output_stems(files)
+
+    def done(pos, result):
+        results[pos] = result
+        if on_result is not None:
+            on_result(result)
+
+    if workers < 2 or len(files) < 2:
+        for pos, (path, name) in enumerate(files):
+            done(pos, convert_workbook(path, name, output_dir, formats, stems[pos]))
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        futures = {pool.submit(convert_workbook, path, name, output_dir, formats, stems[pos]): pos
+                   for pos, (path, name) in enumerate(files)}
+        for future in as_completed(futures):
+            pos = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Failures past parsing, e.g. an unwritable output directory
+                path, name = files[pos]
+                result = {'file': name, 'bytes': os.path.getsize(path), 'questions': 0,
+                          'outputs': [], 'error': str(e)}
+            done(pos, result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sources', nargs='+', help="workbooks or directories to search")
+    parser.add_argument('--output', '-o', required=True, help="directory for the converted banks")
+    parser.add_argument('--workers', type=int, default=quiz.INGEST_WORKERS,
+                        help="worker processes (default: MCQ_INGEST_WORKERS or the CPU count)")
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=list(FORMATS),
+                        dest='formats')
+    parser.add_argument('--report', help="write every file's import report to this JSON file")
+    args = parser.parse_args(argv)
+
+    files = list(find_workbooks(args.sources))
+    if not files:
+        print("no workbooks found")
+        return 0
+
+    started = time.perf_counter()
+    results = convert_all(files, args.output, args.formats, args.workers,
+                          on_result=lambda result: print(file_line(result), flush=True))
+    seconds = time.perf_counter() - started
+    for line in summary_lines(results, seconds):
+        print(line)
+
+    if args.report:
+        _write_atomic(args.report, lambda fh: fh.write(
+            json.dumps({'seconds': seconds, 'files': results}, indent=2, default=str).encode('utf-8')))
+    return 1 if any(result['error'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
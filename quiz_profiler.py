@@ -0,0 +1,217 @@
+"""Opt-in cProfile of Streamlit reruns.
+
+Profiling is off unless ``MCQ_PROFILE`` is set (every session), or the page
+is opened with ``?profile=<MCQ_PROFILE_TOKEN>`` (that session only; the
+query parameter is ignored while no token is configured).  Each profiled
+script run, and each fragment rerun, is timed with ``cProfile``; the
+slowest runs among the last ``MCQ_PROFILE_WINDOW`` are kept in a
+process-wide ``ProfileStore`` and can be exported as ``.prof`` files for
+``pstats``/snakeviz or as collapsed stacks for ``flamegraph.pl``/speedscope.
+
+Sheets parsed in ingest worker processes are not part of a rerun's profile;
+set ``MCQ_INGEST_WORKERS=0`` to profile parsing in-process.
+"""
+import cProfile
+import functools
+import io
+import itertools
+import marshal
+import os
+import threading
+import time
+
+import streamlit as st
+
+PROFILE_ENV = os.environ.get('MCQ_PROFILE', '').casefold() not in {'', '0', 'false', 'no'}
+PROFILE_TOKEN = os.environ.get('MCQ_PROFILE_TOKEN', '')
+# Slowest runs kept, out of how many recent runs
+PROFILE_KEEP = int(os.environ.get('MCQ_PROFILE_KEEP', '10'))
+PROFILE_WINDOW = int(os.environ.get('MCQ_PROFILE_WINDOW', '200'))
+
+# A run is labelled with the page function that took the most time in it
+PAGE_FUNCTIONS = ('show_home_page', 'show_quiz_page', 'show_results_page')
+
+# Paths shorter than this (or than this share of the run) are left out of
+# collapsed stacks, which bounds the walk over the call graph
+COLLAPSED_MIN_SECONDS = 1e-5
+COLLAPSED_MIN_SHARE = 1e-4
+
+_active = threading.local()
+# Held while a profile is running in any thread of this process
+_profile_lock = threading.Lock()
+
+
+def profiling_requested():
+    """True when this session's reruns should be profiled."""
+    if PROFILE_ENV:
+        return True
+    if not PROFILE_TOKEN:
+        return False
+    try:
+        return st.query_params.get('profile') == PROFILE_TOKEN
+    except Exception:
+        return False
+
+
+class ProfileStore:
+    """The slowest of the last ``window`` profiled runs, at most ``keep`` of them.
+
+    Runs are dicts with ``id``, ``label``, ``page``, ``seconds``,
+    ``finished`` (epoch seconds) and ``stats`` (the raw ``pstats`` table).
+    """
+
+    def __init__(self, keep=PROFILE_KEEP, window=PROFILE_WINDOW):
+        self.keep = keep
+        self.window = window
+        self._ids = itertools.count(1)
+        self._runs = []
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def add(self, label, seconds, stats):
+        with self._lock:
+            run_id = next(self._ids)
+            self.recorded += 1
+            # Runs that left the window are no longer "recent"
+            self._runs = [run for run in self._runs
+                          if run['id'] > run_id - self.window]
+            if len(self._runs) >= self.keep:
+                fastest = min(self._runs, key=lambda run: run['seconds'])
+                if fastest['seconds'] >= seconds:
+                    return
+                self._runs.remove(fastest)
+            self._runs.append({
+                'id': run_id, 'label': label, 'page': _page_of(stats),
+                'seconds': seconds, 'finished': time.time(), 'stats': stats,
+            })
+
+    def runs(self):
+        """Kept runs, slowest first."""
+        with self._lock:
+            return sorted(self._runs, key=lambda run: -run['seconds'])
+
+    def clear(self):
+        with self._lock:
+            self._runs = []
+
+
+@st.cache_resource
+def get_profile_store():
+    """Return the profile store shared by all sessions of this server process."""
+    return ProfileStore()
+
+
+def _page_of(stats):
+    best, best_time = None, 0.0
+    for (_, _, name), (_, _, _, cumtime, _) in stats.items():
+        if name in PAGE_FUNCTIONS and cumtime > best_time:
+            best, best_time = name, cumtime
+    return best
+
+
+def profiled(func):
+    """Profile calls of ``func`` when ``profiling_requested()``.
+
+    Calls made while a profile is already running (a fragment during a
+    full run) are part of that profile.  Only one profile runs at a time
+    in the process (Python 3.12+ allows one active ``cProfile``): runs of
+    other sessions that overlap it, or that start while another profiling
+    tool is active, are not profiled.
+    """
+    label = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_active, 'profiling', False) or not profiling_requested():
+            return func(*args, **kwargs)
+        if not _profile_lock.acquire(blocking=False):
+            return func(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # 'Another profiling tool is already active'
+                return func(*args, **kwargs)
+            _active.profiling = True
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                seconds = time.perf_counter() - start
+                _active.profiling = False
+                profile.create_stats()
+                get_profile_store().add(label, seconds, profile.stats)
+        finally:
+            _profile_lock.release()
+    return wrapper
+
+
+def _function_name(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins are recorded as ('~', 0, '<built-in method ...>')
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def pstats_bytes(run):
+    """The run in the ``.prof`` format read by ``pstats.Stats``."""
+    return marshal.dumps(run['stats'])
+
+
+def top_functions(run, limit=15, filename=None):
+    """[(function, calls, tottime, cumtime)] by cumulative time.
+
+    With ``filename``, only functions defined in that file are listed.
+    """
+    rows = [(_function_name(func), nc, tt, ct)
+            for func, (_, nc, tt, ct, _) in run['stats'].items()
+            if filename is None or func[0] == filename]
+    rows.sort(key=lambda row: -row[3])
+    return rows[:limit]
+
+
+def collapsed_stacks(run):
+    """The run as collapsed stacks ("root;caller;callee microseconds" lines).
+
+    cProfile records caller/callee pairs, not whole stacks, so a function's
+    time is split across the paths leading to it in proportion to the
+    time each caller spent in it.  Recursive calls are folded into the
+    first occurrence on a path, and paths under ``COLLAPSED_MIN_SECONDS``
+    or ``COLLAPSED_MIN_SHARE`` of the run are dropped.
+    """
+    stats = run['stats']
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+
+    threshold = max(COLLAPSED_MIN_SECONDS, run['seconds'] * COLLAPSED_MIN_SHARE)
+    totals = {}
+
+    def walk(func, path, names, path_time):
+        _, _, tottime, cumtime, _ = stats[func]
+        share = path_time / cumtime if cumtime else 0.0
+        own = tottime * share
+        if own >= threshold:
+            key = ';'.join(names)
+            totals[key] = totals.get(key, 0.0) + own
+        for callee, edge_time in callees.get(func, ()):
+            callee_time = edge_time * share
+            if callee in path or callee_time < threshold:
+                continue
+            walk(callee, path | {callee}, names + [_function_name(callee).replace(';', ',')],
+                 callee_time)
+
+    for root in roots:
+        walk(root, {root}, [_function_name(root).replace(';', ',')], stats[root][3])
+
+    out = io.StringIO()
+    for key, seconds in sorted(totals.items()):
+        micros = round(seconds * 1e6)
+        if micros:
+            out.write(f"{key} {micros}\n")
+    return out.getvalue().encode('utf-8')
@@ -0,0 +1,314 @@
+"""Durable quiz progress in SQLite, written behind the request path.
+
+Each session's attempt -- which questions the quiz holds, the answers,
+marks, current question and whether it was finished -- is one row of a
+WAL-mode SQLite database (``MCQ_PROGRESS_DB``, by default under the
+user's data directory; set it to an empty string to turn persistence off).
+Persistence is best effort: when the database cannot be opened or written,
+the error is logged and the quiz carries on without it.
+
+The page never waits for SQLite: transitions in ``quiz_state`` tell the
+session's ``ProgressRecorder`` what changed, which puts a small event on a
+queue.  A writer thread applies the events to its
+copy of the affected rows and writes them in one transaction per
+``MCQ_PROGRESS_FLUSH_MS`` (default 200), so a crash loses at most that
+much progress.
+
+A session is identified by a random token kept in the page URL
+(``?resume=<token>``); after a refresh or a server restart the row is read
+back with a single primary-key lookup and applied once the same question
+pool is loaded (see ``quiz_state.restore_progress``).
+"""
+import atexit
+import logging
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from array import array
+
+import streamlit as st
+
+# Outside the source tree, which is often read-only in containers
+PROGRESS_DB = os.environ.get('MCQ_PROGRESS_DB', os.path.join(
+    os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share'),
+    'mcq_quiz', 'progress.sqlite3'))
+PROGRESS_FLUSH_SECONDS = int(os.environ.get('MCQ_PROGRESS_FLUSH_MS', '200')) / 1000
+
+# Query parameter holding the session's resume token
+RESUME_PARAM = 'resume'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    token     TEXT PRIMARY KEY,
+    pool_key  TEXT NOT NULL,
+    quiz      BLOB,              -- uint32 pool indices; NULL for the whole pool
+    seed      INTEGER,
+    is_random INTEGER NOT NULL,
+    answers   BLOB NOT NULL,     -- AnswerSheet codes, one byte per question
+    marked    BLOB NOT NULL,     -- uint32 quiz positions
+    current   INTEGER NOT NULL,
+    finished  INTEGER NOT NULL,
+    updated   REAL NOT NULL
+) WITHOUT ROWID
+"""
+_COLUMNS = ('token', 'pool_key', 'quiz', 'seed', 'is_random', 'answers', 'marked',
+            'current', 'finished', 'updated')
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM progress WHERE token = ?"
+_UPSERT = (f"INSERT OR REPLACE INTO progress ({', '.join(_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(_COLUMNS))})")
+
+_STOP = object()
+
+LOGGER = logging.getLogger('mcq_quiz.progress')
+
+
+def new_token():
+    return secrets.token_urlsafe(16)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes NORMAL durable against application crashes; only a power
+    # loss can drop the last commits
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class ProgressStore:
+    """SQLite progress rows behind a write-behind queue.
+
+    ``submit`` only enqueues; the writer thread batches everything queued
+    within ``flush_interval`` into one transaction.  Rows it has not seen
+    since the last flush are read back from the database before events are
+    applied to them.  ``written``, ``batches`` and ``dropped`` count rows
+    written, transactions and events for unknown tokens.  Opening the
+    database raises ``sqlite3.Error``/``OSError``; once the writer thread
+    has failed, ``stopped`` is set and events are discarded.
+    """
+
+    def __init__(self, path=PROGRESS_DB, flush_interval=PROGRESS_FLUSH_SECONDS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.stopped = False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = _connect(path)
+        try:
+            conn.execute(_SCHEMA)
+        finally:
+            conn.close()
+        self._readers = threading.local()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='progress-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, event, token, *args):
+        """Queue ``event`` ('start', 'answer', 'mark', 'move' or 'finish') for ``token``."""
+        if not self.stopped:
+            self._queue.put((event, token, args))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is written."""
+        if self.stopped:
+            return True
+        done = threading.Event()
+        self._queue.put(('flush', None, (done,)))
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        """Write what is queued and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def load(self, token):
+        """The saved row for ``token`` as a dict, or None (one primary-key read).
+
+        A database error is logged and reads as no saved row.
+        """
+        try:
+            conn = getattr(self._readers, 'conn', None)
+            if conn is None:
+                conn = self._readers.conn = _connect(self.path)
+            row = conn.execute(_SELECT, (token,)).fetchone()
+        except sqlite3.Error as e:
+            LOGGER.warning("could not read saved progress from %s: %s", self.path, e)
+            return None
+        if row is None:
+            return None
+        saved = dict(zip(_COLUMNS, row))
+        saved['quiz'] = _uint32s(saved['quiz']) if saved['quiz'] is not None else None
+        saved['marked'] = _uint32s(saved['marked'])
+        saved['is_random'] = bool(saved['is_random'])
+        saved['finished'] = bool(saved['finished'])
+        return saved
+
+    def _run(self):
+        try:
+            conn = _connect(self.path)
+        except sqlite3.Error as e:
+            LOGGER.warning("progress writer stopped, cannot open %s: %s", self.path, e)
+            self._stop()
+            return
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _STOP and item[0] != 'flush':
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+            try:
+                self._write(conn, batch)
+            except sqlite3.Error as e:
+                # Progress is best effort; the quiz itself must go on
+                LOGGER.warning("could not save progress to %s: %s", self.path, e)
+            for item in batch:
+                if item is not _STOP and item[0] == 'flush':
+                    item[2][0].set()
+            if batch[-1] is _STOP:
+                conn.close()
+                return
+
+    def _write(self, conn, batch):
+        rows = {}
+        for item in batch:
+            if item is _STOP or item[0] == 'flush':
+                continue
+            event, token, args = item
+            if event == 'start':
+                rows[token] = args[0]
+                continue
+            row = rows.get(token)
+            if row is None:
+                row = rows[token] = self._read_row(conn, token)
+                if row is None:
+                    del rows[token]
+                    self.dropped += 1
+                    continue
+            if event == 'answer':
+                idx, code = args
+                if idx < len(row['answers']):
+                    row['answers'][idx] = code
+            elif event == 'mark':
+                idx, marked = args
+                (row['marked'].add if marked else row['marked'].discard)(idx)
+            elif event == 'move':
+                row['current'] = args[0]
+            elif event == 'finish':
+                row['finished'] = args[0]
+        if not rows:
+            return
+        now = time.time()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(_UPSERT, [
+                (token, row['pool_key'], row['quiz'], row['seed'], int(row['is_random']),
+                 bytes(row['answers']), array('I', sorted(row['marked'])).tobytes(),
+                 row['current'], int(row['finished']), now)
+                for token, row in rows.items()])
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        self.written += len(rows)
+        self.batches += 1
+
+    def _stop(self):
+        """Discard queued events and release anyone waiting on a flush."""
+        self.stopped = True
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[0] == 'flush':
+                item[2][0].set()
+
+    @staticmethod
+    def _read_row(conn, token):
+        row = conn.execute(_SELECT, (token,)).fetchone()
+        if row is None:
+            return None
+        row = dict(zip(_COLUMNS, row))
+        row['answers'] = bytearray(row['answers'])
+        row['marked'] = set(_uint32s(row['marked']))
+        return row
+
+
+def _uint32s(data):
+    values = array('I')
+    values.frombytes(data)
+    return values
+
+
+class ProgressRecorder:
+    """A session's link to the store: turns quiz changes into queued events.
+
+    Kept in session state under ``quiz_state.PROGRESS_KEY``; every method
+    returns as soon as the event is queued.
+    """
+
+    __slots__ = ('store', 'token')
+
+    def __init__(self, store, token):
+        self.store = store
+        self.token = token
+
+    def started(self, state):
+        """Snapshot a fresh (or restored) attempt from session ``state``."""
+        mcqs = state['mcqs']
+        indices = getattr(mcqs, 'indices', None)
+        self.store.submit('start', self.token, {
+            'pool_key': state.get('pool_key') or '',
+            'quiz': indices.tobytes() if indices is not None else None,
+            'seed': getattr(mcqs, 'seed', None),
+            'is_random': bool(state.get('is_random_quiz')),
+            'answers': bytearray(state['answered'].answers),
+            'marked': set(state['marked_questions']),
+            'current': state['current_question'],
+            'finished': bool(state.get('show_results')),
+        })
+
+    def answered(self, idx, code):
+        self.store.submit('answer', self.token, idx, code)
+
+    def marked(self, idx, marked):
+        self.store.submit('mark', self.token, idx, marked)
+
+    def moved(self, idx):
+        self.store.submit('move', self.token, idx)
+
+    def finished(self, finished):
+        self.store.submit('finish', self.token, finished)
+
+
+@st.cache_resource
+def get_progress_store():
+    """Return the progress store shared by all sessions, or None when disabled.
+
+    A database that cannot be opened (e.g. a read-only path) disables
+    persistence for this process instead of breaking the app.
+    """
+    if not PROGRESS_DB:
+        return None
+    try:
+        store = ProgressStore()
+    except (sqlite3.Error, OSError) as e:
+        LOGGER.warning("quiz progress will not be saved, cannot open %s: %s", PROGRESS_DB, e)
+        return None
+    # Write what is still queued when the server shuts down
+    atexit.register(store.close)
+    return store
@@ -0,0 +1,350 @@
+"""Quiz state transitions.
+
+Each transition takes the session state -- ``st.session_state`` in the app,
+any mutable mapping in tests -- and applies one user action to it.  The
+pages pass them to buttons as ``on_click`` callbacks, which Streamlit runs
+before the script, so a click costs a single script run instead of an
+inline update followed by ``st.rerun()``.
+
+This module does not import Streamlit or ``quiz``.  Messages for the user
+are left under ``NOTICE_KEY`` as ``(level, text)`` for the page to show.
+Progress changes are also reported to the recorder kept under
+``PROGRESS_KEY``, if any (see ``quiz_progress.ProgressRecorder``).
+"""
+import random
+import re
+from array import array
+from collections.abc import Sequence
+
+OPTION_LETTERS = ('A', 'B', 'C', 'D')
+
+# Widget key of the answer radio for question ``idx``
+QUESTION_WIDGET_KEY = "question_{}"
+QUESTION_WIDGET_KEY_RE = re.compile(r'^question_\d+$')
+
+# (level, text) left by a transition, e.g. ('warning', "No marked questions")
+NOTICE_KEY = 'notice'
+
+# Object told about progress changes, e.g. to persist them
+PROGRESS_KEY = 'progress_recorder'
+
+
+class AnswerSheet:
+    """Answers given in one quiz attempt, with running totals.
+
+    One byte per question: 0 while unanswered, otherwise 1 + the answer's
+    index in ``OPTION_LETTERS``, with ``WRONG_FLAG`` set when it was wrong.
+    ``correct`` and ``answered`` are updated as answers are recorded, so
+    the score is read without scanning the quiz.  ``get`` mirrors the
+    ``{index: letter}`` dict it replaces.
+    """
+
+    __slots__ = ('answers', 'correct', 'answered')
+
+    WRONG_FLAG = 0x80
+
+    def __init__(self, size):
+        self.answers = bytearray(size)
+        self.correct = 0
+        self.answered = 0
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Rebuild a sheet from saved ``answers`` bytes."""
+        sheet = cls(0)
+        sheet.answers = bytearray(codes)
+        wrong = sum(1 for code in sheet.answers if code & cls.WRONG_FLAG)
+        sheet.answered = len(sheet.answers) - sheet.answers.count(0)
+        sheet.correct = sheet.answered - wrong
+        return sheet
+
+    def __len__(self):
+        return len(self.answers)
+
+    def get(self, idx, default=None):
+        code = self.answers[idx] & ~self.WRONG_FLAG if 0 <= idx < len(self.answers) else 0
+        return OPTION_LETTERS[code - 1] if code else default
+
+    def record(self, idx, letter, correct_letter):
+        """Store the answer to question ``idx``; answers are final once given."""
+        if letter is None or self.answers[idx]:
+            return
+        code = OPTION_LETTERS.index(letter) + 1
+        self.answered += 1
+        if letter == correct_letter:
+            self.correct += 1
+        else:
+            code |= self.WRONG_FLAG
+        self.answers[idx] = code
+
+    def indices(self, status):
+        """Indices of the questions answered 'correct', 'wrong' or 'skipped'."""
+        import numpy as np
+
+        codes = np.frombuffer(bytes(self.answers), dtype=np.uint8)
+        if status == 'skipped':
+            selected = codes == 0
+        elif status == 'wrong':
+            selected = (codes & self.WRONG_FLAG) != 0
+        else:
+            selected = (codes != 0) & ((codes & self.WRONG_FLAG) == 0)
+        return np.flatnonzero(selected).tolist()
+
+
+def sample_indices(n, k, seed):
+    """``k`` distinct indices below ``n`` as ``array('I')``, fixed by ``(n, k, seed)``.
+
+    A partial Fisher-Yates shuffle driven by ``Random.random()``, the one
+    generator output Python promises to reproduce for a given seed, so a
+    sampled quiz can be rebuilt exactly later on.
+    """
+    k = min(k, n)
+    rng = random.Random(seed)
+    indices = array('I', range(n))
+    for i in range(k):
+        j = i + int(rng.random() * (n - i))
+        indices[i], indices[j] = indices[j], indices[i]
+    return indices[:k]
+
+
+class QuizView(Sequence):
+    """A quiz as positions into the loaded pool.
+
+    Holds the pool and an ``array('I')`` of pool indices, 4 bytes per
+    question, instead of a list of MCQ objects; questions are read from the
+    pool on access.  A view of a view indexes the underlying pool directly.
+    Sampled quizzes keep their ``seed``: ``QuizView.sample(pool, k, seed)``
+    rebuilds the same quiz from the same pool.
+    """
+
+    __slots__ = ('pool', 'indices', 'seed')
+
+    def __init__(self, pool, indices, seed=None):
+        if isinstance(pool, QuizView):
+            indices = [pool.indices[i] for i in indices]
+            pool = pool.pool
+        self.pool = pool
+        self.indices = (indices if isinstance(indices, array) and indices.typecode == 'I'
+                        else array('I', indices))
+        self.seed = seed
+
+    @classmethod
+    def sample(cls, pool, k, seed=None):
+        """``k`` questions drawn at random from ``pool`` (a fresh seed when None)."""
+        if seed is None:
+            seed = random.getrandbits(32)
+        return cls(pool, sample_indices(len(pool), k, seed), seed)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return QuizView(self, range(*idx.indices(len(self))))
+        return self.pool[self.indices[idx]]
+
+    def __iter__(self):
+        pool = self.pool
+        for idx in self.indices:
+            yield pool[idx]
+
+
+def generate_random_quiz(mcqs, num_questions, seed=None):
+    """Generate a random quiz with specified number of questions"""
+    if len(mcqs) < num_questions:
+        return mcqs
+
+    # Randomly select questions without replacement
+    return QuizView.sample(mcqs, num_questions, seed)
+
+
+def _recorder(state):
+    return state.get(PROGRESS_KEY)
+
+
+def notify(state, level, text):
+    """Leave a message for the next render ('info', 'warning' or 'error')."""
+    state[NOTICE_KEY] = (level, text)
+
+
+def _clear_answer_widgets(state):
+    # Radio values left over from the previous attempt
+    for key in [key for key in state
+                if isinstance(key, str) and QUESTION_WIDGET_KEY_RE.match(key)]:
+        del state[key]
+
+
+def reset_progress(state, mcqs, clear_marked=True):
+    """Start a fresh attempt at ``mcqs``."""
+    state['answered'] = AnswerSheet(len(mcqs))
+    state['current_question'] = 0
+    if clear_marked:
+        state['marked_questions'] = set()
+    state['show_analysis'] = False
+    _clear_answer_widgets(state)
+    state['quiz_started'] = True
+    state['show_results'] = False
+    recorder = _recorder(state)
+    if recorder is not None:
+        recorder.started(state)
+
+
+def restore_progress(state, pool, saved):
+    """Continue an attempt saved by a ``ProgressRecorder`` over ``pool``.
+
+    ``saved`` is a row from ``ProgressStore.load``; ``pool`` must be the
+    pool it was saved with (same ``pool_key``).  Returns False, changing
+    nothing, when the row does not fit the pool.
+    """
+    quiz = pool if saved['quiz'] is None else QuizView(pool, saved['quiz'], saved['seed'])
+    if (len(saved['answers']) != len(quiz)
+            or (saved['quiz'] is not None and any(idx >= len(pool) for idx in saved['quiz']))):
+        return False
+    state['mcqs'] = quiz
+    state['is_random_quiz'] = saved['is_random']
+    state['answered'] = AnswerSheet.from_codes(saved['answers'])
+    state['marked_questions'] = {idx for idx in saved['marked'] if idx < len(quiz)}
+    state['current_question'] = min(saved['current'], max(len(quiz) - 1, 0))
+    state['show_analysis'] = False
+    _clear_answer_widgets(state)
+    state['quiz_started'] = True
+    state['show_results'] = saved['finished']
+    recorder = _recorder(state)
+    if recorder is not None:
+        recorder.started(state)
+    return True
+
+
+def start_quiz(state, mcqs, is_random=False):
+    """Make ``mcqs`` the current quiz and start it from the first question."""
+    state['mcqs'] = mcqs
+    state['is_random_quiz'] = is_random
+    reset_progress(state, mcqs)
+
+
+def start_random_quiz(state, pool, num_questions, seed=None):
+    """Start a quiz of ``num_questions`` drawn at random from ``pool``."""
+    state['show_random_options'] = False
+    start_quiz(state, generate_random_quiz(pool, num_questions, seed), is_random=True)
+
+
+def set_random_options(state, shown):
+    state['show_random_options'] = shown
+
+
+def go_to_question(state, idx):
+    """Move to question ``idx``, dropping the radio state of the one being left."""
+    state.pop(QUESTION_WIDGET_KEY.format(state['current_question']), None)
+    state['current_question'] = idx
+    recorder = _recorder(state)
+    if recorder is not None:
+        recorder.moved(idx)
+
+
+def next_question(state):
+    go_to_question(state, min(len(state['mcqs']) - 1, state['current_question'] + 1))
+
+
+def previous_question(state):
+    go_to_question(state, max(0, state['current_question'] - 1))
+
+
+def toggle_mark(state):
+    idx = state['current_question']
+    if idx in state['marked_questions']:
+        state['marked_questions'].remove(idx)
+    else:
+        state['marked_questions'].add(idx)
+    recorder = _recorder(state)
+    if recorder is not None:
+        recorder.marked(idx, idx in state['marked_questions'])
+
+
+def submit_answer(state):
+    """Record the option selected in the current question's radio."""
+    idx = state['current_question']
+    sheet = state['answered']
+    if sheet.answers[idx]:
+        return
+    sheet.record(idx, state.get(QUESTION_WIDGET_KEY.format(idx)), state['mcqs'][idx]['answer'])
+    recorder = _recorder(state)
+    if recorder is not None and sheet.answers[idx]:
+        recorder.answered(idx, sheet.answers[idx])
+
+
+def open_dialog(state, name):
+    """Show the 'search' or 'marked' sidebar dialog."""
+    state[f'show_{name}'] = True
+
+
+def close_dialog(state, name):
+    state[f'show_{name}'] = False
+
+
+def jump_from_dialog(state, name, idx):
+    """Go to question ``idx`` picked in a sidebar dialog and close the dialog."""
+    go_to_question(state, idx)
+    close_dialog(state, name)
+
+
+def finish_quiz(state):
+    state['show_results'] = True
+    recorder = _recorder(state)
+    if recorder is not None:
+        recorder.finished(True)
+
+
+def review_question(state, idx):
+    """Go back into the quiz at question ``idx`` from the results page."""
+    go_to_question(state, idx)
+    state['quiz_started'] = True
+
+
+def retake_quiz(state):
+    """Answer the same questions again; marks are kept."""
+    reset_progress(state, state['mcqs'], clear_marked=False)
+
+
+def new_random_quiz(state):
+    """Draw a new random quiz of the current size from the loaded pool."""
+    size = len(state['mcqs'])
+    pool = state['original_mcqs']
+    if len(pool) < size:
+        notify(state, 'error',
+               f"❌ Not enough questions! You have {len(pool)} questions, "
+               f"but need at least {size} for a random quiz.")
+        return
+    state['mcqs'] = generate_random_quiz(pool, size)
+    reset_progress(state, state['mcqs'])
+
+
+def marked_quiz(state):
+    """Start a focused quiz made of the questions marked in this one."""
+    marked_list = sorted(state['marked_questions'])
+    if not marked_list:
+        notify(state, 'warning', "⚠️ No marked questions to create a quiz from!")
+        return
+    start_quiz(state, QuizView(state['mcqs'], marked_list))
+
+
+def go_home(state):
+    state['quiz_started'] = False
+    state['show_results'] = False
+
+
+def log_out(state):
+    """Sign out and drop the loaded pool and quiz.
+
+    The session's progress recorder and any saved attempt waiting to be
+    resumed are dropped too, so the next sign-in starts a new saved
+    attempt; the page also drops the resume token from the URL.
+    """
+    state.pop(PROGRESS_KEY, None)
+    state.pop('pending_resume', None)
+    state['authenticated'] = False
+    state['mcqs'] = []
+    state['original_mcqs'] = []
+    state['pool_handle'] = None
+    state['pool_outcome'] = None
+    state['quiz_started'] = False
+    state['show_results'] = False
@@ -0,0 +1,77 @@
+"""Compiled banks round-trip, and corrupt ones are rejected when loaded."""
+import mmap
+import struct
+
+import pytest
+
+import quiz
+
+MCQS = [
+    {"question": "Capital of France?", "options": {"A": "Paris", "B": "Lyon"}, "answer": "A"},
+    {"question": "Two plus two?", "options": {"A": "Three", "B": "Four", "C": "Five"}, "answer": "B"},
+]
+
+
+def _questions(mcqs):
+    return [(mcq['question'], dict(mcq['options']), mcq['answer']) for mcq in mcqs]
+
+
+def _patch_record(data, question, slot, value):
+    """Overwrite one uint32 of a question's record in ``.mcqb`` bytes."""
+    bank = quiz.CompiledBank(data)
+    records_start = len(data) - len(bank._strings) - bank._records.nbytes
+    data = bytearray(data)
+    struct.pack_into('<I', data, records_start + 4 * (question * 6 + slot), value)
+    return bytes(data)
+
+
+def test_round_trip(tmp_path):
+    data = quiz.dump_mcq_bank(MCQS)
+    path = tmp_path / 'bank.mcqb'
+    path.write_bytes(data)
+
+    for source in (data, str(path)):
+        bank, _ = quiz.load_mcq_bank(source)
+        assert _questions(bank) == _questions(MCQS)
+
+
+def test_mapped_bank_is_served_from_the_map(tmp_path):
+    path = tmp_path / 'bank.mcqb'
+    path.write_bytes(quiz.dump_mcq_bank(MCQS))
+
+    bank, _ = quiz.load_mcq_bank(str(path))
+
+    assert isinstance(bank._buffer, mmap.mmap)
+    assert bank[1]['options'] == {"A": "Three", "B": "Four", "C": "Five"}
+    # Pools made of the bank alone keep it rather than copying its texts
+    assert quiz.QuestionBank.from_mcqs(bank) is bank
+    assert quiz.deduplicate_mcqs(bank)[0] is bank
+
+
+@pytest.mark.parametrize('slot, value', [
+    (5, 7),                       # answer index past option D
+    (5, 3),                       # answer points at an absent option
+    (0, 99),                      # question text id out of range
+    (2, 99),                      # option text id out of range
+])
+def test_corrupt_record_is_rejected(slot, value):
+    data = _patch_record(quiz.dump_mcq_bank(MCQS), 1, slot, value)
+    with pytest.raises(ValueError, match="question 2"):
+        quiz.load_mcq_bank(data)
+
+
+def test_text_split_inside_a_character_is_rejected():
+    data = bytearray(quiz.dump_mcq_bank([
+        {"question": "Café?", "options": {"A": "Oui", "B": "Non"}, "answer": "A"}]))
+    # Move the second string's start offset into the middle of 'é'
+    bank = quiz.CompiledBank(bytes(data))
+    offsets_start = (len(data) - len(bank._strings) - bank._records.nbytes
+                     - bank._offsets.nbytes)
+    struct.pack_into('<Q', data, offsets_start + 8, 4)
+    with pytest.raises(ValueError, match="UTF-8"):
+        quiz.load_mcq_bank(bytes(data))
+
+
+def test_truncated_bank_is_rejected():
+    with pytest.raises(ValueError, match="truncated"):
+        quiz.load_mcq_bank(quiz.dump_mcq_bank(MCQS)[:-3])
@@ -0,0 +1,58 @@
+"""A misclassified sheet still gets the parsers it was tried with before classification."""
+import openpyxl
+import pandas as pd
+
+import quiz
+
+QUESTIONS = [
+    ("Which method collects answers from many respondents at once?",
+     ["Interviews", "Questionnaires", "Case studies", "Observation"], "B"),
+    ("Which gas do plants absorb from the air?",
+     ["Oxygen", "Nitrogen", "Carbon dioxide", "Helium"], "C"),
+]
+HEADER = ['Item', 'Text', 'Key']
+
+
+def legacy_rows_with_a_stray_marker():
+    # Legacy single-table rows followed by a 'Table1' marker with nothing
+    # under it: classified multi-table, so the multi-table parser finds
+    # nothing.  The free-form parser reads the option 'Questionnaires' as
+    # a new question, so only the single-table parser gets both questions.
+    rows = []
+    for question, options, answer in QUESTIONS:
+        rows.append(["Question", question, ""])
+        for letter, option in zip("ABCD", options):
+            rows.append([letter, option, answer if letter == answer else ""])
+    rows.append(["Table1", "", ""])
+    return rows
+
+
+def _questions(mcqs):
+    return [(mcq['question'], mcq['answer']) for mcq in mcqs]
+
+
+def test_single_table_is_tried_before_free_form():
+    df = pd.DataFrame(legacy_rows_with_a_stray_marker(), columns=HEADER)
+    assert quiz.detect_sheet_layout(df)[0] == 'multi_table'
+
+    report = {}
+    mcqs = quiz.parse_excel_to_mcqs(df, report)
+
+    assert _questions(mcqs) == [(question, answer) for question, _, answer in QUESTIONS]
+    assert report['layout'] == 'legacy'
+    assert report['confidence'] is None
+
+
+def test_streaming_reader_falls_back_the_same_way(tmp_path):
+    path = str(tmp_path / 'stray_marker.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER)
+    for row in legacy_rows_with_a_stray_marker():
+        sheet.append(row)
+    workbook.save(path)
+
+    mcqs, reports = quiz._parse_workbook_stream(path)
+
+    assert _questions(mcqs) == [(question, answer) for question, _, answer in QUESTIONS]
+    assert reports[0]['layout'] == 'legacy'
@@ -0,0 +1,15 @@
+import os
+
+import quiz_cli
+
+
+def test_output_stems_drop_the_extension():
+    files = [('in/a.xlsx', 'a.xlsx'), ('in/sub/b.xls', os.path.join('sub', 'b.xls'))]
+
+    assert quiz_cli.output_stems(files) == ['a', os.path.join('sub', 'b')]
+
+
+def test_colliding_workbooks_keep_their_extension():
+    files = [('in/foo.xls', 'foo.xls'), ('in/FOO.xlsx', 'FOO.xlsx'), ('in/bar.xlsx', 'bar.xlsx')]
+
+    assert quiz_cli.output_stems(files) == ['foo.xls', 'FOO.xlsx', 'bar']
@@ -0,0 +1,65 @@
+"""Profiled reruns of concurrent sessions must not break each other."""
+import cProfile
+import threading
+
+import pytest
+
+import quiz_profiler
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(quiz_profiler, 'PROFILE_ENV', True)
+    store = quiz_profiler.ProfileStore()
+    monkeypatch.setattr(quiz_profiler, 'get_profile_store', lambda: store)
+    return store
+
+
+def test_overlapping_runs_in_two_threads(store):
+    inside = threading.Barrier(2, timeout=10)
+
+    @quiz_profiler.profiled
+    def rerun(value):
+        inside.wait()
+        return value * 2
+
+    results = {}
+    errors = []
+
+    def session(value):
+        try:
+            results[value] = rerun(value)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, args=(value,)) for value in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == {1: 2, 2: 4}
+    # The second run overlapped the first and was not profiled
+    assert store.recorded == 1
+
+
+def test_runs_unprofiled_when_another_profiler_is_active(store, monkeypatch):
+    class BusyProfile(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(quiz_profiler.cProfile, 'Profile', BusyProfile)
+
+    @quiz_profiler.profiled
+    def rerun():
+        return 'ok'
+
+    assert rerun() == 'ok'
+    assert store.recorded == 0
+    # The lock is released, so later runs are profiled again
+    monkeypatch.undo()
+    monkeypatch.setattr(quiz_profiler, 'PROFILE_ENV', True)
+    monkeypatch.setattr(quiz_profiler, 'get_profile_store', lambda: store)
+    assert rerun() == 'ok'
+    assert store.recorded == 1
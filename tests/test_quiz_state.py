@@ -0,0 +1,163 @@
+"""Quiz transitions applied to a plain dict standing in for the session state."""
+from array import array
+
+import pytest
+
+import quiz_state
+from quiz_state import NOTICE_KEY, QUESTION_WIDGET_KEY, QuizView
+
+
+def make_pool(size):
+    return [{"question": f"Question {i}", "options": {"A": "yes", "B": "no"},
+             "answer": "AB"[i % 2]}
+            for i in range(size)]
+
+
+@pytest.fixture
+def state():
+    pool = make_pool(10)
+    state = {'original_mcqs': pool}
+    quiz_state.start_quiz(state, QuizView(pool, range(4)))
+    return state
+
+
+def answer(state, letter):
+    state[QUESTION_WIDGET_KEY.format(state['current_question'])] = letter
+    quiz_state.submit_answer(state)
+
+
+def saved_row(quiz, answers, current=0):
+    return {'quiz': quiz, 'seed': None, 'is_random': False, 'answers': answers,
+            'marked': array('I'), 'current': current, 'finished': False}
+
+
+def test_submit_answer_is_final(state):
+    answer(state, 'A')
+    answer(state, 'B')
+
+    sheet = state['answered']
+    assert sheet.get(0) == 'A'
+    assert (sheet.answered, sheet.correct) == (1, 1)
+
+
+def test_submit_without_a_selection_records_nothing(state):
+    quiz_state.submit_answer(state)
+
+    assert state['answered'].answered == 0
+    assert state['answered'].get(0) is None
+
+
+def test_wrong_answer_is_scored(state):
+    quiz_state.next_question(state)
+    answer(state, 'A')
+
+    sheet = state['answered']
+    assert sheet.get(1) == 'A'
+    assert (sheet.answered, sheet.correct) == (1, 0)
+    assert sheet.indices('wrong') == [1]
+
+
+def test_toggle_mark(state):
+    quiz_state.toggle_mark(state)
+    assert state['marked_questions'] == {0}
+
+    quiz_state.toggle_mark(state)
+    assert state['marked_questions'] == set()
+
+
+def test_navigation_is_clamped(state):
+    quiz_state.previous_question(state)
+    assert state['current_question'] == 0
+
+    for _ in range(10):
+        quiz_state.next_question(state)
+    assert state['current_question'] == 3
+
+    quiz_state.previous_question(state)
+    assert state['current_question'] == 2
+
+
+def test_moving_drops_the_radio_of_the_question_left(state):
+    state[QUESTION_WIDGET_KEY.format(0)] = 'A'
+    quiz_state.next_question(state)
+
+    assert QUESTION_WIDGET_KEY.format(0) not in state
+
+
+def test_new_random_quiz_needs_a_large_enough_pool(state):
+    quiz_state.start_quiz(state, QuizView(state['original_mcqs'], range(4)), is_random=True)
+    state['original_mcqs'] = make_pool(3)
+    quiz = state['mcqs']
+
+    quiz_state.new_random_quiz(state)
+
+    assert state[NOTICE_KEY][0] == 'error'
+    assert state['mcqs'] is quiz
+
+
+def test_new_random_quiz_draws_a_fresh_attempt(state):
+    answer(state, 'A')
+
+    quiz_state.new_random_quiz(state)
+
+    assert len(state['mcqs']) == 4
+    assert state['answered'].answered == 0
+    assert NOTICE_KEY not in state
+
+
+def test_marked_quiz_without_marks(state):
+    quiz = state['mcqs']
+
+    quiz_state.marked_quiz(state)
+
+    assert state[NOTICE_KEY][0] == 'warning'
+    assert state['mcqs'] is quiz
+
+
+def test_marked_quiz_holds_the_marked_questions(state):
+    for _ in range(2):
+        quiz_state.next_question(state)
+    quiz_state.toggle_mark(state)
+
+    quiz_state.marked_quiz(state)
+
+    assert [mcq['question'] for mcq in state['mcqs']] == ["Question 2"]
+    assert state['current_question'] == 0
+    assert state['marked_questions'] == set()
+
+
+def test_restore_progress(state):
+    pool = state['original_mcqs']
+    saved = saved_row(array('I', [7, 2]), bytes([1, 0]), current=5)
+
+    assert quiz_state.restore_progress(state, pool, saved)
+
+    assert [mcq['question'] for mcq in state['mcqs']] == ["Question 7", "Question 2"]
+    assert state['answered'].get(0) == 'A'
+    assert state['current_question'] == 1
+
+
+@pytest.mark.parametrize('quiz, answers', [
+    (array('I', [1, 2]), bytes(3)),   # answers for another quiz size
+    (array('I', [1, 10]), bytes(2)),  # index past the end of the pool
+    (None, bytes(4)),                 # whole-pool quiz of another size
+])
+def test_restore_progress_rejects_rows_that_do_not_fit(state, quiz, answers):
+    quiz_before = state['mcqs']
+
+    assert not quiz_state.restore_progress(state, state['original_mcqs'], saved_row(quiz, answers))
+
+    assert state['mcqs'] is quiz_before
+
+
+def test_log_out_drops_the_saved_attempt_link(state):
+    state[quiz_state.PROGRESS_KEY] = object()
+    state['pending_resume'] = {'pool_key': 'previous user'}
+    state['authenticated'] = True
+
+    quiz_state.log_out(state)
+
+    assert quiz_state.PROGRESS_KEY not in state
+    assert 'pending_resume' not in state
+    assert not state['authenticated']
+    assert state['mcqs'] == [] and not state['quiz_started']
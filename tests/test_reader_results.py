@@ -0,0 +1,18 @@
+"""The committed reader benchmark results must be usable by ``reader_candidates``."""
+import json
+import os
+
+import quiz
+
+
+def test_committed_results_rank_known_backends():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'benchmarks', 'reader_results.json')
+    with open(path, encoding='utf-8') as fh:
+        timings = json.load(fh)['timings']
+
+    names = {backend.name for backend in quiz.READER_BACKENDS}
+    assert 'xlsx' in timings
+    for extension, backends in timings.items():
+        assert set(backends) <= names
+        assert all(seconds > 0 for seconds in backends.values())
@@ -0,0 +1,23 @@
+"""The streaming reader must parse the same questions as the DataFrame readers."""
+import pytest
+
+import bench_parsers
+import quiz
+
+
+def _questions(mcqs):
+    return [(mcq['question'], dict(mcq['options']), mcq['answer']) for mcq in mcqs]
+
+
+@pytest.mark.parametrize('layout', bench_parsers.LAYOUTS)
+def test_streaming_matches_dataframe_parsing(tmp_path, layout):
+    # openpyxl's write-only mode leaves out the dimension record, so the
+    # streamed rows come back ragged
+    path = str(tmp_path / f'{layout}.xlsx')
+    bench_parsers.make_workbook(path, layout, 500, seed=3)
+
+    streamed, _ = quiz._parse_workbook_stream(path)
+    framed, _ = bench_parsers.dataframe_reader().parse(path)
+
+    assert len(streamed) == 500
+    assert _questions(streamed) == _questions(framed)